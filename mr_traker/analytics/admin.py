@@ -0,0 +1,39 @@
+from django.contrib import admin
+from .models import DailyRollup, WeeklyRollup, RecoveryBaseline, AthleteMonitorState, Alert
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('athlete', 'date', 'recovery_mean', 'hrv_mean', 'rhr_min', 'strain_total', 'kilojoule_total', 'workout_count')
+    list_filter = ('athlete',)
+    search_fields = ('athlete__user__username',)
+    ordering = ('-date',)
+
+
+@admin.register(WeeklyRollup)
+class WeeklyRollupAdmin(admin.ModelAdmin):
+    list_display = ('athlete', 'week_start', 'recovery_mean', 'hrv_mean', 'rhr_min', 'strain_total', 'kilojoule_total', 'workout_count')
+    list_filter = ('athlete',)
+    search_fields = ('athlete__user__username',)
+    ordering = ('-week_start',)
+
+
+@admin.register(RecoveryBaseline)
+class RecoveryBaselineAdmin(admin.ModelAdmin):
+    list_display = ('athlete', 'date', 'hrv_rmssd_milli', 'resting_heart_rate', 'hrv_z', 'rhr_z', 'off_baseline', 'stale', 'computed_at')
+    list_filter = ('off_baseline', 'stale')
+    search_fields = ('athlete__user__username',)
+
+
+@admin.register(AthleteMonitorState)
+class AthleteMonitorStateAdmin(admin.ModelAdmin):
+    list_display = ('athlete', 'recovery_samples', 'recovery_mean', 'low_recovery_streak', 'last_recovery_at', 'workout_samples', 'strain_mean', 'updated_at')
+    search_fields = ('athlete__user__username',)
+
+
+@admin.register(Alert)
+class AlertAdmin(admin.ModelAdmin):
+    list_display = ('athlete', 'kind', 'status', 'value', 'z_score', 'occurred_at', 'created_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('athlete__user__username',)
+    ordering = ('-occurred_at',)
@@ -0,0 +1,172 @@
+"""
+HRV and resting-heart-rate deviation from each athlete's own baseline.
+
+For every athlete, today's ln(rMSSD) and RHR are compared with the mean
+and standard deviation of the previous 7, 30 and 60 days. All athletes
+that need it are computed together as one athletes x days matrix.
+
+Results are cached in RecoveryBaseline. Ingesting recovery rows marks the
+athlete's row stale; it is recomputed on the next read, so reads for
+athletes with no new data never touch the Recovery table.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+
+from recovery.models import Recovery
+from .models import RecoveryBaseline
+from .rollups import local_date, midnight
+
+WINDOWS = (7, 30, 60)
+HISTORY_DAYS = max(WINDOWS)
+
+# An athlete is off baseline when, against the FLAG_WINDOW baseline, HRV
+# is at least FLAG_Z standard deviations below or RHR FLAG_Z above.
+FLAG_WINDOW = 30
+FLAG_Z = 1.5
+
+
+def min_samples(window):
+    return max(3, window // 2)
+
+
+def load_recovery_matrix(athlete_ids, today):
+    """
+    Daily ln(rMSSD) and RHR for the HISTORY_DAYS days before `today` and
+    today itself (last column), as two len(athlete_ids) x days arrays with
+    NaN on days without a recovery. Several recoveries in a day are averaged.
+    """
+    days = HISTORY_DAYS + 1
+    first_day = today - timedelta(days=HISTORY_DAYS)
+    shape = (len(athlete_ids), days)
+
+    rows = Recovery.objects.filter(
+        athlete_id__in=athlete_ids,
+        created_at__gte=midnight(first_day),
+        created_at__lt=midnight(today + timedelta(days=1)),
+    ).values_list('athlete_id', 'created_at', 'hrv_rmssd_milli', 'resting_heart_rate')
+
+    row_of = {athlete_id: index for index, athlete_id in enumerate(athlete_ids)}
+    origin = first_day.toordinal()
+    records = [
+        (row_of[athlete_id], local_date(created_at).toordinal() - origin,
+         np.nan if hrv is None else hrv, np.nan if rhr is None else rhr)
+        for athlete_id, created_at, hrv, rhr in rows
+    ]
+    if not records:
+        return np.full(shape, np.nan), np.full(shape, np.nan)
+
+    row_index, day_index, hrv, rhr = (np.array(column, dtype=float) for column in zip(*records))
+    cells = (row_index.astype(int), day_index.astype(int))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hrv_ln = np.where(hrv > 0, np.log(hrv), np.nan)
+
+    def daily_mean(values):
+        present = ~np.isnan(values)
+        sums, counts = np.zeros(shape), np.zeros(shape)
+        np.add.at(sums, (cells[0][present], cells[1][present]), values[present])
+        np.add.at(counts, (cells[0][present], cells[1][present]), 1)
+        out = np.full(shape, np.nan)
+        np.divide(sums, counts, out=out, where=counts > 0)
+        return out
+
+    return daily_mean(hrv_ln), daily_mean(rhr)
+
+
+def deviation(values, window):
+    """
+    (mean, std, z) per row: today's value (last column) against the
+    `window` days before it. NaN where there is too little history.
+    """
+    history = values[:, -window - 1:-1]
+    samples = np.sum(~np.isnan(history), axis=1)
+    enough = samples >= min_samples(window)
+
+    mean = np.full(values.shape[0], np.nan)
+    std = np.full(values.shape[0], np.nan)
+    if enough.any():
+        mean[enough] = np.nanmean(history[enough], axis=1)
+        std[enough] = np.nanstd(history[enough], axis=1)
+
+    z = np.full(values.shape[0], np.nan)
+    np.divide(values[:, -1] - mean, std, out=z, where=std > 0)
+    return mean, std, z
+
+
+def _value(number):
+    return None if np.isnan(number) else round(float(number), 4)
+
+
+def compute_baselines(athlete_ids, today):
+    """
+    Builds (unsaved) RecoveryBaseline rows for the given athletes.
+    """
+    hrv_ln, rhr = load_recovery_matrix(athlete_ids, today)
+    stats = {
+        window: (deviation(hrv_ln, window), deviation(rhr, window))
+        for window in WINDOWS
+    }
+
+    baselines = []
+    for row, athlete_id in enumerate(athlete_ids):
+        windows = {}
+        for window, ((hrv_mean, hrv_std, hrv_z), (rhr_mean, rhr_std, rhr_z)) in stats.items():
+            windows[str(window)] = {
+                'hrv_ln_mean': _value(hrv_mean[row]),
+                'hrv_ln_std': _value(hrv_std[row]),
+                'hrv_z': _value(hrv_z[row]),
+                'rhr_mean': _value(rhr_mean[row]),
+                'rhr_std': _value(rhr_std[row]),
+                'rhr_z': _value(rhr_z[row]),
+            }
+
+        flag = windows[str(FLAG_WINDOW)]
+        baselines.append(RecoveryBaseline(
+            athlete_id=athlete_id,
+            date=today,
+            stale=False,
+            hrv_rmssd_milli=_value(np.exp(hrv_ln[row, -1])),
+            resting_heart_rate=_value(rhr[row, -1]),
+            windows=windows,
+            hrv_z=flag['hrv_z'],
+            rhr_z=flag['rhr_z'],
+            off_baseline=(
+                (flag['hrv_z'] is not None and flag['hrv_z'] <= -FLAG_Z)
+                or (flag['rhr_z'] is not None and flag['rhr_z'] >= FLAG_Z)
+            ),
+        ))
+    return baselines
+
+
+def get_baselines(athlete_ids, today):
+    """
+    Fresh RecoveryBaseline rows for the given athletes, keyed by athlete id.
+    Only rows that are missing, stale or from another day are recomputed,
+    all in one batched pass.
+    """
+    athlete_ids = list(athlete_ids)
+    cached = {
+        baseline.athlete_id: baseline
+        for baseline in RecoveryBaseline.objects.filter(athlete_id__in=athlete_ids, stale=False, date=today)
+    }
+
+    missing = [athlete_id for athlete_id in athlete_ids if athlete_id not in cached]
+    if missing:
+        computed = compute_baselines(missing, today)
+        with transaction.atomic():
+            RecoveryBaseline.objects.bulk_create(
+                computed,
+                update_conflicts=True,
+                unique_fields=['athlete'],
+                update_fields=[
+                    'date', 'stale', 'hrv_rmssd_milli', 'resting_heart_rate',
+                    'windows', 'hrv_z', 'rhr_z', 'off_baseline', 'computed_at',
+                ],
+            )
+        cached.update((baseline.athlete_id, baseline) for baseline in computed)
+    return cached
+
+
+def invalidate_baseline(athlete):
+    RecoveryBaseline.objects.filter(athlete=athlete, stale=False).update(stale=True)
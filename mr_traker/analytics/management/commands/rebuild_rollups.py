@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import rebuild_rollups
+from users.models import AthleteProfile
+
+
+class Command(BaseCommand):
+    help = "Recomputes the daily/weekly rollups from stored Recovery and Workout rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--athlete", type=int, action="append", dest="athletes",
+            help="AthleteProfile id to rebuild (repeatable). Defaults to every athlete.",
+        )
+
+    def handle(self, *args, **options):
+        athletes = AthleteProfile.objects.all()
+        if options["athletes"]:
+            athletes = athletes.filter(pk__in=options["athletes"])
+
+        for profile in athletes.iterator():
+            days = rebuild_rollups(profile)
+            self.stdout.write(f"Athlete {profile.pk}: rebuilt {days} days.")
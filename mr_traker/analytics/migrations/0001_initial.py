@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0002_whoopsyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recovery_mean', models.FloatField(blank=True, null=True)),
+                ('hrv_mean', models.FloatField(blank=True, null=True)),
+                ('rhr_min', models.IntegerField(blank=True, null=True)),
+                ('recovery_count', models.IntegerField(default=0)),
+                ('strain_total', models.FloatField(default=0)),
+                ('kilojoule_total', models.FloatField(default=0)),
+                ('workout_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('athlete', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='users.athleteprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('athlete', 'date'), name='unique_daily_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recovery_mean', models.FloatField(blank=True, null=True)),
+                ('hrv_mean', models.FloatField(blank=True, null=True)),
+                ('rhr_min', models.IntegerField(blank=True, null=True)),
+                ('recovery_count', models.IntegerField(default=0)),
+                ('strain_total', models.FloatField(default=0)),
+                ('kilojoule_total', models.FloatField(default=0)),
+                ('workout_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('week_start', models.DateField()),
+                ('athlete', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_rollups', to='users.athleteprofile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('athlete', 'week_start'), name='unique_weekly_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('users', '0002_whoopsyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecoveryBaseline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('stale', models.BooleanField(default=False)),
+                ('hrv_rmssd_milli', models.FloatField(blank=True, null=True)),
+                ('resting_heart_rate', models.FloatField(blank=True, null=True)),
+                ('windows', models.JSONField(default=dict)),
+                ('hrv_z', models.FloatField(blank=True, null=True)),
+                ('rhr_z', models.FloatField(blank=True, null=True)),
+                ('off_baseline', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('athlete', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recovery_baseline', to='users.athleteprofile')),
+            ],
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_recoverybaseline'),
+        ('users', '0002_whoopsyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AthleteMonitorState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recovery_samples', models.IntegerField(default=0)),
+                ('recovery_mean', models.FloatField(blank=True, null=True)),
+                ('recovery_var', models.FloatField(blank=True, null=True)),
+                ('hrv_ln_mean', models.FloatField(blank=True, null=True)),
+                ('hrv_ln_var', models.FloatField(blank=True, null=True)),
+                ('rhr_mean', models.FloatField(blank=True, null=True)),
+                ('rhr_var', models.FloatField(blank=True, null=True)),
+                ('last_recovery_at', models.DateTimeField(blank=True, null=True)),
+                ('last_recovery_score', models.IntegerField(blank=True, null=True)),
+                ('low_recovery_streak', models.IntegerField(default=0)),
+                ('workout_samples', models.IntegerField(default=0)),
+                ('strain_mean', models.FloatField(blank=True, null=True)),
+                ('strain_var', models.FloatField(blank=True, null=True)),
+                ('last_workout_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('athlete', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='monitor_state', to='users.athleteprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Alert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('RECOVERY_DROP', 'Recovery drop'), ('HRV_DROP', 'HRV drop'), ('RHR_SPIKE', 'Resting heart rate spike'), ('LOW_RECOVERY_STREAK', 'Low recovery streak'), ('STRAIN_SPIKE', 'Strain spike')], max_length=30)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('RESOLVED', 'Resolved')], default='OPEN', max_length=10)),
+                ('source_id', models.CharField(max_length=50)),
+                ('occurred_at', models.DateTimeField()),
+                ('value', models.FloatField()),
+                ('baseline', models.FloatField(blank=True, null=True)),
+                ('z_score', models.FloatField(blank=True, null=True)),
+                ('message', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('athlete', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='users.athleteprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['athlete', 'status', '-occurred_at'], name='alert_athlete_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('athlete', 'kind', 'source_id'), name='unique_alert_per_record')],
+            },
+        ),
+    ]
@@ -0,0 +1,154 @@
+from django.db import models
+from users.models import AthleteProfile
+
+
+class RollupMetrics(models.Model):
+    """
+    Aggregates shared by the daily and weekly rollups.
+    Recovery metrics come from Recovery rows, load metrics from Workout rows.
+    """
+    recovery_mean = models.FloatField(blank=True, null=True)
+    hrv_mean = models.FloatField(blank=True, null=True)
+    rhr_min = models.IntegerField(blank=True, null=True)
+    recovery_count = models.IntegerField(default=0)
+
+    strain_total = models.FloatField(default=0)
+    kilojoule_total = models.FloatField(default=0)
+    workout_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class DailyRollup(RollupMetrics):
+    athlete = models.ForeignKey(AthleteProfile, on_delete=models.CASCADE, related_name='daily_rollups')
+    date = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['athlete', 'date'], name='unique_daily_rollup'),
+        ]
+
+    def __str__(self):
+        return f"DailyRollup({self.athlete_id}, {self.date})"
+
+
+class WeeklyRollup(RollupMetrics):
+    athlete = models.ForeignKey(AthleteProfile, on_delete=models.CASCADE, related_name='weekly_rollups')
+    # Monday of the ISO week
+    week_start = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['athlete', 'week_start'], name='unique_weekly_rollup'),
+        ]
+
+    def __str__(self):
+        return f"WeeklyRollup({self.athlete_id}, {self.week_start})"
+
+
+class RecoveryBaseline(models.Model):
+    """
+    Cached HRV / RHR baseline comparison for an athlete's latest day.
+    Marked stale when new recovery rows are ingested; recomputed on read.
+    See analytics/baselines.py.
+    """
+    athlete = models.OneToOneField(AthleteProfile, on_delete=models.CASCADE, related_name='recovery_baseline')
+    date = models.DateField()  # The day being compared with the baseline
+    stale = models.BooleanField(default=False)
+
+    hrv_rmssd_milli = models.FloatField(blank=True, null=True)
+    resting_heart_rate = models.FloatField(blank=True, null=True)
+
+    # {"7": {"hrv_ln_mean", "hrv_ln_std", "hrv_z", "rhr_mean", "rhr_std", "rhr_z"}, "30": ..., "60": ...}
+    windows = models.JSONField(default=dict)
+
+    # z-scores of the flagging window, kept as columns for filtering
+    hrv_z = models.FloatField(blank=True, null=True)
+    rhr_z = models.FloatField(blank=True, null=True)
+    off_baseline = models.BooleanField(default=False)
+
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"RecoveryBaseline({self.athlete_id}, {self.date})"
+
+
+class AthleteMonitorState(models.Model):
+    """
+    Running per-athlete state for the streaming anomaly detector: EWMA
+    mean/variance of each monitored metric, the newest record processed
+    and streak counters. Updated in O(1) per ingested record.
+    See analytics/monitoring.py.
+    """
+    athlete = models.OneToOneField(AthleteProfile, on_delete=models.CASCADE, related_name='monitor_state')
+
+    recovery_samples = models.IntegerField(default=0)
+    recovery_mean = models.FloatField(blank=True, null=True)
+    recovery_var = models.FloatField(blank=True, null=True)
+    hrv_ln_mean = models.FloatField(blank=True, null=True)
+    hrv_ln_var = models.FloatField(blank=True, null=True)
+    rhr_mean = models.FloatField(blank=True, null=True)
+    rhr_var = models.FloatField(blank=True, null=True)
+    last_recovery_at = models.DateTimeField(blank=True, null=True)
+    last_recovery_score = models.IntegerField(blank=True, null=True)
+    low_recovery_streak = models.IntegerField(default=0)
+
+    workout_samples = models.IntegerField(default=0)
+    strain_mean = models.FloatField(blank=True, null=True)
+    strain_var = models.FloatField(blank=True, null=True)
+    last_workout_at = models.DateTimeField(blank=True, null=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"AthleteMonitorState({self.athlete_id})"
+
+
+class Alert(models.Model):
+    RECOVERY_DROP = 'RECOVERY_DROP'
+    HRV_DROP = 'HRV_DROP'
+    RHR_SPIKE = 'RHR_SPIKE'
+    LOW_RECOVERY_STREAK = 'LOW_RECOVERY_STREAK'
+    STRAIN_SPIKE = 'STRAIN_SPIKE'
+    KIND_CHOICES = [
+        (RECOVERY_DROP, 'Recovery drop'),
+        (HRV_DROP, 'HRV drop'),
+        (RHR_SPIKE, 'Resting heart rate spike'),
+        (LOW_RECOVERY_STREAK, 'Low recovery streak'),
+        (STRAIN_SPIKE, 'Strain spike'),
+    ]
+
+    OPEN = 'OPEN'
+    RESOLVED = 'RESOLVED'
+    STATUS_CHOICES = [(OPEN, 'Open'), (RESOLVED, 'Resolved')]
+
+    athlete = models.ForeignKey(AthleteProfile, on_delete=models.CASCADE, related_name='alerts')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=OPEN)
+
+    # The WHOOP record that triggered it (cycle_id / workout id)
+    source_id = models.CharField(max_length=50)
+    occurred_at = models.DateTimeField()
+
+    value = models.FloatField()
+    baseline = models.FloatField(blank=True, null=True)
+    z_score = models.FloatField(blank=True, null=True)
+    message = models.CharField(max_length=255)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            # Re-ingesting the same record must not raise the alert twice
+            models.UniqueConstraint(fields=['athlete', 'kind', 'source_id'], name='unique_alert_per_record'),
+        ]
+        indexes = [
+            models.Index(fields=['athlete', 'status', '-occurred_at'], name='alert_athlete_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.athlete_id} ({self.status})"
@@ -0,0 +1,163 @@
+"""
+Streaming anomaly detection at ingest time.
+
+Each new recovery / workout record is scored against the athlete's running
+EWMA mean and variance (kept in AthleteMonitorState) and then folded into
+them, so the work per record is constant no matter how much history the
+athlete has. Crossing a threshold writes an Alert row.
+
+Only records newer than the last one processed update the state; re-scored
+older records (which re-ingestion upserts) are skipped.
+"""
+import math
+
+from django.utils import timezone
+
+from .models import Alert, AthleteMonitorState
+
+# Weight of the newest record in the running mean/variance (~ a 2-week memory).
+ALPHA = 2 / (14 + 1)
+# Records needed before z-scores are trusted.
+WARMUP_SAMPLES = 7
+
+HRV_DROP_Z = -2.0
+RHR_SPIKE_Z = 2.0
+RECOVERY_DROP_Z = -2.0
+STRAIN_SPIKE_Z = 2.5
+
+# WHOOP's "red" recovery zone
+LOW_RECOVERY_SCORE = 34
+LOW_RECOVERY_STREAK = 3
+
+
+def ewma_update(mean, var, value):
+    """
+    Returns (z, mean, var): the z-score of `value` against the running
+    mean/variance, then the updated mean/variance.
+    """
+    if mean is None:
+        return None, float(value), 0.0
+    z = (value - mean) / math.sqrt(var) if var > 0 else None
+    diff = value - mean
+    increment = ALPHA * diff
+    return z, mean + increment, (1 - ALPHA) * (var + diff * increment)
+
+
+def _state_for(athlete):
+    state, _ = AthleteMonitorState.objects.select_for_update().get_or_create(athlete=athlete)
+    return state
+
+
+def _alert(athlete, kind, source_id, occurred_at, value, baseline, z_score, message):
+    return Alert(
+        athlete=athlete, kind=kind, source_id=str(source_id), occurred_at=occurred_at,
+        value=value, baseline=baseline, z_score=None if z_score is None else round(z_score, 3),
+        message=message,
+    )
+
+
+def _save(state, alerts):
+    state.save()
+    if alerts:
+        Alert.objects.bulk_create(alerts, ignore_conflicts=True)
+    return alerts
+
+
+def process_recoveries(athlete, recoveries):
+    """
+    Folds newly ingested recoveries into the athlete's state, oldest first.
+    Returns the alerts raised.
+    """
+    state = _state_for(athlete)
+    alerts = []
+
+    for recovery in sorted(recoveries, key=lambda r: r.created_at):
+        if recovery.recovery_score is None:
+            continue  # Not scored yet; it comes back re-scored later
+        if state.last_recovery_at and recovery.created_at <= state.last_recovery_at:
+            continue
+
+        warm = state.recovery_samples >= WARMUP_SAMPLES
+        score = recovery.recovery_score
+
+        baseline = state.recovery_mean
+        z, state.recovery_mean, state.recovery_var = ewma_update(state.recovery_mean, state.recovery_var, score)
+        if warm and z is not None and z <= RECOVERY_DROP_Z:
+            alerts.append(_alert(
+                athlete, Alert.RECOVERY_DROP, recovery.cycle_id, recovery.created_at, score, baseline, z,
+                f"Recovery {score}% is well below the usual {baseline:.0f}%.",
+            ))
+
+        if recovery.hrv_rmssd_milli and recovery.hrv_rmssd_milli > 0:
+            baseline = state.hrv_ln_mean
+            z, state.hrv_ln_mean, state.hrv_ln_var = ewma_update(
+                state.hrv_ln_mean, state.hrv_ln_var, math.log(recovery.hrv_rmssd_milli))
+            if warm and z is not None and z <= HRV_DROP_Z:
+                alerts.append(_alert(
+                    athlete, Alert.HRV_DROP, recovery.cycle_id, recovery.created_at,
+                    recovery.hrv_rmssd_milli, math.exp(baseline), z,
+                    f"HRV {recovery.hrv_rmssd_milli:.0f} ms is well below the usual {math.exp(baseline):.0f} ms.",
+                ))
+
+        if recovery.resting_heart_rate:
+            baseline = state.rhr_mean
+            z, state.rhr_mean, state.rhr_var = ewma_update(
+                state.rhr_mean, state.rhr_var, recovery.resting_heart_rate)
+            if warm and z is not None and z >= RHR_SPIKE_Z:
+                alerts.append(_alert(
+                    athlete, Alert.RHR_SPIKE, recovery.cycle_id, recovery.created_at,
+                    recovery.resting_heart_rate, baseline, z,
+                    f"Resting HR {recovery.resting_heart_rate} bpm is well above the usual {baseline:.0f} bpm.",
+                ))
+
+        if score < LOW_RECOVERY_SCORE:
+            state.low_recovery_streak += 1
+            if state.low_recovery_streak == LOW_RECOVERY_STREAK:
+                alerts.append(_alert(
+                    athlete, Alert.LOW_RECOVERY_STREAK, recovery.cycle_id, recovery.created_at,
+                    state.low_recovery_streak, None, None,
+                    f"{LOW_RECOVERY_STREAK} red recoveries in a row.",
+                ))
+        else:
+            state.low_recovery_streak = 0
+
+        state.recovery_samples += 1
+        state.last_recovery_at = recovery.created_at
+        state.last_recovery_score = score
+
+    return _save(state, alerts)
+
+
+def process_workouts(athlete, workouts):
+    """
+    Folds newly ingested workouts into the athlete's state, oldest first.
+    Returns the alerts raised.
+    """
+    state = _state_for(athlete)
+    alerts = []
+
+    for workout in sorted(workouts, key=lambda w: w.start):
+        if workout.strain is None:
+            continue
+        if state.last_workout_at and workout.start <= state.last_workout_at:
+            continue
+
+        warm = state.workout_samples >= WARMUP_SAMPLES
+        baseline = state.strain_mean
+        z, state.strain_mean, state.strain_var = ewma_update(state.strain_mean, state.strain_var, workout.strain)
+        if warm and z is not None and z >= STRAIN_SPIKE_Z:
+            alerts.append(_alert(
+                athlete, Alert.STRAIN_SPIKE, workout.whoop_id, workout.start, workout.strain, baseline, z,
+                f"Workout strain {workout.strain:.1f} is well above the usual {baseline:.1f}.",
+            ))
+
+        state.workout_samples += 1
+        state.last_workout_at = workout.start
+
+    return _save(state, alerts)
+
+
+def resolve_alert(alert):
+    alert.status = Alert.RESOLVED
+    alert.resolved_at = timezone.now()
+    alert.save(update_fields=['status', 'resolved_at'])
@@ -0,0 +1,129 @@
+"""
+Incremental maintenance of the daily and weekly rollup tables.
+
+Only the days (and ISO weeks) touched by an ingested page are recomputed,
+each from the source rows of just that bucket, so the cost of keeping the
+rollups current is proportional to the page, not to the athlete's history.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, DateField, Min, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from recovery.models import Recovery
+from workouts.models import Workout
+from .models import DailyRollup, WeeklyRollup
+
+METRIC_FIELDS = [
+    'recovery_mean', 'hrv_mean', 'rhr_min', 'recovery_count',
+    'strain_total', 'kilojoule_total', 'workout_count', 'updated_at',
+]
+
+
+def local_date(value):
+    return timezone.localtime(value).date()
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _bucket_stats(athlete, buckets, trunc, span):
+    """
+    Aggregates Recovery and Workout rows per bucket for the given buckets.
+    Returns {bucket: {metric: value}} for buckets that have any data.
+    """
+    start = midnight(min(buckets))
+    end = midnight(max(buckets) + span)
+
+    recovery = (
+        Recovery.objects
+        .filter(athlete=athlete, created_at__gte=start, created_at__lt=end)
+        .annotate(bucket=trunc('created_at', output_field=DateField()))
+        .values('bucket')
+        .annotate(
+            recovery_mean=Avg('recovery_score'),
+            hrv_mean=Avg('hrv_rmssd_milli'),
+            rhr_min=Min('resting_heart_rate'),
+            recovery_count=Count('id'),
+        )
+    )
+    workouts = (
+        Workout.objects
+        .filter(athlete=athlete, start__gte=start, start__lt=end)
+        .annotate(bucket=trunc('start', output_field=DateField()))
+        .values('bucket')
+        .annotate(
+            strain_total=Sum('strain'),
+            kilojoule_total=Sum('kilojoule'),
+            workout_count=Count('id'),
+        )
+    )
+
+    stats = {}
+    for rows in (recovery, workouts):
+        for row in rows:
+            bucket = row.pop('bucket')
+            if bucket in buckets:
+                stats.setdefault(bucket, {}).update(row)
+    return stats
+
+
+def _refresh(model, key, athlete, buckets, trunc, span):
+    stats = _bucket_stats(athlete, buckets, trunc, span)
+
+    rows = []
+    for bucket, metrics in stats.items():
+        row = model(athlete=athlete, **{key: bucket}, **metrics)
+        row.strain_total = row.strain_total or 0
+        row.kilojoule_total = row.kilojoule_total or 0
+        rows.append(row)
+
+    with transaction.atomic():
+        # Buckets whose source rows are all gone (e.g. moved to another day).
+        model.objects.filter(athlete=athlete, **{f'{key}__in': buckets - stats.keys()}).delete()
+        model.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['athlete', key],
+            update_fields=METRIC_FIELDS,
+        )
+
+
+def refresh_rollups(athlete, days):
+    """
+    Recomputes the daily rollups for `days` and the weekly rollups of the
+    ISO weeks containing them.
+    """
+    days = set(days)
+    if not days:
+        return
+    _refresh(DailyRollup, 'date', athlete, days, TruncDate, timedelta(days=1))
+    _refresh(WeeklyRollup, 'week_start', athlete, {week_start(day) for day in days}, TruncWeek, timedelta(days=7))
+
+
+def rebuild_rollups(athlete, chunk_days=90):
+    """
+    Recomputes every rollup for an athlete from scratch, a chunk of days
+    at a time. For backfilling data that was stored before the rollups.
+    """
+    DailyRollup.objects.filter(athlete=athlete).delete()
+    WeeklyRollup.objects.filter(athlete=athlete).delete()
+
+    days = set(
+        Recovery.objects.filter(athlete=athlete)
+        .annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct()
+    ) | set(
+        Workout.objects.filter(athlete=athlete)
+        .annotate(day=TruncDate('start')).values_list('day', flat=True).distinct()
+    )
+    days = sorted(days)
+    for offset in range(0, len(days), chunk_days):
+        refresh_rollups(athlete, days[offset:offset + chunk_days])
+    return len(days)
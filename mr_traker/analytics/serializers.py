@@ -0,0 +1,39 @@
+from rest_framework import serializers
+from .models import DailyRollup, WeeklyRollup, RecoveryBaseline, Alert
+
+METRICS = (
+    "recovery_mean", "hrv_mean", "rhr_min", "recovery_count",
+    "strain_total", "kilojoule_total", "workout_count",
+)
+
+
+class DailyRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyRollup
+        fields = ("date",) + METRICS
+
+
+class WeeklyRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WeeklyRollup
+        fields = ("week_start",) + METRICS
+
+
+class RecoveryBaselineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecoveryBaseline
+        fields = (
+            "athlete", "date", "hrv_rmssd_milli", "resting_heart_rate",
+            "hrv_z", "rhr_z", "off_baseline", "windows", "computed_at",
+        )
+
+
+class AlertSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source="athlete.user.username", read_only=True)
+
+    class Meta:
+        model = Alert
+        fields = (
+            "id", "athlete", "username", "kind", "status", "source_id", "occurred_at",
+            "value", "baseline", "z_score", "message", "created_at", "resolved_at",
+        )
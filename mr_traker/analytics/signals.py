@@ -0,0 +1,40 @@
+from django.dispatch import receiver
+
+from recovery.models import Recovery
+from utils.response_cache import invalidate_athlete
+from utils.whoop_ingest import records_deleted, records_ingested
+from workouts.models import Workout
+from .baselines import invalidate_baseline
+from .monitoring import process_recoveries, process_workouts
+from .rollups import local_date, refresh_rollups
+
+
+@receiver(records_deleted, sender=Recovery)
+def recovery_deleted(sender, athlete, instances, **kwargs):
+    refresh_rollups(athlete, {local_date(recovery.created_at) for recovery in instances})
+    invalidate_baseline(athlete)
+
+
+@receiver(records_ingested, sender=Recovery)
+def recovery_ingested(sender, athlete, instances, previous=(), **kwargs):
+    # A re-scored recovery may have moved day; its old day needs refreshing too
+    refresh_rollups(athlete, {local_date(recovery.created_at) for recovery in [*instances, *previous]})
+    invalidate_baseline(athlete)
+    process_recoveries(athlete, instances)
+
+
+@receiver(records_deleted, sender=Workout)
+def workout_deleted(sender, athlete, instances, **kwargs):
+    refresh_rollups(athlete, {local_date(workout.start) for workout in instances})
+
+
+@receiver(records_ingested, sender=Workout)
+def workout_ingested(sender, athlete, instances, previous=(), **kwargs):
+    refresh_rollups(athlete, {local_date(workout.start) for workout in [*instances, *previous]})
+    process_workouts(athlete, instances)
+
+
+@receiver(records_deleted)
+@receiver(records_ingested)
+def invalidate_cached_responses(sender, athlete, instances, **kwargs):
+    invalidate_athlete(athlete.pk)
@@ -0,0 +1,254 @@
+from datetime import timedelta
+
+import numpy as np
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from users.models import User, AthleteProfile
+from utils.whoop_ingest import ingest_recoveries, ingest_workouts
+from . import training_load
+from .models import DailyRollup, WeeklyRollup, RecoveryBaseline, Alert, AthleteMonitorState
+from .rollups import week_start
+
+
+def stamp(value):
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def recovery_record(cycle_id, when, score, hrv, rhr):
+    return {
+        "cycle_id": cycle_id,
+        "score_state": "SCORED",
+        "score": {"recovery_score": score, "hrv_rmssd_milli": hrv, "resting_heart_rate": rhr},
+        "created_at": stamp(when),
+        "updated_at": stamp(when),
+    }
+
+
+def workout_record(whoop_id, when, strain, kilojoule):
+    return {
+        "id": whoop_id,
+        "start": stamp(when),
+        "end": stamp(when + timedelta(hours=1)),
+        "score": {"strain": strain, "kilojoule": kilojoule},
+    }
+
+
+class AthleteTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="athlete", password="pw")
+        self.profile = AthleteProfile.objects.create(user=self.user)
+        self.client.force_authenticate(self.user)
+        # Noon today, so records never straddle midnight
+        self.today = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+
+class RollupTests(AthleteTestCase):
+    def test_ingest_updates_daily_and_weekly_rollups(self):
+        yesterday = self.today - timedelta(days=1)
+        ingest_recoveries(self.profile, [
+            recovery_record(1, yesterday, 40, 50.0, 55),
+            recovery_record(2, self.today, 80, 70.0, 50),
+        ])
+        ingest_workouts(self.profile, [
+            workout_record("a", self.today, 10.0, 1000.0),
+            workout_record("b", self.today + timedelta(hours=2), 5.5, 500.0),
+        ])
+
+        day = DailyRollup.objects.get(athlete=self.profile, date=self.today.date())
+        self.assertEqual((day.recovery_mean, day.hrv_mean, day.rhr_min), (80, 70.0, 50))
+        self.assertEqual((day.strain_total, day.kilojoule_total, day.workout_count), (15.5, 1500.0, 2))
+
+        week = WeeklyRollup.objects.get(athlete=self.profile, week_start=week_start(self.today.date()))
+        expected = 2 if yesterday.date() >= week.week_start else 1
+        self.assertEqual(week.recovery_count, expected)
+
+    def test_rescored_record_updates_its_bucket(self):
+        ingest_recoveries(self.profile, [recovery_record(1, self.today, 40, 50.0, 55)])
+        ingest_recoveries(self.profile, [recovery_record(1, self.today, 90, 50.0, 55)])
+
+        day = DailyRollup.objects.get(athlete=self.profile, date=self.today.date())
+        self.assertEqual((day.recovery_mean, day.recovery_count), (90, 1))
+
+    def test_record_moved_to_another_day_leaves_its_old_buckets(self):
+        old_start = self.today - timedelta(days=8)
+        ingest_workouts(self.profile, [workout_record("a", old_start, 10.0, 1000.0)])
+        ingest_recoveries(self.profile, [recovery_record(1, old_start, 40, 50.0, 55)])
+        ingest_workouts(self.profile, [workout_record("a", self.today, 10.0, 1000.0)])
+        ingest_recoveries(self.profile, [recovery_record(1, self.today, 40, 50.0, 55)])
+
+        self.assertFalse(DailyRollup.objects.filter(athlete=self.profile, date=old_start.date()).exists())
+        self.assertFalse(
+            WeeklyRollup.objects.filter(athlete=self.profile, week_start=week_start(old_start.date())).exists())
+        day = DailyRollup.objects.get(athlete=self.profile, date=self.today.date())
+        self.assertEqual((day.workout_count, day.recovery_count), (1, 1))
+
+    def test_trend_endpoints_read_rollups(self):
+        ingest_workouts(self.profile, [
+            workout_record("old", self.today - timedelta(days=40), 8.0, 800.0),
+            workout_record("new", self.today, 12.0, 1200.0),
+        ])
+
+        daily = self.client.get(reverse('trends-daily'), {'days': 7})
+        weekly = self.client.get(reverse('trends-weekly'), {'weeks': 12})
+
+        self.assertEqual([d["strain_total"] for d in daily.json()], [12.0])
+        self.assertEqual([w["strain_total"] for w in weekly.json()], [8.0, 12.0])
+
+    def test_trainer_needs_linked_athlete(self):
+        trainer = User.objects.create_user(username="coach", password="pw", role=User.IS_TRAINER)
+        self.client.force_authenticate(trainer)
+
+        self.assertEqual(self.client.get(reverse('trends-daily'), {'athlete': self.profile.pk}).status_code, 404)
+        self.profile.trainers.add(trainer)
+        self.assertEqual(self.client.get(reverse('trends-daily'), {'athlete': self.profile.pk}).status_code, 200)
+
+
+class TrainingLoadTests(AthleteTestCase):
+    def test_constant_load_metrics(self):
+        metrics = training_load.compute_metrics(np.full((2, 200), 10.0))
+
+        self.assertTrue(np.isnan(metrics["acwr_rolling"][0, 26]))
+        self.assertAlmostEqual(metrics["acwr_rolling"][0, 27], 1.0)
+        self.assertAlmostEqual(metrics["acwr_ewma"][1, -1], 1.0, places=2)
+        # No variation within the week: monotony is undefined, not infinite.
+        self.assertTrue(np.isnan(metrics["monotony"][0, -1]))
+
+    def test_monotony_and_training_strain(self):
+        week = [10.0, 0.0] * 3 + [10.0]
+        metrics = training_load.compute_metrics(np.array([week]))
+
+        mean, std = np.mean(week), np.std(week)
+        self.assertAlmostEqual(metrics["monotony"][0, -1], mean / std)
+        self.assertAlmostEqual(metrics["training_strain"][0, -1], sum(week) * mean / std)
+
+    def test_endpoint_returns_series_from_rollups(self):
+        ingest_workouts(self.profile, [
+            workout_record(str(day), self.today - timedelta(days=day), 10.0, 1000.0) for day in range(40)
+        ])
+
+        response = self.client.get(reverse('training-load'), {'days': 14})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["dates"]), 14)
+        self.assertEqual(response.json()["load"][-1], 10.0)
+        self.assertEqual(response.json()["acwr_rolling"][-1], 1.0)
+
+    def test_roster_endpoint_returns_latest_values_per_athlete(self):
+        trainer = User.objects.create_user(username="coach", password="pw", role=User.IS_TRAINER)
+        self.profile.trainers.add(trainer)
+        ingest_workouts(self.profile, [workout_record("w", self.today, 12.0, 1000.0)])
+        self.client.force_authenticate(trainer)
+
+        response = self.client.get(reverse('training-load-roster'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["load"], 12.0)
+
+
+class BaselineTests(AthleteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.trainer = User.objects.create_user(username="coach", password="pw", role=User.IS_TRAINER)
+        self.profile.trainers.add(self.trainer)
+        history = [
+            recovery_record(day, self.today - timedelta(days=day), 60, 45.0 if day % 2 else 55.0, 50)
+            for day in range(1, 61)
+        ]
+        ingest_recoveries(self.profile, history)
+
+    def test_low_hrv_today_is_off_baseline(self):
+        ingest_recoveries(self.profile, [recovery_record(1000, self.today, 20, 30.0, 50)])
+
+        baseline = self.client.get(reverse('baselines')).json()
+
+        history = np.log([45.0, 55.0] * 15)
+        expected_z = (np.log(30.0) - history.mean()) / history.std()
+        self.assertAlmostEqual(baseline["windows"]["30"]["hrv_z"], expected_z, places=3)
+        self.assertAlmostEqual(baseline["hrv_z"], expected_z, places=3)
+        self.assertIsNone(baseline["windows"]["30"]["rhr_z"])  # RHR never varied
+        self.assertTrue(baseline["off_baseline"])
+
+    def test_roster_is_served_from_cache_until_new_recovery_arrives(self):
+        self.client.force_authenticate(self.trainer)
+        self.assertEqual(self.client.get(reverse('baselines-roster'), {'off': '1'}).json(), [])
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('baselines-roster'))
+        self.assertFalse(any('recovery_recovery' in q['sql'] for q in ctx.captured_queries))
+
+        ingest_recoveries(self.profile, [recovery_record(1000, self.today, 20, 30.0, 50)])
+        self.assertTrue(RecoveryBaseline.objects.get(athlete=self.profile).stale)
+
+        off = self.client.get(reverse('baselines-roster'), {'off': '1'}).json()
+        self.assertEqual([b["athlete"] for b in off], [self.profile.pk])
+
+
+class MonitoringTests(AthleteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.trainer = User.objects.create_user(username="coach", password="pw", role=User.IS_TRAINER)
+        self.profile.trainers.add(self.trainer)
+        self.history = [
+            recovery_record(day, self.today - timedelta(days=30 - day), 70 + day % 3, 50.0 + day % 3, 50 + day % 2)
+            for day in range(1, 30)
+        ]
+        ingest_recoveries(self.profile, self.history)
+
+    def test_state_tracks_history_without_alerting(self):
+        state = AthleteMonitorState.objects.get(athlete=self.profile)
+        self.assertEqual(state.recovery_samples, 29)
+        self.assertAlmostEqual(state.recovery_mean, 71, delta=1.5)
+        self.assertFalse(Alert.objects.exists())
+
+    def test_drop_raises_alerts_once(self):
+        drop = recovery_record(100, self.today, 20, 25.0, 62)
+        ingest_recoveries(self.profile, [drop])
+        kinds = set(Alert.objects.filter(athlete=self.profile).values_list("kind", flat=True))
+        self.assertEqual(kinds, {Alert.RECOVERY_DROP, Alert.HRV_DROP, Alert.RHR_SPIKE})
+
+        # Re-ingesting the same or older records leaves the state alone
+        state = AthleteMonitorState.objects.get(athlete=self.profile)
+        ingest_recoveries(self.profile, self.history + [drop])
+        self.assertEqual(AthleteMonitorState.objects.get(athlete=self.profile).recovery_samples, state.recovery_samples)
+        self.assertEqual(Alert.objects.count(), 3)
+
+    def test_low_recovery_streak(self):
+        ingest_recoveries(self.profile, [
+            recovery_record(100 + day, self.today + timedelta(days=day), 30, 50.0, 50) for day in range(4)
+        ])
+        streaks = Alert.objects.filter(kind=Alert.LOW_RECOVERY_STREAK)
+        self.assertEqual(streaks.count(), 1)
+        self.assertEqual(streaks.get().source_id, "102")
+
+    def test_strain_spike(self):
+        ingest_workouts(self.profile, [
+            workout_record(f"w{day}", self.today - timedelta(days=20 - day), 8.0 + day % 2, 1000) for day in range(20)
+        ])
+        self.assertFalse(Alert.objects.exists())
+        ingest_workouts(self.profile, [workout_record("big", self.today + timedelta(hours=1), 19.0, 4000)])
+        self.assertEqual(Alert.objects.get().kind, Alert.STRAIN_SPIKE)
+
+    def test_trainer_lists_and_resolves_open_alerts(self):
+        ingest_recoveries(self.profile, [recovery_record(100, self.today, 20, 25.0, 62)])
+        self.client.force_authenticate(self.trainer)
+
+        with CaptureQueriesContext(connection) as ctx:
+            alerts = self.client.get(reverse('alerts')).json()
+        self.assertEqual(len(alerts), 3)
+        self.assertEqual(alerts[0]["username"], "athlete")
+        self.assertFalse(any('recovery_recovery' in q['sql'] for q in ctx.captured_queries))
+
+        response = self.client.post(reverse('alert-resolve', args=[alerts[0]["id"]]))
+        self.assertEqual(response.json()["status"], Alert.RESOLVED)
+        self.assertEqual(len(self.client.get(reverse('alerts')).json()), 2)
+        self.assertEqual(len(self.client.get(reverse('alerts'), {'status': 'resolved'}).json()), 1)
+
+        other = User.objects.create_user(username="other", password="pw", role=User.IS_TRAINER)
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(reverse('alerts')).json(), [])
+        self.assertEqual(self.client.post(reverse('alert-resolve', args=[alerts[1]["id"]])).status_code, 404)
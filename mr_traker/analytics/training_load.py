@@ -0,0 +1,183 @@
+"""
+Vectorized training-load metrics: acute:chronic workload ratio (rolling and
+EWMA), Foster monotony and training strain, and Banister fitness-fatigue.
+
+Loads are a 2-D array with one row per athlete and one column per day
+(0 on days without data). Every metric is computed for all rows at once:
+the rolling metrics in a single cumulative-sum pass, the recursive ones
+(EWMA, Banister) in one pass over the days that updates the whole roster
+per step.
+"""
+from datetime import timedelta
+
+import numpy as np
+
+from cycles.models import Cycle
+from .models import DailyRollup
+from .rollups import local_date, midnight
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+# Banister impulse-response model
+FITNESS_TAU = 42
+FATIGUE_TAU = 7
+FITNESS_GAIN = 1.0
+FATIGUE_GAIN = 2.0
+
+# History loaded before the requested window so the long filters settle.
+WARMUP_DAYS = 3 * FITNESS_TAU
+
+SOURCES = ('workout', 'cycle')
+
+
+def safe_divide(numerator, denominator):
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def rolling_sum(loads, window):
+    """
+    Trailing `window`-day sums; NaN until a full window is available.
+    """
+    padded = np.zeros((loads.shape[0], loads.shape[1] + 1))
+    np.cumsum(loads, axis=1, out=padded[:, 1:])
+    out = np.full(loads.shape, np.nan)
+    out[:, window - 1:] = padded[:, window:] - padded[:, :-window]
+    return out
+
+
+def rolling_mean(loads, window):
+    return rolling_sum(loads, window) / window
+
+
+def rolling_std(loads, window):
+    """
+    Trailing population standard deviation.
+    """
+    mean = rolling_mean(loads, window)
+    mean_of_squares = rolling_mean(loads * loads, window)
+    # Cancellation can leave tiny negatives where the variance is zero.
+    return np.sqrt(np.clip(mean_of_squares - mean * mean, 0, None))
+
+
+def recursive_filter(loads, decay, gain):
+    """
+    y[t] = decay * y[t-1] + gain * x[t], for every row at once.
+    """
+    out = np.empty(loads.shape)
+    state = np.zeros(loads.shape[0])
+    for day in range(loads.shape[1]):
+        state *= decay
+        state += gain * loads[:, day]
+        out[:, day] = state
+    return out
+
+
+def ewma(loads, span):
+    alpha = 2 / (span + 1)
+    return recursive_filter(loads, 1 - alpha, alpha)
+
+
+def acwr_rolling(loads):
+    return safe_divide(rolling_mean(loads, ACUTE_DAYS), rolling_mean(loads, CHRONIC_DAYS))
+
+
+def acwr_ewma(loads):
+    return safe_divide(ewma(loads, ACUTE_DAYS), ewma(loads, CHRONIC_DAYS))
+
+
+def monotony(loads):
+    """
+    Foster monotony: weekly mean load / weekly standard deviation.
+    """
+    return safe_divide(rolling_mean(loads, ACUTE_DAYS), rolling_std(loads, ACUTE_DAYS))
+
+
+def training_strain(loads):
+    """
+    Foster training strain: weekly load * monotony.
+    """
+    return rolling_sum(loads, ACUTE_DAYS) * monotony(loads)
+
+
+def banister(loads):
+    """
+    Returns (fitness, fatigue, performance).
+    """
+    fitness = recursive_filter(loads, np.exp(-1 / FITNESS_TAU), 1.0)
+    fatigue = recursive_filter(loads, np.exp(-1 / FATIGUE_TAU), 1.0)
+    return fitness, fatigue, FITNESS_GAIN * fitness - FATIGUE_GAIN * fatigue
+
+
+def compute_metrics(loads):
+    """
+    Every metric for every row of `loads`, as a dict of name -> 2-D array.
+    """
+    loads = np.asarray(loads, dtype=float)
+    fitness, fatigue, performance = banister(loads)
+    return {
+        'load': loads,
+        'acwr_rolling': acwr_rolling(loads),
+        'acwr_ewma': acwr_ewma(loads),
+        'monotony': monotony(loads),
+        'training_strain': training_strain(loads),
+        'fitness': fitness,
+        'fatigue': fatigue,
+        'performance': performance,
+    }
+
+
+def load_matrix(athlete_ids, first_day, last_day, source='workout'):
+    """
+    Daily load for each athlete between two dates (inclusive), as a
+    len(athlete_ids) x days array in the order of `athlete_ids`.
+
+    `workout` sums workout strain per day (from the daily rollups);
+    `cycle` uses WHOOP's day strain.
+    """
+    athlete_ids = list(athlete_ids)
+    days = (last_day - first_day).days + 1
+    loads = np.zeros((len(athlete_ids), days))
+    if not athlete_ids:
+        return loads
+
+    if source == 'cycle':
+        rows = (
+            Cycle.objects
+            .filter(
+                athlete_id__in=athlete_ids,
+                start__gte=midnight(first_day),
+                start__lt=midnight(last_day + timedelta(days=1)),
+            )
+            .exclude(strain__isnull=True)
+            .values_list('athlete_id', 'start', 'strain')
+        )
+        rows = [(athlete_id, local_date(start), strain) for athlete_id, start, strain in rows]
+    else:
+        rows = (
+            DailyRollup.objects
+            .filter(athlete_id__in=athlete_ids, date__gte=first_day, date__lte=last_day)
+            .values_list('athlete_id', 'date', 'strain_total')
+        )
+
+    row_of = {athlete_id: index for index, athlete_id in enumerate(athlete_ids)}
+    origin = first_day.toordinal()
+    records = [(row_of[athlete_id], day.toordinal() - origin, value) for athlete_id, day, value in rows]
+    if records:
+        row_index, day_index, values = (np.array(column) for column in zip(*records))
+        np.add.at(loads, (row_index, day_index), values.astype(float))
+    return loads
+
+
+def training_load(athlete_ids, last_day, days, source='workout'):
+    """
+    Metrics for the `days` days ending on `last_day`, computed with
+    WARMUP_DAYS of extra history. Returns (dates, {metric: 2-D array}).
+    """
+    first_day = last_day - timedelta(days=days - 1)
+    loads = load_matrix(athlete_ids, first_day - timedelta(days=WARMUP_DAYS), last_day, source)
+    metrics = {name: values[:, -days:] for name, values in compute_metrics(loads).items()}
+    dates = [first_day + timedelta(days=offset) for offset in range(days)]
+    return dates, metrics
@@ -0,0 +1,13 @@
+from django.urls import path
+from .views import DailyTrendView, WeeklyTrendView, TrainingLoadView, RosterTrainingLoadView, BaselineView, RosterBaselineView, AlertListView, AlertResolveView
+
+urlpatterns = [
+    path('trends/daily/', DailyTrendView.as_view(), name='trends-daily'),
+    path('trends/weekly/', WeeklyTrendView.as_view(), name='trends-weekly'),
+    path('training-load/', TrainingLoadView.as_view(), name='training-load'),
+    path('training-load/roster/', RosterTrainingLoadView.as_view(), name='training-load-roster'),
+    path('baselines/', BaselineView.as_view(), name='baselines'),
+    path('baselines/roster/', RosterBaselineView.as_view(), name='baselines-roster'),
+    path('alerts/', AlertListView.as_view(), name='alerts'),
+    path('alerts/<int:pk>/resolve/', AlertResolveView.as_view(), name='alert-resolve'),
+]
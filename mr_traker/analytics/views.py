@@ -0,0 +1,258 @@
+from datetime import timedelta
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status, permissions
+from django.utils import timezone
+
+from users.models import AthleteProfile, User
+from . import training_load
+from .baselines import get_baselines
+from .models import DailyRollup, WeeklyRollup, Alert
+from .monitoring import resolve_alert
+from .rollups import week_start
+from .serializers import DailyRollupSerializer, WeeklyRollupSerializer, RecoveryBaselineSerializer, AlertSerializer
+
+
+def get_target_athlete(request):
+    """
+    The athlete a request is about: the caller's own profile, or for a
+    trainer the linked athlete given by ?athlete=<AthleteProfile id>.
+    Returns (profile, None) or (None, error Response).
+    """
+    user = request.user
+
+    if user.role == User.IS_TRAINER:
+        athlete_id = request.query_params.get("athlete")
+        if not athlete_id:
+            return None, Response({"detail": "Trainers must pass ?athlete=<id>."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return AthleteProfile.objects.get(pk=athlete_id, trainers=user), None
+        except (AthleteProfile.DoesNotExist, ValueError):
+            return None, Response({"detail": "Athlete not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    if not hasattr(user, "athlete_profile"):
+        return None, Response({"detail": "User is not an athlete."}, status=status.HTTP_400_BAD_REQUEST)
+    return user.athlete_profile, None
+
+
+def int_param(request, name, default, maximum=None):
+    value = int(request.query_params.get(name, default))
+    if value < 1 or (maximum and value > maximum):
+        raise ValueError(name)
+    return value
+
+
+def to_json_values(array):
+    """
+    A 1-D float array as a JSON-friendly list (NaN -> None).
+    """
+    return [None if value != value else round(float(value), 3) for value in array]
+
+
+class DailyTrendView(APIView):
+    """
+    GET /api/analytics/trends/daily/
+    Per-day rollups (recovery, HRV, RHR, strain, kilojoules, workouts),
+    read straight from the rollup table.
+    Query Params: ?days=30&athlete=<id> (athlete: trainers only)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        profile, error = get_target_athlete(request)
+        if error:
+            return error
+
+        try:
+            days = int_param(request, "days", 30)
+        except ValueError:
+            return Response({"detail": "days must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        since = timezone.localdate() - timedelta(days=days - 1)
+        rollups = DailyRollup.objects.filter(athlete=profile, date__gte=since).order_by("date")
+        serializer = DailyRollupSerializer(rollups, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class WeeklyTrendView(APIView):
+    """
+    GET /api/analytics/trends/weekly/
+    Per-ISO-week rollups, read straight from the rollup table.
+    Query Params: ?weeks=12&athlete=<id> (athlete: trainers only)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        profile, error = get_target_athlete(request)
+        if error:
+            return error
+
+        try:
+            weeks = int_param(request, "weeks", 12)
+        except ValueError:
+            return Response({"detail": "weeks must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        since = week_start(timezone.localdate()) - timedelta(weeks=weeks - 1)
+        rollups = WeeklyRollup.objects.filter(athlete=profile, week_start__gte=since).order_by("week_start")
+        serializer = WeeklyRollupSerializer(rollups, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class TrainingLoadView(APIView):
+    """
+    GET /api/analytics/training-load/
+    Daily training-load series for one athlete: load, ACWR (rolling and
+    EWMA), monotony, training strain and Banister fitness/fatigue/performance.
+    Query Params: ?days=90&source=workout|cycle&athlete=<id> (athlete: trainers only)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        profile, error = get_target_athlete(request)
+        if error:
+            return error
+
+        try:
+            days = int_param(request, "days", 90, maximum=5 * 366)
+        except ValueError:
+            return Response({"detail": "days must be between 1 and 1830."}, status=status.HTTP_400_BAD_REQUEST)
+        source = request.query_params.get("source", "workout")
+        if source not in training_load.SOURCES:
+            return Response({"detail": "source must be workout or cycle."}, status=status.HTTP_400_BAD_REQUEST)
+
+        dates, metrics = training_load.training_load([profile.pk], timezone.localdate(), days, source)
+
+        data = {"dates": dates}
+        data.update({name: to_json_values(values[0]) for name, values in metrics.items()})
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class RosterTrainingLoadView(APIView):
+    """
+    GET /api/analytics/training-load/roster/
+    Today's training-load metrics for every athlete of the logged-in
+    trainer, computed for the whole roster in one batched pass.
+    Query Params: ?source=workout|cycle
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        trainer = request.user
+        if trainer.role != User.IS_TRAINER:
+            return Response({"detail": "Only trainers can view their athletes."}, status=status.HTTP_403_FORBIDDEN)
+
+        source = request.query_params.get("source", "workout")
+        if source not in training_load.SOURCES:
+            return Response({"detail": "source must be workout or cycle."}, status=status.HTTP_400_BAD_REQUEST)
+
+        athletes = list(
+            AthleteProfile.objects.filter(trainers=trainer)
+            .order_by("user__username")
+            .values_list("pk", "user__username")
+        )
+        _, metrics = training_load.training_load([pk for pk, _ in athletes], timezone.localdate(), 1, source)
+        latest = {name: to_json_values(values[:, -1]) for name, values in metrics.items()}
+
+        data = [
+            {"id": pk, "username": username, **{name: values[row] for name, values in latest.items()}}
+            for row, (pk, username) in enumerate(athletes)
+        ]
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class BaselineView(APIView):
+    """
+    GET /api/analytics/baselines/
+    Today's HRV (ln rMSSD) and RHR against the athlete's own 7/30/60-day
+    baselines, with z-scores.
+    Query Params: ?athlete=<id> (trainers only)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        profile, error = get_target_athlete(request)
+        if error:
+            return error
+
+        baseline = get_baselines([profile.pk], timezone.localdate())[profile.pk]
+        return Response(RecoveryBaselineSerializer(baseline).data, status=status.HTTP_200_OK)
+
+
+class RosterBaselineView(APIView):
+    """
+    GET /api/analytics/baselines/roster/
+    Baseline deviation for every athlete of the logged-in trainer.
+    Served from the cache; only athletes with new recovery data are
+    recomputed, together in one pass.
+    Query Params: ?off=1 (only athletes that are off baseline today)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        trainer = request.user
+        if trainer.role != User.IS_TRAINER:
+            return Response({"detail": "Only trainers can view their athletes."}, status=status.HTTP_403_FORBIDDEN)
+
+        athlete_ids = AthleteProfile.objects.filter(trainers=trainer).values_list("pk", flat=True)
+        baselines = sorted(get_baselines(athlete_ids, timezone.localdate()).values(), key=lambda b: b.athlete_id)
+        if request.query_params.get("off") in ("1", "true"):
+            baselines = [baseline for baseline in baselines if baseline.off_baseline]
+
+        serializer = RecoveryBaselineSerializer(baselines, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+def visible_alerts(user):
+    """
+    Alerts of the trainer's linked athletes, or the athlete's own.
+    """
+    if user.role == User.IS_TRAINER:
+        return Alert.objects.filter(athlete__trainers=user)
+    return Alert.objects.filter(athlete__user=user)
+
+
+class AlertListView(APIView):
+    """
+    GET /api/analytics/alerts/
+    Anomaly alerts raised at ingest time, newest first. Reads the alert
+    table only (indexed on athlete, status, occurred_at).
+    Query Params: ?status=OPEN|RESOLVED&athlete=<id>&limit=50
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        alert_status = request.query_params.get("status", Alert.OPEN).upper()
+        if alert_status not in (Alert.OPEN, Alert.RESOLVED):
+            return Response({"detail": "status must be OPEN or RESOLVED."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int_param(request, "limit", 50, maximum=500)
+        except ValueError:
+            return Response({"detail": "limit must be between 1 and 500."}, status=status.HTTP_400_BAD_REQUEST)
+
+        alerts = visible_alerts(request.user).filter(status=alert_status)
+        athlete_id = request.query_params.get("athlete")
+        if athlete_id:
+            if not athlete_id.isdigit():
+                return Response({"detail": "athlete must be an id."}, status=status.HTTP_400_BAD_REQUEST)
+            alerts = alerts.filter(athlete_id=athlete_id)
+
+        alerts = alerts.select_related("athlete__user").order_by("-occurred_at")[:limit]
+        return Response(AlertSerializer(alerts, many=True).data, status=status.HTTP_200_OK)
+
+
+class AlertResolveView(APIView):
+    """
+    POST /api/analytics/alerts/<id>/resolve/
+    Marks an alert as resolved.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        alert = visible_alerts(request.user).filter(pk=pk).select_related("athlete__user").first()
+        if alert is None:
+            return Response({"detail": "Alert not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if alert.status != Alert.RESOLVED:
+            resolve_alert(alert)
+        return Response(AlertSerializer(alert).data, status=status.HTTP_200_OK)
@@ -0,0 +1,69 @@
+"""
+DRF TokenAuthentication vs. CachedTokenAuthentication.
+
+    python -m benchmarks.bench_auth [--requests 2000] [--users 50]
+
+Sends authenticated requests, spread over `users` tokens, to the cheapest
+authenticated endpoint (cache stats: nothing but authentication touches
+the database) and to the recovery list, and reports requests/sec and
+queries/request for each authentication class.
+"""
+import argparse
+import time
+
+from benchmarks.common import make_athlete, measure, setup_django
+
+
+def bench(client, url, tokens, requests):
+    with measure() as result:
+        started = time.perf_counter()
+        for index in range(requests):
+            response = client.get(url, HTTP_AUTHORIZATION=f"Token {tokens[index % len(tokens)]}")
+            assert response.status_code == 200, response.status_code
+        seconds = time.perf_counter() - started
+    return requests / seconds, result['queries'] / requests
+
+
+def run(requests, users):
+    from django.core.cache import cache
+    from django.test import Client
+    from django.urls import reverse
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from rest_framework.views import APIView
+    from users.authentication import CachedTokenAuthentication, local_tokens
+
+    # Staff athletes, so both endpoints accept every token
+    tokens = []
+    for number in range(users):
+        profile = make_athlete(f"auth-athlete-{number}")
+        profile.user.is_staff = True
+        profile.user.save()
+        tokens.append(Token.objects.create(user=profile.user).key)
+
+    client = Client()
+    endpoints = [("cache stats", reverse('cache-stats')), ("recovery list", reverse('recovery-list'))]
+    print(f"{'endpoint':<14} {'authentication':<28} {'req/s':>8} {'queries/req':>12}")
+    for label, url in endpoints:
+        for authentication in (TokenAuthentication, CachedTokenAuthentication):
+            # Views inherit this unless they set their own
+            APIView.authentication_classes = [authentication]
+            local_tokens.clear()
+            cache.clear()
+            bench(client, url, tokens, min(requests, len(tokens)))  # warm up
+            rate, queries = bench(client, url, tokens, requests)
+            print(f"{label:<14} {authentication.__name__:<28} {rate:>8.0f} {queries:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.requests, args.users)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-record update_or_create vs. bulk upsert for WHOOP ingestion.
+
+    python -m benchmarks.bench_ingest [--records 1000] [--page 25]
+
+Reports SQL queries and wall time per 1k records for a first load
+(inserts) and a re-sync of the same data (updates).
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import make_athlete, measure, recovery_record, setup_django, workout_record
+
+
+def per_record(profile, ingester, records):
+    """The pre-bulk ingestion path: one update_or_create per record."""
+    for item in records:
+        instance = ingester.from_record(profile, item)
+        defaults = {name: getattr(instance, name) for name in ingester.update_fields}
+        ingester.model.objects.update_or_create(
+            **{ingester.unique_field: getattr(instance, ingester.unique_field)},
+            defaults=defaults,
+        )
+
+
+def run(records, page):
+    from recovery.models import Recovery
+    from workouts.models import Workout
+    from utils.whoop_ingest import recovery_ingester, workout_ingester
+
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    datasets = [
+        ("recovery", Recovery, recovery_ingester,
+         [recovery_record(i, base + timedelta(days=i)) for i in range(records)]),
+        ("workout", Workout, workout_ingester,
+         [workout_record(i, base + timedelta(hours=i)) for i in range(records)]),
+    ]
+    scale = 1000 / records
+
+    print(f"{'resource':<10} {'strategy':<16} {'pass':<7} {'queries/1k':>11} {'ms/1k':>9}")
+    for name, model, ingester, data in datasets:
+        for strategy in ("update_or_create", "bulk_upsert"):
+            model.objects.all().delete()
+            profile = make_athlete(f"bench-{name}-{strategy}")
+            for label in ("insert", "update"):
+                with measure() as result:
+                    for offset in range(0, records, page):
+                        chunk = data[offset:offset + page]
+                        if strategy == "bulk_upsert":
+                            ingester.ingest(profile, chunk)
+                        else:
+                            per_record(profile, ingester, chunk)
+                print(
+                    f"{name:<10} {strategy:<16} {label:<7} "
+                    f"{result['queries'] * scale:>11.0f} {result['seconds'] * 1000 * scale:>9.1f}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--page", type=int, default=25, help="Records per WHOOP page.")
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.records, args.page)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+WHOOP sync throughput against the local fake WHOOP server.
+
+    python -m benchmarks.bench_sync [--athletes 1 100 1000] [--days 14]
+        [--latency 0.005] [--jitter 0.005] [--error-rate 0.01] [--rate-limit]
+
+For each athlete count, syncs every athlete once from scratch (initial)
+and once more (incremental, only the watermark overlap comes back), the
+way `whoop_sync` does: one athlete after another. Reports records/sec,
+DB queries per record and p50/p99 per-athlete sync latency, plus the
+fake server's request and 429 counts.
+
+The shared rate limiter is off unless --rate-limit is given (then with
+limits high enough never to wait, so only its own cost is measured).
+"""
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+from benchmarks.common import make_athlete, measure, setup_django
+from benchmarks.fake_whoop import FakeWhoop
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def connect_athletes(count, offset):
+    from django.utils import timezone
+
+    profiles = []
+    expires_at = timezone.now() + timedelta(days=1)
+    for number in range(offset + 1, offset + count + 1):
+        profile = make_athlete(f"sync-athlete-{number}")
+        profile.whoop_user_id = str(number)
+        profile.whoop_access_token = f"token-{number}"
+        profile.whoop_refresh_token = f"refresh-{number}"
+        profile.whoop_token_expires_at = expires_at
+        profile.save()
+        profiles.append(profile)
+    return profiles
+
+
+def sync_pass(profiles, fake):
+    """
+    Syncs each athlete once; returns the row of figures for this pass.
+    """
+    from utils.whoop_sync import sync_athlete
+
+    requests_before, throttled_before = fake.counts['requests'], fake.counts['throttled']
+    latencies = []
+    records = 0
+    queries = 0
+    started = time.perf_counter()
+    for profile in profiles:
+        with measure() as result:
+            results = sync_athlete(profile)
+        latencies.append(result['seconds'])
+        queries += result['queries']
+        records += sum(results.values())
+    seconds = time.perf_counter() - started
+
+    return {
+        'records': records,
+        'records_per_second': records / seconds if seconds else 0.0,
+        'queries_per_record': queries / records if records else float(queries),
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'api_calls': fake.counts['requests'] - requests_before,
+        'throttled': fake.counts['throttled'] - throttled_before,
+    }
+
+
+def run(athlete_counts, days, latency, jitter, error_rate, rate_limit):
+    from utils import whoop_client
+    from utils.whoop_client import WhoopClient
+    from utils.whoop_rate_limit import RateLimiter
+
+    fake = FakeWhoop(days=days, latency=latency, jitter=jitter, error_rate=error_rate).start()
+    # Every caller goes through get_client(); point the singleton at the fake.
+    # A small backoff keeps injected 429s from dominating the timings.
+    limiter = RateLimiter(limits={'bench': (10 ** 9, 60)}) if rate_limit else None
+    whoop_client._client = WhoopClient(base_url=fake.url, backoff_base=0.01, backoff_max=0.05, limiter=limiter)
+
+    print(f"fake WHOOP at {fake.url}: {days} days/athlete, latency {latency * 1000:.0f}ms "
+          f"+0..{jitter * 1000:.0f}ms, 429 rate {error_rate:.0%}, rate limiter {'on' if rate_limit else 'off'}")
+    print(f"{'athletes':>8} {'pass':<12} {'records':>8} {'rec/s':>8} {'queries/rec':>12} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'api calls':>10} {'429s':>6}")
+
+    offset = 0
+    try:
+        for count in athlete_counts:
+            profiles = connect_athletes(count, offset)
+            offset += count
+            for label in ('initial', 'incremental'):
+                row = sync_pass(profiles, fake)
+                print(f"{count:>8} {label:<12} {row['records']:>8} {row['records_per_second']:>8.0f} "
+                      f"{row['queries_per_record']:>12.2f} {row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                      f"{row['api_calls']:>10} {row['throttled']:>6}")
+    finally:
+        fake.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--athletes", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--days", type=int, default=14, help="Days of history per athlete.")
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds added to every WHOOP response.")
+    parser.add_argument("--jitter", type=float, default=0.005, help="Extra random seconds, 0..jitter.")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Share of API calls answered with 429.")
+    parser.add_argument("--rate-limit", action="store_true", help="Route calls through the shared rate limiter.")
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.athletes, args.days, args.latency, args.jitter, args.error_rate, args.rate_limit)
+
+
+if __name__ == "__main__":
+    main()
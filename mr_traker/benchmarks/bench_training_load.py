@@ -0,0 +1,92 @@
+"""
+Vectorized training-load engine vs. a pure-Python loop.
+
+    python -m benchmarks.bench_training_load [--athletes 500] [--years 5]
+
+Both compute the same metrics on the same random daily loads; the script
+checks they agree and reports the wall time of each.
+"""
+import argparse
+import math
+import time
+
+from benchmarks.common import setup_django
+
+
+def python_metrics(loads):
+    """
+    The same metrics as analytics.training_load.compute_metrics, one
+    athlete and one day at a time.
+    """
+    from analytics import training_load as tl
+
+    def divide(a, b):
+        return a / b if b else math.nan
+
+    results = []
+    fitness_decay, fatigue_decay = math.exp(-1 / tl.FITNESS_TAU), math.exp(-1 / tl.FATIGUE_TAU)
+    acute_alpha, chronic_alpha = 2 / (tl.ACUTE_DAYS + 1), 2 / (tl.CHRONIC_DAYS + 1)
+    for row in loads:
+        acute_ewma = chronic_ewma = fitness = fatigue = 0.0
+        metrics = {name: [] for name in ('acwr_rolling', 'acwr_ewma', 'monotony', 'training_strain', 'performance')}
+        for day, load in enumerate(row):
+            acute_ewma = (1 - acute_alpha) * acute_ewma + acute_alpha * load
+            chronic_ewma = (1 - chronic_alpha) * chronic_ewma + chronic_alpha * load
+            fitness = fitness_decay * fitness + load
+            fatigue = fatigue_decay * fatigue + load
+            metrics['acwr_ewma'].append(divide(acute_ewma, chronic_ewma))
+            metrics['performance'].append(tl.FITNESS_GAIN * fitness - tl.FATIGUE_GAIN * fatigue)
+
+            week = row[day - tl.ACUTE_DAYS + 1:day + 1] if day >= tl.ACUTE_DAYS - 1 else None
+            month = row[day - tl.CHRONIC_DAYS + 1:day + 1] if day >= tl.CHRONIC_DAYS - 1 else None
+            if week is None:
+                metrics['monotony'].append(math.nan)
+                metrics['training_strain'].append(math.nan)
+            else:
+                mean = sum(week) / len(week)
+                std = math.sqrt(sum((x - mean) ** 2 for x in week) / len(week))
+                mono = divide(mean, std)
+                metrics['monotony'].append(mono)
+                metrics['training_strain'].append(sum(week) * mono)
+            if month is None:
+                metrics['acwr_rolling'].append(math.nan)
+            else:
+                metrics['acwr_rolling'].append(divide(sum(week) / len(week), sum(month) / len(month)))
+        results.append(metrics)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--athletes", type=int, default=500)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    import numpy as np
+    from analytics.training_load import compute_metrics
+
+    days = args.years * 365
+    rng = np.random.default_rng(0)
+    # Rest days are zero load; training days look like WHOOP workout strain.
+    loads = rng.uniform(4, 18, size=(args.athletes, days)) * (rng.random((args.athletes, days)) > 0.3)
+    print(f"{args.athletes} athletes x {days} days")
+
+    started = time.perf_counter()
+    vectorized = compute_metrics(loads)
+    vectorized_seconds = time.perf_counter() - started
+    print(f"numpy:       {vectorized_seconds:8.3f}s")
+
+    started = time.perf_counter()
+    reference = python_metrics(loads.tolist())
+    python_seconds = time.perf_counter() - started
+    print(f"pure python: {python_seconds:8.3f}s  ({python_seconds / vectorized_seconds:.0f}x slower)")
+
+    for name in reference[0]:
+        expected = np.array([metrics[name] for metrics in reference])
+        assert np.allclose(vectorized[name], expected, equal_nan=True, rtol=1e-6, atol=1e-6), name
+    print("results match")
+
+
+if __name__ == "__main__":
+    main()
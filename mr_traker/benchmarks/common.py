@@ -0,0 +1,90 @@
+"""
+Shared setup for the benchmark scripts.
+
+Run a benchmark from the project directory, e.g.:
+    python -m benchmarks.bench_ingest
+
+Benchmarks run against a throwaway test database, never db.sqlite3.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mr_traker.settings")
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+@contextmanager
+def measure():
+    """
+    Yields a dict that is filled with `seconds` and `queries` on exit.
+    """
+    from django.db import connection
+
+    result = {'queries': 0}
+
+    def count_queries(execute, sql, params, many, context):
+        result['queries'] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        started = time.perf_counter()
+        yield result
+        result['seconds'] = time.perf_counter() - started
+
+
+def make_athlete(username):
+    from users.models import User, AthleteProfile
+
+    user = User.objects.create_user(username=username, password="password")
+    return AthleteProfile.objects.create(user=user)
+
+
+def recovery_record(cycle_id, when):
+    """A WHOOP v2 recovery record as returned by the API."""
+    stamp = when.isoformat().replace("+00:00", "Z")
+    return {
+        "cycle_id": cycle_id,
+        "sleep_id": f"sleep-{cycle_id}",
+        "score_state": "SCORED",
+        "score": {
+            "user_calibrating": False,
+            "recovery_score": 30 + cycle_id % 70,
+            "resting_heart_rate": 45 + cycle_id % 15,
+            "hrv_rmssd_milli": 40.0 + cycle_id % 60,
+            "spo2_percentage": 96.0,
+            "skin_temp_celsius": 33.5,
+        },
+        "created_at": stamp,
+        "updated_at": stamp,
+    }
+
+
+def workout_record(whoop_id, when):
+    """A WHOOP v2 workout record as returned by the API."""
+    start = when.isoformat().replace("+00:00", "Z")
+    return {
+        "id": str(whoop_id),
+        "start": start,
+        "end": start,
+        "timezone_offset": "+00:00",
+        "sport_id": whoop_id % 5,
+        "score_state": "SCORED",
+        "score": {
+            "strain": 5.0 + whoop_id % 15,
+            "average_heart_rate": 130,
+            "max_heart_rate": 175,
+            "kilojoule": 1500.0,
+            "percent_recorded": 100.0,
+        },
+    }
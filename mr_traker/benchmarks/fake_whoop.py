@@ -0,0 +1,263 @@
+"""
+A local stand-in for the WHOOP API, for benchmarks and manual testing.
+
+Serves the token endpoint and the v2 recovery, workout, sleep and cycle
+collections with WHOOP's pagination (newest first, `limit`, `start`,
+`end`, `nextToken` -> `next_token`). Every athlete gets `days` of
+deterministic history; the athlete is picked by the bearer token
+"token-<n>" (refresh token "refresh-<n>"). Latency and 429 responses can
+be injected.
+
+    python -m benchmarks.fake_whoop [--port 8765] [--days 30] [--latency 0.02] [--error-rate 0.05]
+
+then point the app at it with WHOOP_API_BASE_URL=http://127.0.0.1:8765.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAX_LIMIT = 25
+
+
+def stamp(value):
+    return value.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def parse_stamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def athlete_records(athlete, days, now):
+    """
+    {collection: [(start datetime, record), ...] newest first} for one athlete.
+    """
+    collections = {'recovery': [], 'workout': [], 'sleep': [], 'cycle': []}
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    for day in range(days):
+        cycle_id = athlete * 100000 + (days - day)
+        cycle_start = midnight - timedelta(days=day) - timedelta(hours=2)
+        wake = cycle_start + timedelta(hours=8)
+        sleep_id = f"sleep-{athlete}-{days - day}"
+        seed = (athlete * 31 + day) % 97
+
+        collections['cycle'].append((cycle_start, {
+            "id": cycle_id, "user_id": athlete,
+            "start": stamp(cycle_start), "end": stamp(cycle_start + timedelta(days=1)),
+            "timezone_offset": "+00:00", "score_state": "SCORED",
+            "score": {"strain": 5.0 + seed % 15, "kilojoule": 8000.0 + seed * 10,
+                      "average_heart_rate": 65, "max_heart_rate": 160 + seed % 30},
+            "created_at": stamp(cycle_start), "updated_at": stamp(wake),
+        }))
+        collections['sleep'].append((cycle_start, {
+            "id": sleep_id, "cycle_id": cycle_id, "user_id": athlete,
+            "start": stamp(cycle_start), "end": stamp(wake),
+            "timezone_offset": "+00:00", "nap": False, "score_state": "SCORED",
+            "score": {
+                "stage_summary": {
+                    "total_in_bed_time_milli": 28800000, "total_awake_time_milli": 1800000,
+                    "total_light_sleep_time_milli": 14000000, "total_slow_wave_sleep_time_milli": 6000000,
+                    "total_rem_sleep_time_milli": 7000000, "sleep_cycle_count": 4, "disturbance_count": seed % 10,
+                },
+                "respiratory_rate": 15.5, "sleep_performance_percentage": 60 + seed % 40,
+                "sleep_consistency_percentage": 70, "sleep_efficiency_percentage": 90.0,
+            },
+            "created_at": stamp(wake), "updated_at": stamp(wake),
+        }))
+        collections['recovery'].append((wake, {
+            "cycle_id": cycle_id, "sleep_id": sleep_id, "user_id": athlete, "score_state": "SCORED",
+            "score": {"user_calibrating": False, "recovery_score": 30 + seed % 70,
+                      "resting_heart_rate": 45 + seed % 15, "hrv_rmssd_milli": 40.0 + seed % 60,
+                      "spo2_percentage": 96.0, "skin_temp_celsius": 33.5},
+            "created_at": stamp(wake), "updated_at": stamp(wake),
+        }))
+        if seed % 3:
+            workout_start = wake + timedelta(hours=9)
+            collections['workout'].append((workout_start, {
+                "id": f"workout-{athlete}-{days - day}", "user_id": athlete,
+                "start": stamp(workout_start), "end": stamp(workout_start + timedelta(hours=1)),
+                "timezone_offset": "+00:00", "sport_id": seed % 5, "score_state": "SCORED",
+                "score": {"strain": 8.0 + seed % 10, "average_heart_rate": 135, "max_heart_rate": 178,
+                          "kilojoule": 2000.0, "percent_recorded": 100.0},
+            }))
+    return collections
+
+
+ROUTES = {
+    '/developer/v2/recovery': 'recovery',
+    '/developer/v2/activity/workout': 'workout',
+    '/developer/v2/activity/sleep': 'sleep',
+    '/developer/v2/cycle': 'cycle',
+}
+
+
+class FakeWhoop:
+    """
+    The server plus its knobs and counters. `start()` serves on a
+    background thread; `url` is the base URL to configure.
+    """
+
+    def __init__(self, days=30, latency=0.0, jitter=0.0, error_rate=0.0, retry_after=0, port=0):
+        self.days = days
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.now = datetime.now(timezone.utc)
+        self.random = random.Random(0)
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.counts = {'requests': 0, 'throttled': 0, 'records': 0}
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='fake-whoop', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def records(self, athlete):
+        with self._lock:
+            if athlete not in self._cache:
+                self._cache[athlete] = athlete_records(athlete, self.days, self.now)
+            return self._cache[athlete]
+
+    def page(self, athlete, collection, query):
+        """
+        (records, next_token) for one collection request.
+        """
+        limit = min(int(query.get('limit', [10])[0]), MAX_LIMIT)
+        start = parse_stamp(query['start'][0]) if 'start' in query else None
+        end = parse_stamp(query['end'][0]) if 'end' in query else None
+        offset = int(query.get('nextToken', ['0'])[0] or 0)
+
+        matching = [
+            record for moment, record in self.records(athlete)[collection]
+            if (start is None or moment >= start) and (end is None or moment < end)
+        ]
+        page = matching[offset:offset + limit]
+        next_token = str(offset + limit) if offset + limit < len(matching) else None
+        return page, next_token
+
+    def should_throttle(self):
+        with self._lock:
+            return self.error_rate and self.random.random() < self.error_rate
+
+    def handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are separate writes; don't let Nagle hold the body back
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body, headers=None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def delay(self):
+                fake.count('requests')
+                if fake.latency or fake.jitter:
+                    time.sleep(fake.latency + fake.random.uniform(0, fake.jitter))
+
+            def throttled(self):
+                if not fake.should_throttle():
+                    return False
+                fake.count('throttled')
+                self.send_json(429, {"message": "Too Many Requests"}, {
+                    'Retry-After': str(fake.retry_after),
+                    'X-RateLimit-Limit': '100, 100;window=60, 10000;window=86400',
+                    'X-RateLimit-Remaining': '0',
+                    'X-RateLimit-Reset': str(fake.retry_after),
+                })
+                return True
+
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode())
+                self.delay()
+                if urlparse(self.path).path != '/oauth/oauth2/token':
+                    return self.send_json(404, {"message": "Not Found"})
+                match = re.match(r'refresh-(\d+)$', form.get('refresh_token', [''])[0])
+                if not match:
+                    return self.send_json(400, {"error": "invalid_grant"})
+                athlete = match.group(1)
+                self.send_json(200, {
+                    "access_token": f"token-{athlete}", "refresh_token": f"refresh-{athlete}",
+                    "expires_in": 3600, "token_type": "bearer",
+                })
+
+            def do_GET(self):
+                self.delay()
+                url = urlparse(self.path)
+                match = re.match(r'Bearer token-(\d+)$', self.headers.get('Authorization', ''))
+                if not match:
+                    return self.send_json(401, {"message": "Unauthorized"})
+                if self.throttled():
+                    return
+                athlete = int(match.group(1))
+
+                if url.path == '/developer/v2/user/profile/basic':
+                    return self.send_json(200, {"user_id": athlete, "email": f"athlete{athlete}@example.com"})
+                collection = ROUTES.get(url.path)
+                if collection is None:
+                    return self.send_json(404, {"message": "Not Found"})
+
+                records, next_token = fake.page(athlete, collection, parse_qs(url.query))
+                fake.count('records', len(records))
+                self.send_json(200, {"records": records, "next_token": next_token}, {
+                    'X-RateLimit-Limit': '100, 100;window=60, 10000;window=86400',
+                })
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds, 0..jitter.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of API calls answered with 429.")
+    args = parser.parse_args()
+
+    fake = FakeWhoop(days=args.days, latency=args.latency, jitter=args.jitter,
+                     error_rate=args.error_rate, port=args.port)
+    print(f"Fake WHOOP on {fake.url} (tokens: token-<athlete number>)")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
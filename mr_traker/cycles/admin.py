@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import Cycle
 
-# Register your models here.
+@admin.register(Cycle)
+class CycleAdmin(admin.ModelAdmin):
+    list_display = ('whoop_id', 'athlete', 'start', 'end', 'score_state', 'strain', 'kilojoule', 'average_heart_rate', 'max_heart_rate', 'updated_at')
+    list_filter = ('score_state', 'athlete')
+    search_fields = ('whoop_id', 'athlete__user__username')
+    ordering = ('-start',)
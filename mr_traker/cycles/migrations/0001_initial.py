@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0002_whoopsyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cycle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('whoop_id', models.BigIntegerField(unique=True)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField(blank=True, null=True)),
+                ('timezone_offset', models.CharField(blank=True, max_length=10, null=True)),
+                ('score_state', models.CharField(blank=True, max_length=20, null=True)),
+                ('strain', models.FloatField(blank=True, null=True)),
+                ('kilojoule', models.FloatField(blank=True, null=True)),
+                ('average_heart_rate', models.IntegerField(blank=True, null=True)),
+                ('max_heart_rate', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('athlete', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cycles', to='users.athleteprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['athlete', 'start'], name='cycle_athlete_start_idx')],
+            },
+        ),
+    ]
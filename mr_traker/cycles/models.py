@@ -1,3 +1,28 @@
 from django.db import models
+from users.models import AthleteProfile
 
-# Create your models here.
+class Cycle(models.Model):
+    athlete = models.ForeignKey(AthleteProfile, on_delete=models.CASCADE, related_name='cycles')
+    # Recovery.cycle_id points at this id
+    whoop_id = models.BigIntegerField(unique=True)
+    start = models.DateTimeField()
+    end = models.DateTimeField(blank=True, null=True)  # Empty while the cycle is ongoing
+    timezone_offset = models.CharField(max_length=10, blank=True, null=True)
+    score_state = models.CharField(max_length=20, blank=True, null=True)
+
+    # Measurements (from 'score' object)
+    strain = models.FloatField(blank=True, null=True)
+    kilojoule = models.FloatField(blank=True, null=True)
+    average_heart_rate = models.IntegerField(blank=True, null=True)
+    max_heart_rate = models.IntegerField(blank=True, null=True)
+
+    created_at = models.DateTimeField() # From WHOOP API
+    updated_at = models.DateTimeField() # From WHOOP API
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['athlete', 'start'], name='cycle_athlete_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"Cycle {self.whoop_id} - {self.start}"
@@ -0,0 +1,10 @@
+from rest_framework import serializers
+from .models import Cycle
+
+class CycleSerializer(serializers.ModelSerializer):
+    # Joined from the stored Recovery for this cycle (see CycleListView)
+    recovery_score = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Cycle
+        fields = '__all__'
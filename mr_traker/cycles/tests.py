@@ -1,3 +1,73 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from recovery.models import Recovery
+from users.models import User, AthleteProfile
+from utils.whoop_sync import sync_athlete
+from .models import Cycle
+
+
+def whoop_cycle(cycle_id, start, end=None):
+    return {
+        "id": cycle_id,
+        "start": start,
+        "end": end,
+        "timezone_offset": "+02:00",
+        "score_state": "SCORED",
+        "score": {"strain": 11.2, "kilojoule": 8200.0, "average_heart_rate": 68, "max_heart_rate": 171},
+        "created_at": start,
+        "updated_at": start,
+    }
+
+
+class CycleTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="athlete", password="pw")
+        self.profile = AthleteProfile.objects.create(
+            user=self.user,
+            whoop_access_token="token",
+            whoop_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.client.force_authenticate(self.user)
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_sync_stores_cycles_including_the_ongoing_one(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {
+            "records": [
+                whoop_cycle(2, "2025-12-02T22:00:00.000Z"),
+                whoop_cycle(1, "2025-12-01T22:00:00.000Z", "2025-12-02T22:00:00.000Z"),
+            ],
+            "next_token": None,
+        }
+
+        self.assertEqual(sync_athlete(self.profile, resources=['cycle']), {'cycle': 2})
+        self.assertIsNone(Cycle.objects.get(whoop_id=2).end)
+        self.assertTrue(mock_request.call_args.args[1].endswith("/developer/v2/cycle"))
+
+    def test_list_joins_recovery_from_database(self):
+        now = timezone.now()
+        for cycle_id in (1, 2):
+            Cycle.objects.create(
+                athlete=self.profile, whoop_id=cycle_id, start=now - timedelta(days=2 - cycle_id),
+                strain=10.0, created_at=now, updated_at=now,
+            )
+        Recovery.objects.create(
+            athlete=self.profile, cycle_id=2, score_state="SCORED", recovery_score=81,
+            created_at=now, updated_at=now,
+        )
+
+        response = self.client.get(reverse('cycle-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(c['whoop_id'], c['recovery_score']) for c in response.json()], [(2, 81), (1, None)])
+
+    def test_limit_out_of_range_is_rejected(self):
+        for limit in ('-1', '0', '101', 'ten'):
+            response = self.client.get(reverse('cycle-list'), {'limit': limit})
+            self.assertEqual(response.status_code, 400, limit)
+            self.assertEqual(response.json(), {"detail": "limit must be 1-100."})
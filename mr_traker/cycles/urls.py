@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import CycleListView
+
+urlpatterns = [
+    path('', CycleListView.as_view(), name='cycle-list'),
+]
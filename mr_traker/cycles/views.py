@@ -1,3 +1,50 @@
-from django.shortcuts import render
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status, permissions
+from django.db.models import OuterRef, Subquery
 
-# Create your views here.
+from recovery.models import Recovery
+from .models import Cycle
+from .serializers import CycleSerializer
+from utils.pagination import MAX_PAGE_SIZE, page_size
+from utils.whoop_sync import sync_athlete_async
+
+class CycleListView(APIView):
+    """
+    GET /api/cycles/
+    Returns the athlete's physiological cycles (day strain) stored by the
+    WHOOP sync, each with the recovery score of that cycle.
+    Query Params: ?limit=25&refresh=1
+    `refresh=1` starts a background WHOOP sync; the response does not wait for it.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # 1. Get the Athlete Profile
+        user = request.user
+        if not hasattr(user, 'athlete_profile'):
+             return Response({"detail": "User is not an athlete."}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile = user.athlete_profile
+
+        try:
+            limit = page_size(request.query_params)
+        except ValueError:
+            return Response({"detail": f"limit must be 1-{MAX_PAGE_SIZE}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 2. Kick off a sync if asked to (never blocks on WHOOP)
+        if request.query_params.get('refresh') in ('1', 'true'):
+            if not profile.whoop_access_token:
+                return Response({"detail": "WHOOP not connected or token expired."}, status=status.HTTP_401_UNAUTHORIZED)
+            sync_athlete_async(profile, resources=['cycle'])
+
+        # 3. Return from DB (ordered by start desc)
+        recovery = Recovery.objects.filter(cycle_id=OuterRef('whoop_id'))
+        cycles = (
+            Cycle.objects
+            .filter(athlete=profile)
+            .annotate(recovery_score=Subquery(recovery.values('recovery_score')[:1]))
+            .order_by('-start')[:limit]
+        )
+        serializer = CycleSerializer(cycles, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
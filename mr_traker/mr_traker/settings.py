@@ -31,6 +31,24 @@ WHOOP_CLIENT_ID = os.environ.get('WHOOP_CLIENT_ID')
 WHOOP_CLIENT_SECRET = os.environ.get('WHOOP_CLIENT_SECRET')
 WHOOP_REDIRECT_URI = os.environ.get('WHOOP_REDIRECT_URI', 'http://127.0.0.1:8000/api/users/whoop/callback/')
 
+# WHOOP HTTP client (utils/whoop_client.py)
+WHOOP_API_BASE_URL = os.environ.get('WHOOP_API_BASE_URL', 'https://api.prod.whoop.com')
+WHOOP_HTTP_TIMEOUT = (3.05, 15)  # (connect, read) seconds
+WHOOP_HTTP_MAX_RETRIES = 3
+WHOOP_HTTP_BACKOFF_BASE = 0.5  # seconds, doubled per retry
+WHOOP_HTTP_BACKOFF_MAX = 30
+WHOOP_HTTP_POOL_SIZE = 20
+
+# WHOOP rate limits, shared by every process (utils/whoop_rate_limit.py)
+WHOOP_RATE_LIMIT_ENABLED = True
+WHOOP_RATE_LIMITS = {
+    # name: (requests, window in seconds)
+    'minute': (100, 60),
+    'day': (10000, 24 * 60 * 60),
+}
+WHOOP_RATE_LIMIT_RESERVE = 0.2  # share of each bucket only interactive calls may use
+WHOOP_RATE_LIMIT_MAX_WAIT = 10  # seconds an interactive call waits for a token
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -63,26 +81,36 @@ INSTALLED_APPS = [
     "ai_pipelines",
     "sleep",
     "cycles",
+    "analytics",
 ]
 
 MIDDLEWARE = [
+    "utils.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "utils.profiling.ProfilerMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# Token -> user lookups (users/authentication.py): a per-process LRU in
+# front of the shared cache. Revocations reach other processes' LRUs
+# within AUTH_TOKEN_LOCAL_CACHE_TTL.
+AUTH_TOKEN_LOCAL_CACHE_SIZE = 10000
+AUTH_TOKEN_LOCAL_CACHE_TTL = 30  # seconds
+AUTH_TOKEN_CACHE_TTL = 10 * 60  # seconds
+
 
 ROOT_URLCONF = "mr_traker.urls"
 
@@ -115,6 +143,58 @@ DATABASES = {
 }
 
 
+# Cache
+# Local memory per process by default; DJANGO_CACHE_BACKEND=file shares one
+# on-disk cache between worker processes.
+
+if os.environ.get('DJANGO_CACHE_BACKEND') == 'file':
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get('DJANGO_CACHE_DIR', str(BASE_DIR / ".cache")),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "mr-traker",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+# Rendered list responses (utils/response_cache.py); entries are also
+# superseded as soon as the athlete's data changes.
+RESPONSE_CACHE_TIMEOUT = 15 * 60
+
+
+# Metrics (utils/metrics.py), scraped from /metrics by these addresses
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+
+# Staff requests sent with "X-Profile: 1" are profiled (utils/profiling.py);
+# only the newest captures are kept.
+PROFILER_KEEP_CAPTURES = 200
+
+# Diagnostics go to the console as one line per event; request lines are
+# on "mr_traker.requests", WHOOP client/token/sync lines on "utils.*".
+DIAGNOSTICS_LOG_LEVEL = os.environ.get('DIAGNOSTICS_LOG_LEVEL', 'INFO')
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "line": {"format": "%(asctime)s level=%(levelname)s logger=%(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "line"},
+    },
+    "loggers": {
+        "mr_traker.requests": {"handlers": ["console"], "level": os.environ.get('REQUEST_LOG_LEVEL', 'WARNING')},
+        "utils": {"handlers": ["console"], "level": DIAGNOSTICS_LOG_LEVEL},
+        "users": {"handlers": ["console"], "level": DIAGNOSTICS_LOG_LEVEL},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
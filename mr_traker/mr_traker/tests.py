@@ -0,0 +1,206 @@
+"""
+Query budgets for every URL in mr_traker/urls.py.
+
+Each endpoint is called against a small and a large data set (more
+athletes, longer histories). It fails if its query count grows with the
+data (an N+1) or goes over the budget declared in ENDPOINTS, and the
+failure lists the worst offenders. A new URL fails the suite until it is
+given a budget (or a reason to skip it).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.authtoken.models import Token
+
+from analytics.models import Alert
+from benchmarks.fake_whoop import athlete_records
+from users.authentication import local_tokens
+from users.models import User, AthleteProfile, TrainerProfile
+from utils.whoop_ingest import cycle_ingester, recovery_ingester, sleep_ingester, workout_ingester
+
+INGESTERS = {
+    'recovery': recovery_ingester,
+    'workout': workout_ingester,
+    'sleep': sleep_ingester,
+    'cycle': cycle_ingester,
+}
+
+# (athletes on the trainer's roster, days of WHOOP history per athlete)
+SMALL = (2, 3)
+LARGE = (6, 12)
+
+
+class Endpoint:
+    """
+    How to call one URL name and the most queries it may take.
+    `as_user` is 'athlete', 'trainer', 'staff' or None (anonymous);
+    `kwargs` and `data` are callables given the fixture.
+    """
+
+    def __init__(self, budget, as_user='athlete', method='get', kwargs=None, data=None, status=200):
+        self.budget = budget
+        self.as_user = as_user
+        self.method = method
+        self.kwargs = kwargs
+        self.data = data
+        self.status = status
+
+
+ENDPOINTS = {
+    'register': Endpoint(12, as_user=None, method='post', status=201, data=lambda fixture: {
+        'username': fixture.unique('new-athlete'), 'password': 'a-long-password', 'role': User.IS_ATHLETE}),
+    'login': Endpoint(8, as_user=None, method='post', data=lambda fixture: {
+        'username': fixture.athlete.username, 'password': 'password'}),
+    'logout': Endpoint(4, as_user='staff', method='post', status=204),
+    'trainer-athletes': Endpoint(3, as_user='trainer'),
+    'trainer-dashboard': Endpoint(6, as_user='trainer'),
+    'cache-stats': Endpoint(1, as_user='staff'),
+    'privacy-policy': Endpoint(0, as_user=None),
+    'whoop-webhook': Endpoint(0, as_user=None, method='post', status=401, data=lambda fixture: {}),
+    'whoop-budget': Endpoint(4, as_user='staff'),
+    'workout-list': Endpoint(3),
+    'recovery-list': Endpoint(3),
+    'cycle-list': Endpoint(2),
+    'sleep-list': Endpoint(2),
+    'trends-daily': Endpoint(2),
+    'trends-weekly': Endpoint(2),
+    'training-load': Endpoint(2),
+    'training-load-roster': Endpoint(3, as_user='trainer'),
+    'baselines': Endpoint(6),
+    'baselines-roster': Endpoint(7, as_user='trainer'),
+    'alerts': Endpoint(2, as_user='trainer'),
+    'alert-resolve': Endpoint(3, as_user='trainer', method='post', kwargs=lambda fixture: {
+        'pk': fixture.open_alert().pk}),
+    'metrics': Endpoint(1, as_user='staff'),
+}
+
+SKIPPED = {
+    'whoop-callback': "exchanges an OAuth code with WHOOP",
+    'whoop-snapshot': "streams live WHOOP calls",
+}
+
+# Known N+1s still to fix: checked (and reported), but not failed on.
+ALLOWED_TO_GROW = set()
+
+
+def url_names(patterns, prefix=''):
+    """
+    (route, name) of every named URL under `patterns`, except the admin.
+    """
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if route.startswith('admin/'):
+                continue
+            yield from url_names(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield route, pattern.name
+
+
+class Fixture:
+    """
+    A trainer, a staff user and a roster of athletes with WHOOP histories,
+    grown in place from one size to the next.
+    """
+
+    def __init__(self):
+        self.now = datetime(2024, 6, 1, 12, tzinfo=dt_timezone.utc)
+        self.counter = 0
+        self.trainer = User.objects.create_user(username="budget-trainer", password="password", role=User.IS_TRAINER)
+        TrainerProfile.objects.create(user=self.trainer)
+        self.staff = User.objects.create_user(
+            username="budget-staff", password="password", is_staff=True, role=User.IS_TRAINER)
+        self.profiles = []
+
+    @property
+    def athlete(self):
+        return self.profiles[0].user
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f"{prefix}-{self.counter}"
+
+    def grow(self, athletes, days):
+        while len(self.profiles) < athletes:
+            number = len(self.profiles) + 1
+            user = User.objects.create_user(username=f"budget-athlete-{number}", password="password")
+            profile = AthleteProfile.objects.create(user=user)
+            profile.trainers.add(self.trainer)
+            self.profiles.append(profile)
+
+        cutoff = self.now - timedelta(days=days)
+        for number, profile in enumerate(self.profiles, start=1):
+            for collection, records in athlete_records(number, LARGE[1], self.now).items():
+                INGESTERS[collection].ingest(profile, [record for moment, record in records if moment >= cutoff])
+            Alert.objects.create(
+                athlete=profile, kind=Alert.RECOVERY_DROP, source_id=self.unique('source'),
+                occurred_at=self.now, value=20, baseline=60, z_score=-3, message="Recovery dropped.")
+
+    def open_alert(self):
+        return Alert.objects.filter(athlete__trainers=self.trainer, status=Alert.OPEN).first()
+
+    def token(self, user):
+        return Token.objects.get_or_create(user=user)[0].key
+
+
+class QueryBudgetTests(TestCase):
+    def test_every_url_has_a_budget(self):
+        names = {name for _, name in url_names(get_resolver().url_patterns)}
+        undeclared = names - ENDPOINTS.keys() - SKIPPED.keys()
+        self.assertFalse(undeclared, f"Declare a query budget in ENDPOINTS (or skip) for: {sorted(undeclared)}")
+        self.assertFalse((ENDPOINTS.keys() | SKIPPED.keys()) - names, "Budgets declared for URLs that are gone.")
+
+    def call(self, fixture, name, endpoint):
+        """
+        Calls the endpoint once, uncached; returns the number of queries.
+        """
+        url = reverse(name, kwargs=endpoint.kwargs(fixture) if endpoint.kwargs else None)
+        headers = {}
+        if endpoint.as_user:
+            user = {'athlete': fixture.athlete, 'trainer': fixture.trainer, 'staff': fixture.staff}[endpoint.as_user]
+            headers['HTTP_AUTHORIZATION'] = f"Token {fixture.token(user)}"
+        data = endpoint.data(fixture) if endpoint.data else None
+        # Cold caches: the response cache and the token lookup both miss
+        cache.clear()
+        local_tokens.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            if endpoint.method == 'post':
+                response = self.client.post(url, data, content_type='application/json', **headers)
+            else:
+                response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, endpoint.status, f"{name}: {response.content[:300]}")
+        return len(queries)
+
+    def test_query_counts_are_flat_and_within_budget(self):
+        fixture = Fixture()
+        counts = {}
+        for athletes, days in (SMALL, LARGE):
+            fixture.grow(athletes, days)
+            for name, endpoint in ENDPOINTS.items():
+                counts.setdefault(name, []).append(self.call(fixture, name, endpoint))
+
+        offenders = []
+        for name, (small, large) in counts.items():
+            budget = ENDPOINTS[name].budget
+            problems = []
+            if large > small:
+                problems.append(f"grows {small} -> {large}")
+            if max(small, large) > budget:
+                problems.append(f"{max(small, large)} queries over a budget of {budget}")
+            if problems and name not in ALLOWED_TO_GROW:
+                excess = max(large - small, max(small, large) - budget)
+                offenders.append((excess, name, ', '.join(problems)))
+
+        offenders.sort(reverse=True)
+        report = '\n'.join(f"  {name}: {problems}" for _, name, problems in offenders)
+        if offenders:
+            self.fail(f"Query budget exceeded, worst first:\n{report}")
+
+        # Once an allowed N+1 is fixed, take it off the list
+        fixed = [name for name in ALLOWED_TO_GROW if counts[name][1] <= counts[name][0]]
+        self.assertFalse(fixed, f"No longer growing, remove from ALLOWED_TO_GROW: {fixed}")
@@ -18,9 +18,15 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from utils.views import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/users/", include("users.urls")),
     path("api/workouts/", include("workouts.urls")),
     path("api/recovery/", include("recovery.urls")),
+    path("api/cycles/", include("cycles.urls")),
+    path("api/sleep/", include("sleep.urls")),
+    path("api/analytics/", include("analytics.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recovery', '0002_remove_recovery_user_id'),
+        ('users', '0002_whoopsyncstate'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recovery',
+            name='created_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='recovery',
+            name='updated_at',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='recovery',
+            index=models.Index(fields=['athlete', 'updated_at'], name='recovery_athlete_updated_idx'),
+        ),
+    ]
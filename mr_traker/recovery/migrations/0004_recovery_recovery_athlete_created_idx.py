@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recovery', '0003_alter_recovery_created_at_alter_recovery_updated_at_and_more'),
+        ('users', '0004_whoopratelimitbucket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recovery',
+            index=models.Index(fields=['athlete', 'created_at'], name='recovery_athlete_created_idx'),
+        ),
+    ]
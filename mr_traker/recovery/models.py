@@ -18,5 +18,13 @@ class Recovery(models.Model):
     created_at = models.DateTimeField() # From WHOOP API
     updated_at = models.DateTimeField() # From WHOOP API
 
+    class Meta:
+        indexes = [
+            # Conditional GET validator: Max(updated_at) per athlete
+            models.Index(fields=['athlete', 'updated_at'], name='recovery_athlete_updated_idx'),
+            # Newest-first lists and date ranges
+            models.Index(fields=['athlete', 'created_at'], name='recovery_athlete_created_idx'),
+        ]
+
     def __str__(self):
         return f"Recovery {self.recovery_score}% (Cycle {self.cycle_id})"
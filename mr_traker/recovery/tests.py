@@ -1,3 +1,139 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from users.models import User, AthleteProfile
+from utils import response_cache
+from utils.whoop_ingest import ingest_recoveries
+from .models import Recovery
+from .views import recovery_queryset
+
+
+class RecoveryListViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="athlete", password="pw")
+        self.profile = AthleteProfile.objects.create(
+            user=self.user,
+            whoop_access_token="token",
+            whoop_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.client.force_authenticate(self.user)
+        cache.clear()
+        response_cache.stats.reset()
+        now = timezone.now()
+        for cycle_id in (1, 2, 3):
+            Recovery.objects.create(
+                athlete=self.profile, cycle_id=cycle_id, score_state="SCORED",
+                recovery_score=50 + cycle_id, created_at=now, updated_at=now,
+            )
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_list_is_served_from_database(self, mock_request):
+        response = self.client.get(reverse('recovery-list'), {'limit': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['cycle_id'] for r in response.json()], [3, 2])
+        mock_request.assert_not_called()
+
+    def test_list_is_cached_until_new_data_is_ingested(self):
+        first = self.client.get(reverse('recovery-list'), {'limit': 2})
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(reverse('recovery-list'), {'limit': 2})
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+        # Only the conditional-GET validator aggregate reads the table
+        reads = [q['sql'] for q in ctx.captured_queries if 'recovery_recovery' in q['sql']]
+        self.assertEqual(len(reads), 1)
+        self.assertIn('MAX(', reads[0])
+
+        # Another query shape is its own entry
+        self.assertEqual(self.client.get(reverse('recovery-list'), {'limit': 3})['X-Cache'], 'MISS')
+
+        later = (timezone.now() + timedelta(minutes=1)).isoformat()
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_recoveries(self.profile, [{
+                "cycle_id": 4, "score_state": "SCORED", "score": {"recovery_score": 90},
+                "created_at": later, "updated_at": later,
+            }])
+        third = self.client.get(reverse('recovery-list'), {'limit': 2})
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual([r['cycle_id'] for r in third.json()], [4, 3])
+
+        self.assertEqual(response_cache.stats.snapshot()['recovery-list'], {'hits': 1, 'misses': 3, 'hit_ratio': 0.25})
+
+    def test_keyset_pages_walk_the_whole_history(self):
+        Recovery.objects.all().delete()
+        start = timezone.now() - timedelta(days=10)
+        for day in range(10):
+            Recovery.objects.create(
+                athlete=self.profile, cycle_id=100 + day, score_state="SCORED",
+                created_at=start + timedelta(days=day), updated_at=start,
+            )
+
+        seen, params = [], {'limit': 4}
+        while True:
+            response = self.client.get(reverse('recovery-list'), params)
+            seen += [r['cycle_id'] for r in response.json()]
+            if 'X-Next-Cursor' not in response:
+                break
+            self.assertIn('rel="next"', response['Link'])
+            params = {'limit': 4, 'cursor': response['X-Next-Cursor']}
+        self.assertEqual(seen, list(range(109, 99, -1)))
+
+        in_range = self.client.get(reverse('recovery-list'), {
+            'start': (start + timedelta(days=2)).date().isoformat(),
+            'end': (start + timedelta(days=4)).date().isoformat(),
+        })
+        self.assertEqual([r['cycle_id'] for r in in_range.json()], [104, 103, 102])
+        self.assertEqual(self.client.get(reverse('recovery-list'), {'cursor': 'nope'}).status_code, 400)
+
+    def test_page_query_uses_athlete_created_index(self):
+        page = recovery_queryset(self.profile, {'start': '2025-01-01'}).order_by('-created_at', '-pk')[:25]
+        self.assertIn('recovery_athlete_created_idx', page.explain())
+
+    @patch('recovery.views.sync_athlete_async')
+    def test_refresh_triggers_background_sync(self, mock_sync):
+        response = self.client.get(reverse('recovery-list'), {'refresh': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        mock_sync.assert_called_once_with(self.profile, resources=['recovery'])
+
+
+class RecoveryIngestTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="athlete", password="pw")
+        self.profile = AthleteProfile.objects.create(user=user)
+
+    def record(self, cycle_id, score):
+        return {
+            "cycle_id": cycle_id,
+            "sleep_id": "abc",
+            "score_state": "SCORED",
+            "score": {"recovery_score": score, "hrv_rmssd_milli": 55.0},
+            "created_at": "2025-12-01T08:00:00.000Z",
+            "updated_at": "2025-12-01T08:00:00.000Z",
+        }
+
+    def test_page_is_upserted_in_one_statement(self):
+        Recovery.objects.create(
+            athlete=self.profile, cycle_id=1, score_state="PENDING_SCORE",
+            created_at=timezone.now(), updated_at=timezone.now(),
+        )
+        records = [self.record(cycle_id, 70) for cycle_id in range(1, 26)]
+
+        with CaptureQueriesContext(connection) as ctx:
+            written = ingest_recoveries(self.profile, records)
+
+        self.assertEqual(written, 25)
+        self.assertEqual(Recovery.objects.count(), 25)
+        self.assertEqual(Recovery.objects.get(cycle_id=1).recovery_score, 70)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "recovery_recovery"')]
+        self.assertEqual(len(inserts), 1)
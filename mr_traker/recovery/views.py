@@ -1,17 +1,33 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from django.utils.dateparse import parse_datetime
-import requests
 
 from .models import Recovery
 from .serializers import RecoverySerializer
-from utils.whoop_service import get_valid_access_token
+from utils.conditional import aggregate_validator, conditional_response, make_etag, query_shape
+from utils.pagination import date_range, keyset_page, page_headers, page_size
+from utils.response_cache import cached_list_response
+from utils.whoop_sync import sync_athlete_async
+
+
+def recovery_queryset(profile, params):
+    """
+    The athlete's recoveries, filtered by ?start=/?end= on created_at.
+    Served by the (athlete, created_at) index.
+    """
+    return date_range(Recovery.objects.filter(athlete=profile), 'created_at', params)
+
 
 class RecoveryListView(APIView):
     """
     GET /api/recovery/
-    Fetches latest recovery data from WHOOP and returns them.
+    Returns the athlete's recovery data stored by the WHOOP sync, newest first.
+    Query Params: ?limit=25&start=2025-12-01&end=2025-12-31&cursor=...&refresh=1
+    Pages are keyset-paginated: the next page's cursor is in the Link and
+    X-Next-Cursor headers.
+    `refresh=1` starts a background WHOOP sync; the response does not wait for it.
+    Responses are cached per athlete until a sync writes new data (X-Cache header),
+    and carry ETag / Last-Modified; a matching conditional GET gets a 304.
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -20,58 +36,33 @@ class RecoveryListView(APIView):
         user = request.user
         if not hasattr(user, 'athlete_profile'):
              return Response({"detail": "User is not an athlete."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        profile = user.athlete_profile
 
-        # 2. Get Valid Token
-        access_token = get_valid_access_token(profile)
-        if not access_token:
-            return Response({"detail": "WHOOP not connected or token expired."}, status=status.HTTP_401_UNAUTHORIZED)
+        profile = user.athlete_profile
 
-        # 3. Fetch from WHOOP API
-        # Verified URL: https://api.prod.whoop.com/developer/v2/recovery
-        limit = request.query_params.get('limit', 25)
-        url = f"https://api.prod.whoop.com/developer/v2/recovery?limit={limit}"
-        headers = {"Authorization": f"Bearer {access_token}"}
-        
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            
-            data = response.json()
-             
-            # V2 returns a paginated response wrapper { "records": [...], "next_token": ... }
-            if isinstance(data, dict) and 'records' in data:
-                 data = data['records']
+            limit = page_size(request.query_params)
+            recoveries = recovery_queryset(profile, request.query_params)
+        except ValueError:
+            return Response({"detail": "limit must be 1-100 and start/end ISO dates."}, status=status.HTTP_400_BAD_REQUEST)
 
-        except requests.exceptions.RequestException as e:
-            return Response({"detail": f"Failed to fetch recovery from WHOOP: {e}"}, status=status.HTTP_502_BAD_GATEWAY)
+        # 2. Kick off a sync if asked to (never blocks on WHOOP)
+        if request.query_params.get('refresh') in ('1', 'true'):
+            if not profile.whoop_access_token:
+                return Response({"detail": "WHOOP not connected or token expired."}, status=status.HTTP_401_UNAUTHORIZED)
+            sync_athlete_async(profile, resources=['recovery'])
 
-        # 4. Sync to DB
-        synced_recoveries = []
-        for item in data:
-            score = item.get('score', {})
-            
-            # WHOOP V2 Recovery uses cycle_id as unique identifier usually
-            recovery, created = Recovery.objects.update_or_create(
-                cycle_id=item['cycle_id'],
-                defaults={
-                    'athlete': profile,
-                    'sleep_id': item.get('sleep_id'),
-                    'score_state': item.get('score_state'),
-                    # Score fields
-                    'user_calibrating': score.get('user_calibrating', False),
-                    'recovery_score': score.get('recovery_score'),
-                    'resting_heart_rate': score.get('resting_heart_rate'),
-                    'hrv_rmssd_milli': score.get('hrv_rmssd_milli'),
-                    'spo2_percentage': score.get('spo2_percentage'),
-                    'skin_temp_celsius': score.get('skin_temp_celsius'),
-                    'created_at': parse_datetime(item['created_at']),
-                    'updated_at': parse_datetime(item['updated_at']),
-                }
-            )
-            synced_recoveries.append(recovery)
+        # 3. Build one page from cache or DB (newest first)
+        def build():
+            page, next_cursor = keyset_page(recoveries, 'created_at', request.query_params.get('cursor'), limit)
+            return RecoverySerializer(page, many=True).data, page_headers(request, next_cursor)
 
-        # 5. Return from DB (ordered by cycle_id desc)
-        serializer = RecoverySerializer(synced_recoveries, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # 4. Answer conditional GETs before building anything
+        last_modified, count = aggregate_validator(Recovery.objects.filter(athlete=profile))
+        etag = make_etag('recovery-list', profile.pk, query_shape(request.query_params), last_modified, count)
+        try:
+            return conditional_response(
+                request, etag, last_modified,
+                lambda: cached_list_response('recovery-list', profile.pk, request.query_params, build),
+            )
+        except ValueError:
+            return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import Sleep
 
-# Register your models here.
+@admin.register(Sleep)
+class SleepAdmin(admin.ModelAdmin):
+    list_display = ('whoop_id', 'athlete', 'start', 'end', 'nap', 'score_state', 'sleep_performance_percentage', 'sleep_efficiency_percentage', 'respiratory_rate', 'updated_at')
+    list_filter = ('score_state', 'nap', 'athlete')
+    search_fields = ('whoop_id', 'athlete__user__username')
+    ordering = ('-start',)
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0002_whoopsyncstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sleep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('whoop_id', models.CharField(max_length=50, unique=True)),
+                ('cycle_id', models.BigIntegerField(blank=True, null=True)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField()),
+                ('timezone_offset', models.CharField(blank=True, max_length=10, null=True)),
+                ('nap', models.BooleanField(default=False)),
+                ('score_state', models.CharField(blank=True, max_length=20, null=True)),
+                ('total_in_bed_time_milli', models.IntegerField(blank=True, null=True)),
+                ('total_awake_time_milli', models.IntegerField(blank=True, null=True)),
+                ('total_light_sleep_time_milli', models.IntegerField(blank=True, null=True)),
+                ('total_slow_wave_sleep_time_milli', models.IntegerField(blank=True, null=True)),
+                ('total_rem_sleep_time_milli', models.IntegerField(blank=True, null=True)),
+                ('sleep_cycle_count', models.IntegerField(blank=True, null=True)),
+                ('disturbance_count', models.IntegerField(blank=True, null=True)),
+                ('respiratory_rate', models.FloatField(blank=True, null=True)),
+                ('sleep_performance_percentage', models.FloatField(blank=True, null=True)),
+                ('sleep_consistency_percentage', models.FloatField(blank=True, null=True)),
+                ('sleep_efficiency_percentage', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('athlete', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sleeps', to='users.athleteprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['athlete', 'start'], name='sleep_athlete_start_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,39 @@
 from django.db import models
+from users.models import AthleteProfile
 
-# Create your models here.
+class Sleep(models.Model):
+    athlete = models.ForeignKey(AthleteProfile, on_delete=models.CASCADE, related_name='sleeps')
+    # Recovery.sleep_id points at this id
+    whoop_id = models.CharField(max_length=50, unique=True)
+    cycle_id = models.BigIntegerField(blank=True, null=True)
+    start = models.DateTimeField()
+    end = models.DateTimeField()
+    timezone_offset = models.CharField(max_length=10, blank=True, null=True)
+    nap = models.BooleanField(default=False)
+    score_state = models.CharField(max_length=20, blank=True, null=True)
+
+    # Stage durations (from 'score.stage_summary')
+    total_in_bed_time_milli = models.IntegerField(blank=True, null=True)
+    total_awake_time_milli = models.IntegerField(blank=True, null=True)
+    total_light_sleep_time_milli = models.IntegerField(blank=True, null=True)
+    total_slow_wave_sleep_time_milli = models.IntegerField(blank=True, null=True)
+    total_rem_sleep_time_milli = models.IntegerField(blank=True, null=True)
+    sleep_cycle_count = models.IntegerField(blank=True, null=True)
+    disturbance_count = models.IntegerField(blank=True, null=True)
+
+    # Measurements (from 'score' object)
+    respiratory_rate = models.FloatField(blank=True, null=True)
+    sleep_performance_percentage = models.FloatField(blank=True, null=True)
+    sleep_consistency_percentage = models.FloatField(blank=True, null=True)
+    sleep_efficiency_percentage = models.FloatField(blank=True, null=True)
+
+    created_at = models.DateTimeField() # From WHOOP API
+    updated_at = models.DateTimeField() # From WHOOP API
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['athlete', 'start'], name='sleep_athlete_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"Sleep {self.whoop_id} - {self.start}"
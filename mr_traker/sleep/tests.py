@@ -1,3 +1,85 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from users.models import User, AthleteProfile
+from utils.whoop_sync import sync_athlete
+from .models import Sleep
+
+
+def whoop_sleep(sleep_id, start, nap=False):
+    return {
+        "id": sleep_id,
+        "cycle_id": 93845,
+        "start": start,
+        "end": start,
+        "timezone_offset": "+02:00",
+        "nap": nap,
+        "score_state": "SCORED",
+        "score": {
+            "stage_summary": {
+                "total_in_bed_time_milli": 30272735,
+                "total_rem_sleep_time_milli": 6630370,
+                "sleep_cycle_count": 3,
+            },
+            "respiratory_rate": 16.11,
+            "sleep_performance_percentage": 98,
+            "sleep_efficiency_percentage": 91.7,
+        },
+        "created_at": start,
+        "updated_at": start,
+    }
+
+
+class SleepTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="athlete", password="pw")
+        self.profile = AthleteProfile.objects.create(
+            user=self.user,
+            whoop_access_token="token",
+            whoop_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.client.force_authenticate(self.user)
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_sync_stores_stage_summary(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {
+            "records": [whoop_sleep("ecfc6a15", "2025-12-01T22:00:00.000Z")],
+            "next_token": None,
+        }
+
+        self.assertEqual(sync_athlete(self.profile, resources=['sleep']), {'sleep': 1})
+        sleep = Sleep.objects.get(whoop_id="ecfc6a15")
+        self.assertEqual(sleep.total_rem_sleep_time_milli, 6630370)
+        self.assertEqual(sleep.respiratory_rate, 16.11)
+
+    def test_list_filters_naps(self):
+        now = timezone.now()
+        for whoop_id, nap in (("night", False), ("nap", True)):
+            Sleep.objects.create(
+                athlete=self.profile, whoop_id=whoop_id, nap=nap, start=now, end=now,
+                created_at=now, updated_at=now,
+            )
+
+        response = self.client.get(reverse('sleep-list'), {'nap': '0'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s['whoop_id'] for s in response.json()], ["night"])
+
+        response = self.client.get(reverse('sleep-list'), {'nap': 'true'})
+        self.assertEqual([s['whoop_id'] for s in response.json()], ["nap"])
+
+        for nap in ('yes', 'ture', ''):
+            response = self.client.get(reverse('sleep-list'), {'nap': nap})
+            self.assertEqual(response.status_code, 400, nap)
+            self.assertEqual(response.json(), {"detail": "nap must be 0, 1, true or false."})
+
+    def test_limit_out_of_range_is_rejected(self):
+        for limit in ('-1', '0', '101', 'ten'):
+            response = self.client.get(reverse('sleep-list'), {'limit': limit})
+            self.assertEqual(response.status_code, 400, limit)
+            self.assertEqual(response.json(), {"detail": "limit must be 1-100."})
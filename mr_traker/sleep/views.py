@@ -1,3 +1,50 @@
-from django.shortcuts import render
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status, permissions
 
-# Create your views here.
+from .models import Sleep
+from .serializers import SleepSerializer
+from utils.pagination import MAX_PAGE_SIZE, page_size
+from utils.whoop_sync import sync_athlete_async
+
+NAP_VALUES = {'0': False, 'false': False, '1': True, 'true': True}
+
+
+class SleepListView(APIView):
+    """
+    GET /api/sleep/
+    Returns the athlete's sleeps stored by the WHOOP sync.
+    Query Params: ?limit=25&nap=0|1&refresh=1
+    `refresh=1` starts a background WHOOP sync; the response does not wait for it.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # 1. Get the Athlete Profile
+        user = request.user
+        if not hasattr(user, 'athlete_profile'):
+             return Response({"detail": "User is not an athlete."}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile = user.athlete_profile
+
+        try:
+            limit = page_size(request.query_params)
+        except ValueError:
+            return Response({"detail": f"limit must be 1-{MAX_PAGE_SIZE}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 2. Kick off a sync if asked to (never blocks on WHOOP)
+        if request.query_params.get('refresh') in ('1', 'true'):
+            if not profile.whoop_access_token:
+                return Response({"detail": "WHOOP not connected or token expired."}, status=status.HTTP_401_UNAUTHORIZED)
+            sync_athlete_async(profile, resources=['sleep'])
+
+        # 3. Return from DB (ordered by start desc)
+        sleeps = Sleep.objects.filter(athlete=profile)
+        nap = request.query_params.get('nap')
+        if nap is not None:
+            if nap not in NAP_VALUES:
+                return Response({"detail": "nap must be 0, 1, true or false."}, status=status.HTTP_400_BAD_REQUEST)
+            sleeps = sleeps.filter(nap=NAP_VALUES[nap])
+
+        serializer = SleepSerializer(sleeps.order_by('-start')[:limit], many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1,6 +1,12 @@
+import json
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, TrainerProfile, AthleteProfile
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import User, TrainerProfile, AthleteProfile, WhoopSyncState, WhoopWebhookEvent, WhoopRateLimitBucket, ProfileCapture
 
 
 @admin.register(User)
@@ -28,3 +34,66 @@ class AthleteProfileAdmin(admin.ModelAdmin):
     list_display = ("user",)
     search_fields = ("user__username",)
     filter_horizontal = ("trainers",)
+
+
+@admin.register(WhoopSyncState)
+class WhoopSyncStateAdmin(admin.ModelAdmin):
+    list_display = ("athlete", "resource", "watermark", "last_synced_at", "backfill_records", "backfill_completed_at")
+    list_filter = ("resource",)
+    search_fields = ("athlete__user__username",)
+
+
+@admin.register(WhoopWebhookEvent)
+class WhoopWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("event_type", "object_id", "athlete", "status", "received_at", "processed_at")
+    list_filter = ("status", "event_type")
+    search_fields = ("trace_id", "object_id", "whoop_user_id")
+
+
+@admin.register(WhoopRateLimitBucket)
+class WhoopRateLimitBucketAdmin(admin.ModelAdmin):
+    list_display = ("name", "tokens", "capacity", "refilled_at", "blocked_until", "reported_remaining", "reported_reset_at")
+
+
+@admin.register(ProfileCapture)
+class ProfileCaptureAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "user", "method", "path", "status_code", "duration_ms", "query_count", "query_ms", "downloads")
+    list_filter = ("view", "status_code")
+    search_fields = ("path", "view", "user__username")
+    exclude = ("profile",)
+    readonly_fields = ("user", "method", "path", "view", "status_code", "duration_ms", "query_count", "query_ms",
+                       "created_at", "downloads", "report")
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        download = self.admin_site.admin_view(self.download)
+        return [
+            path('<int:pk>/download/<str:kind>/', download, name='users_profilecapture_download'),
+        ] + super().get_urls()
+
+    @admin.display(description="Download")
+    def downloads(self, capture):
+        return format_html(
+            '<a href="{}">.prof</a> / <a href="{}">.json</a>',
+            reverse('admin:users_profilecapture_download', args=[capture.pk, 'prof']),
+            reverse('admin:users_profilecapture_download', args=[capture.pk, 'json']),
+        )
+
+    def download(self, request, pk, kind):
+        capture = get_object_or_404(ProfileCapture, pk=pk)
+        if kind == 'prof':
+            response = HttpResponse(bytes(capture.profile), content_type='application/octet-stream')
+        elif kind == 'json':
+            report = {
+                'method': capture.method, 'path': capture.path, 'view': capture.view,
+                'status_code': capture.status_code, 'duration_ms': capture.duration_ms,
+                'query_count': capture.query_count, 'query_ms': capture.query_ms,
+                'created_at': capture.created_at.isoformat(), **capture.report,
+            }
+            response = HttpResponse(json.dumps(report, indent=2), content_type='application/json')
+        else:
+            return HttpResponse(status=404)
+        response['Content-Disposition'] = f'attachment; filename="profile-{capture.pk}.{kind}"'
+        return response
@@ -0,0 +1,167 @@
+"""
+Token authentication without a database hit per request.
+
+DRF's TokenAuthentication joins Token and User on every request, and the
+views look the athlete profile up again. Here a token resolves to the few
+user fields authentication and permissions need, plus the ids of their
+athlete/trainer profiles (never the password hash), from a bounded
+in-process LRU, then from the shared cache, and only then from the
+database; `request.user.athlete_profile` is answered from those ids
+without a query. Entries are dropped when the token is deleted
+(logout, rotation) or the user or their profiles change (deactivation,
+role change); see users/signals.py. Other processes' LRUs only learn of
+it when their (short) local TTL runs out.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .models import AthleteProfile, TrainerProfile, User
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded map whose entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local_tokens = LRUCache(settings.AUTH_TOKEN_LOCAL_CACHE_SIZE, settings.AUTH_TOKEN_LOCAL_CACHE_TTL)
+
+
+# The only User columns cached; anything else is loaded on first access.
+CACHED_FIELDS = ('id', 'username', 'role', 'is_active', 'is_staff', 'is_superuser')
+
+
+def token_cache_key(key):
+    return f"auth:token:v2:{key}"
+
+
+def user_entry(user):
+    """
+    What is cached for a token: CACHED_FIELDS and the profile ids.
+    """
+    fields = {name: getattr(user, name) for name in CACHED_FIELDS}
+    athlete_profile = getattr(user, 'athlete_profile', None)
+    trainer_profile = getattr(user, 'trainer_profile', None)
+    return {
+        'fields': fields,
+        'athlete_profile_id': athlete_profile.pk if athlete_profile else None,
+        'trainer_profile_id': trainer_profile.pk if trainer_profile else None,
+    }
+
+
+def cache_profile(user, name, model, pk):
+    """
+    Primes `user.<name>` with the profile `pk` (None: the user has none),
+    loaded with only its id and user; other columns load on first access.
+    """
+    profile = None
+    if pk is not None:
+        profile = model.from_db('default', ['id', 'user_id'], [pk, user.pk])
+        model._meta.get_field('user').set_cached_value(profile, user)
+    User._meta.get_field(name).set_cached_value(user, profile)
+
+
+def user_from_entry(entry):
+    """
+    A fresh User per request (never shared between threads), as if loaded
+    from the database with the other columns deferred, its
+    `athlete_profile` / `trainer_profile` already fetched.
+    """
+    # from_db wants the values in model field order
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in entry['fields']]
+    user = User.from_db('default', names, [entry['fields'][name] for name in names])
+    cache_profile(user, 'athlete_profile', AthleteProfile, entry['athlete_profile_id'])
+    cache_profile(user, 'trainer_profile', TrainerProfile, entry['trainer_profile_id'])
+    return user
+
+
+def forget_token(key):
+    local_tokens.delete(key)
+    cache.delete(token_cache_key(key))
+
+
+def invalidate_token(key):
+    """
+    Forgets `key` now and again once the transaction commits, so a request
+    running meanwhile can't put the old entry back.
+    """
+    forget_token(key)
+    transaction.on_commit(lambda: forget_token(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for rest_framework's TokenAuthentication.
+    `request.auth` is the token key rather than the Token instance.
+    """
+
+    def authenticate_credentials(self, key):
+        entry = local_tokens.get(key)
+        if entry is None:
+            entry = cache.get(token_cache_key(key))
+            if entry is None:
+                entry = self.load(key)
+                cache.set(token_cache_key(key), entry, timeout=settings.AUTH_TOKEN_CACHE_TTL)
+            local_tokens.set(key, entry)
+        user = user_from_entry(entry)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return user, key
+
+    def load(self, key):
+        model = self.get_model()
+        try:
+            token = (
+                model.objects
+                .select_related('user__athlete_profile', 'user__trainer_profile')
+                .only(*(f'user__{name}' for name in CACHED_FIELDS), 'user__athlete_profile__id',
+                      'user__trainer_profile__id')
+                .get(key=key)
+            )
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        return user_entry(token.user)
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+
+from utils.whoop_backfill import pending_athletes, reset_backfill, run_backfill
+from utils.whoop_sync import RESOURCES
+
+
+class Command(BaseCommand):
+    help = "Walks connected athletes' full WHOOP history into the database, resuming from checkpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--athlete", type=int, action="append", dest="athletes",
+            help="AthleteProfile id to backfill (repeatable). Defaults to every connected athlete.",
+        )
+        parser.add_argument(
+            "--resource", action="append", dest="resources", choices=sorted(RESOURCES),
+            help="Resource to backfill (repeatable). Defaults to all.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4,
+            help="Athletes backfilled concurrently (default: 4).",
+        )
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Discard checkpoints and walk the history again.",
+        )
+        parser.add_argument(
+            "--report-every", type=float, default=10,
+            help="Seconds between progress lines (default: 10).",
+        )
+
+    def handle(self, *args, **options):
+        resources = options["resources"] or list(RESOURCES)
+        if options["restart"]:
+            reset_backfill(options["athletes"], resources)
+
+        athlete_ids = pending_athletes(resources, options["athletes"])
+        if not athlete_ids:
+            self.stdout.write("Nothing to backfill.")
+            return
+        self.stdout.write(
+            f"Backfilling {len(athlete_ids)} athletes ({', '.join(resources)}) "
+            f"with {options['workers']} workers."
+        )
+
+        summary = run_backfill(
+            athlete_ids, resources,
+            workers=max(1, options["workers"]),
+            report=self.report,
+            report_every=options["report_every"],
+        )
+        self.stdout.write(
+            f"Done: {summary['records']} records in {summary['elapsed']:.1f}s "
+            f"({summary['records_per_second']:.1f} records/s), {summary['failed']} athletes failed."
+        )
+
+    def report(self, progress, finished):
+        for athlete_id, result in finished:
+            if isinstance(result, Exception):
+                self.stderr.write(f"Athlete {athlete_id}: {result}")
+            else:
+                self.stdout.write(f"Athlete {athlete_id}: {result}")
+
+        eta = progress["eta_seconds"]
+        self.stdout.write(
+            f"{progress['records']} records, {progress['records_per_second']:.1f} records/s, "
+            f"{progress['done']} athletes done, {progress['remaining']} remaining"
+            + (f", ~{eta:.0f}s left" if eta is not None else "")
+        )
@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from utils.whoop_service import refresh_expiring_tokens
+
+
+class Command(BaseCommand):
+    help = "Refreshes WHOOP access tokens that expire within the next N minutes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--within", type=int, default=30,
+            help="Refresh tokens expiring within this many minutes (default: 30).",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep running, checking every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval", type=int, default=600,
+            help="Seconds between runs when --loop is set (default: 600). "
+                 "Keep it well under --within.",
+        )
+
+    def handle(self, *args, **options):
+        within = timedelta(minutes=options["within"])
+        while True:
+            summary = refresh_expiring_tokens(within)
+            self.stdout.write(f"Refreshed {summary['refreshed']} tokens, {summary['failed']} failed.")
+
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import AthleteProfile
+from utils.whoop_rate_limit import BACKGROUND, whoop_priority
+from utils.whoop_sync import RESOURCES, WhoopSyncError, sync_all_athletes, sync_athlete
+
+
+class Command(BaseCommand):
+    help = "Pulls WHOOP data for connected athletes into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--athlete", type=int, action="append", dest="athletes",
+            help="AthleteProfile id to sync (repeatable). Defaults to every connected athlete.",
+        )
+        parser.add_argument(
+            "--resource", action="append", dest="resources", choices=sorted(RESOURCES),
+            help="Resource to sync (repeatable). Defaults to all.",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep running, syncing every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval", type=int, default=900,
+            help="Seconds between runs when --loop is set (default: 900).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            # Scheduled syncs yield to interactive WHOOP calls
+            with whoop_priority(BACKGROUND):
+                self.run_once(options["athletes"], options["resources"])
+
+            if not options["loop"]:
+                return
+            elapsed = time.monotonic() - started
+            time.sleep(max(0, options["interval"] - elapsed))
+
+    def run_once(self, athlete_ids, resources):
+        if not athlete_ids:
+            summary = sync_all_athletes(resources)
+            self.stdout.write(
+                f"Synced {summary['synced']} athletes ({summary['records']} records), "
+                f"{summary['failed']} failed."
+            )
+            return
+
+        for athlete_id in athlete_ids:
+            try:
+                profile = AthleteProfile.objects.select_related("user").get(pk=athlete_id)
+            except AthleteProfile.DoesNotExist:
+                raise CommandError(f"AthleteProfile {athlete_id} does not exist.")
+
+            try:
+                results = sync_athlete(profile, resources)
+            except WhoopSyncError as e:
+                self.stderr.write(f"Athlete {athlete_id}: {e}")
+                continue
+            self.stdout.write(f"Athlete {athlete_id}: {results}")
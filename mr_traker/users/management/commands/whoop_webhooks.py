@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from utils.whoop_webhook import process_pending_events
+
+
+class Command(BaseCommand):
+    help = "Re-processes WHOOP webhook events that failed or never finished."
+
+    def handle(self, *args, **options):
+        summary = process_pending_events()
+        if not summary:
+            self.stdout.write("No pending webhook events.")
+            return
+        self.stdout.write(", ".join(f"{count} {status.lower()}" for status, count in sorted(summary.items())))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_whoopwebhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhoopRateLimitBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20, unique=True)),
+                ('capacity', models.FloatField()),
+                ('refill_per_second', models.FloatField()),
+                ('tokens', models.FloatField()),
+                ('refilled_at', models.DateTimeField()),
+                ('blocked_until', models.DateTimeField(blank=True, null=True)),
+                ('reported_remaining', models.IntegerField(blank=True, null=True)),
+                ('reported_reset_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_whoopratelimitbucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='whoopsyncstate',
+            name='backfill_completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='whoopsyncstate',
+            name='backfill_cursor',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='whoopsyncstate',
+            name='backfill_records',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='whoopsyncstate',
+            name='backfill_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='whoopsyncstate',
+            name='backfill_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
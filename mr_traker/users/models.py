@@ -69,3 +69,114 @@ class AthleteProfile(models.Model):
     whoop_token_expires_at = models.DateTimeField(blank=True, null=True)
 
 # --- NEW MODEL: INVITE CODES ---
+
+
+class WhoopSyncState(models.Model):
+    """
+    How far the WHOOP sync has got, per athlete and resource.
+    `watermark` is the newest record timestamp stored so far; the next sync
+    only asks WHOOP for records from there on. The backfill_* fields track
+    the one-off walk through the athlete's full history.
+    """
+    athlete = models.ForeignKey(
+        AthleteProfile, on_delete=models.CASCADE, related_name='whoop_sync_states')
+    resource = models.CharField(max_length=20)
+    watermark = models.DateTimeField(blank=True, null=True)
+    last_synced_at = models.DateTimeField(blank=True, null=True)
+
+    # Historical backfill (whoop_backfill): WHOOP's next_token for the next
+    # page, checkpointed after every page so a crashed run resumes there.
+    backfill_cursor = models.TextField(blank=True, null=True)
+    backfill_until = models.DateTimeField(blank=True, null=True)  # fixed `end` of the walk
+    backfill_records = models.IntegerField(default=0)
+    backfill_started_at = models.DateTimeField(blank=True, null=True)
+    backfill_completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['athlete', 'resource'], name='unique_whoop_sync_state'),
+        ]
+
+    def __str__(self):
+        return f"WhoopSyncState({self.athlete_id}, {self.resource}, watermark={self.watermark})"
+
+
+class WhoopWebhookEvent(models.Model):
+    """
+    A WHOOP webhook delivery. `trace_id` is unique, so a redelivered
+    event is recognized and not processed twice.
+    """
+    RECEIVED = 'RECEIVED'
+    PROCESSED = 'PROCESSED'
+    IGNORED = 'IGNORED'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (RECEIVED, 'Received'),
+        (PROCESSED, 'Processed'),
+        (IGNORED, 'Ignored'),
+        (FAILED, 'Failed'),
+    ]
+
+    trace_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=50)  # e.g. "workout.updated"
+    whoop_user_id = models.CharField(max_length=50)
+    object_id = models.CharField(max_length=50)  # WHOOP id of the record
+    athlete = models.ForeignKey(
+        AthleteProfile, on_delete=models.SET_NULL, blank=True, null=True, related_name='whoop_webhook_events')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RECEIVED)
+    error = models.TextField(blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.event_type} {self.object_id} ({self.status})"
+
+
+class WhoopRateLimitBucket(models.Model):
+    """
+    Shared token bucket for one WHOOP rate-limit window (e.g. per minute,
+    per day). Every process takes tokens from the same rows; see
+    utils/whoop_rate_limit.py.
+    """
+    name = models.CharField(max_length=20, unique=True)
+    capacity = models.FloatField()
+    refill_per_second = models.FloatField()
+    tokens = models.FloatField()
+    refilled_at = models.DateTimeField()
+    # Set when WHOOP says the window is spent (429 / Remaining: 0)
+    blocked_until = models.DateTimeField(blank=True, null=True)
+
+    # Last values WHOOP reported in X-RateLimit-* headers
+    reported_remaining = models.IntegerField(blank=True, null=True)
+    reported_reset_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"WhoopRateLimitBucket({self.name}, {self.tokens:.1f}/{self.capacity:.0f})"
+
+
+class ProfileCapture(models.Model):
+    """
+    A profile of one request, taken on demand for a staff user (see
+    utils/profiling.py). `profile` is the cProfile dump (load it with
+    pstats / snakeviz); `report` holds the hottest functions and every SQL
+    query with its timing and the line of our code that ran it.
+    """
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, related_name='profile_captures')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view = models.CharField(max_length=200, blank=True, default='')
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    query_ms = models.FloatField()
+    profile = models.BinaryField()
+    report = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.db import transaction
+from workouts.models import Workout
 from .models import User, TrainerProfile, AthleteProfile
 
 
@@ -49,6 +50,35 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
+class RosterProfileSerializer(serializers.ModelSerializer):
+    trainers = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta:
+        model = AthleteProfile
+        fields = ("id", "trainers", "whoop_user_id", "whoop_token_expires_at")
+        read_only_fields = fields
+
+
+class RosterAthleteSerializer(serializers.ModelSerializer):
+    """
+    One athlete on a trainer's roster, read-only. Expects athlete_profile
+    selected and its trainers prefetched. `fields` keeps only those fields
+    (sparse fieldsets).
+    """
+    athlete_profile = RosterProfileSerializer(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ("id", "username", "email", "role", "athlete_profile")
+        read_only_fields = fields
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     """
     Used for signup. Creates:
@@ -112,3 +142,38 @@ class RegisterSerializer(serializers.ModelSerializer):
                 athlete_profile.trainers.add(trainer_profile.user)
 
         return user
+
+
+class DashboardWorkoutSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Workout
+        fields = ("whoop_id", "sport_id", "start", "strain")
+
+
+class TrainerDashboardSerializer(serializers.ModelSerializer):
+    """
+    One row of the trainer dashboard. Expects the annotations and the
+    `recent_workouts` prefetch set up by TrainerDashboardView.
+    """
+    user_id = serializers.IntegerField(source="user.id")
+    username = serializers.CharField(source="user.username")
+    latest_recovery = serializers.SerializerMethodField()
+    recent_workouts = DashboardWorkoutSerializer(many=True)
+    strain_7d = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AthleteProfile
+        fields = ("id", "user_id", "username", "latest_recovery", "strain_7d", "recent_workouts")
+
+    def get_latest_recovery(self, obj):
+        if obj.latest_recovery_at is None:
+            return None
+        return {
+            "created_at": serializers.DateTimeField().to_representation(obj.latest_recovery_at),
+            "recovery_score": obj.latest_recovery_score,
+            "hrv_rmssd_milli": obj.latest_hrv_rmssd_milli,
+            "resting_heart_rate": obj.latest_resting_heart_rate,
+        }
+
+    def get_strain_7d(self, obj):
+        return sum(w.strain for w in obj.recent_workouts if w.strain is not None)
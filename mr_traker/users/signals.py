@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token
+from .models import User, AthleteProfile, TrainerProfile
+
+
+def invalidate_user_tokens(user_id):
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, created=False, **kwargs):
+    # Deactivation, role or staff changes must reach cached tokens
+    if not created:
+        invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=AthleteProfile)
+@receiver(post_delete, sender=AthleteProfile)
+@receiver(post_save, sender=TrainerProfile)
+@receiver(post_delete, sender=TrainerProfile)
+def profile_changed(sender, instance, created=True, **kwargs):
+    # Only the profile ids are cached, so only creation and deletion matter
+    if created:
+        invalidate_user_tokens(instance.user_id)
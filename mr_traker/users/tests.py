@@ -1,8 +1,23 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from unittest.mock import patch
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from unittest.mock import Mock, patch
 import requests
 
+from recovery.models import Recovery
+from utils import whoop_service, whoop_webhook
+from workouts.models import Workout
+from .authentication import CachedTokenAuthentication, LRUCache, local_tokens, token_cache_key
+from .models import User, AthleteProfile, WhoopWebhookEvent
+
 class WhoopIntegrationTests(TestCase):
     def test_privacy_policy_view(self):
         url = reverse('privacy-policy')
@@ -10,10 +25,10 @@ class WhoopIntegrationTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Privacy Policy")
 
-    @patch('utils.whoop_service.requests.post')
-    def test_whoop_callback_view_success(self, mock_post):
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_whoop_callback_view_success(self, mock_request):
         # Mock successful token exchange
-        mock_response = mock_post.return_value
+        mock_response = mock_request.return_value
         mock_response.status_code = 200
         mock_response.json.return_value = {
             "access_token": "fake_access_token",
@@ -28,10 +43,10 @@ class WhoopIntegrationTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['token_data']['access_token'], 'fake_access_token')
 
-    @patch('utils.whoop_service.requests.post')
-    def test_whoop_callback_view_failure(self, mock_post):
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_whoop_callback_view_failure(self, mock_request):
         # Mock failed token exchange
-        mock_response = mock_post.return_value
+        mock_response = mock_request.return_value
         mock_response.status_code = 400
         mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("Bad Request")
 
@@ -40,3 +55,406 @@ class WhoopIntegrationTests(TestCase):
         
         self.assertEqual(response.status_code, 400)
         self.assertIn("error", response.json())
+
+
+class WhoopTokenRefreshTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="athlete", password="pw")
+        self.profile = AthleteProfile.objects.create(
+            user=user,
+            whoop_access_token="old_access",
+            whoop_refresh_token="old_refresh",
+            whoop_token_expires_at=timezone.now() + timedelta(minutes=1),
+        )
+
+    def token_response(self, mock_request):
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json.return_value = {
+            "access_token": "new_access",
+            "refresh_token": "new_refresh",
+            "expires_in": 3600,
+        }
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_expiring_token_is_refreshed(self, mock_request):
+        self.token_response(mock_request)
+
+        self.assertEqual(whoop_service.get_valid_access_token(self.profile), "new_access")
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.whoop_refresh_token, "new_refresh")
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_refresh_is_skipped_when_another_caller_already_refreshed(self, mock_request):
+        # Another request refreshed after this instance was loaded.
+        AthleteProfile.objects.filter(pk=self.profile.pk).update(
+            whoop_access_token="fresh_access",
+            whoop_refresh_token="fresh_refresh",
+            whoop_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+        self.assertEqual(whoop_service.get_valid_access_token(self.profile), "fresh_access")
+
+        mock_request.assert_not_called()
+        self.assertEqual(self.profile.whoop_refresh_token, "fresh_refresh")
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_refresh_expiring_tokens_only_touches_tokens_in_window(self, mock_request):
+        self.token_response(mock_request)
+        other = User.objects.create_user(username="other", password="pw")
+        AthleteProfile.objects.create(
+            user=other,
+            whoop_access_token="access",
+            whoop_refresh_token="refresh",
+            whoop_token_expires_at=timezone.now() + timedelta(hours=2),
+        )
+
+        summary = whoop_service.refresh_expiring_tokens(timedelta(minutes=30))
+
+        self.assertEqual(summary, {'refreshed': 1, 'failed': 0})
+        self.assertEqual(mock_request.call_count, 1)
+
+
+class WhoopSnapshotViewTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="athlete", password="pw")
+        AthleteProfile.objects.create(
+            user=user,
+            whoop_access_token="access",
+            whoop_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=user).key}"}
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_sections_are_fetched_concurrently(self, mock_request):
+        # Every call waits until all four are in flight at once.
+        barrier = threading.Barrier(4, timeout=5)
+
+        def respond(method, url, **kwargs):
+            barrier.wait()
+            response = Mock(status_code=200)
+            response.json.return_value = {"records": [{"url": url}], "next_token": None}
+            return response
+
+        mock_request.side_effect = respond
+
+        response = self.client.get(reverse('whoop-snapshot'), **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"recovery", "workouts", "sleep", "cycles"})
+        self.assertTrue(response.json()["sleep"]["records"][0]["url"].endswith("/activity/sleep"))
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_malformed_section_fails_alone(self, mock_request):
+        def respond(method, url, **kwargs):
+            response = Mock(status_code=200)
+            if url.endswith("/activity/sleep"):
+                response.json.side_effect = ValueError("Expecting value: line 1 column 1 (char 0)")
+            else:
+                response.json.return_value = {"records": [{"url": url}], "next_token": None}
+            return response
+
+        mock_request.side_effect = respond
+
+        response = self.client.get(reverse('whoop-snapshot'), **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("error", response.json()["sleep"])
+        self.assertEqual(len(response.json()["workouts"]["records"]), 1)
+
+    def test_requires_token(self):
+        response = self.client.get(reverse('whoop-snapshot'))
+
+        self.assertEqual(response.status_code, 401)
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_limit_out_of_range_is_rejected(self, mock_request):
+        for limit in ('-1', '0', '26', 'ten'):
+            response = self.client.get(reverse('whoop-snapshot'), {"limit": limit}, **self.auth)
+            self.assertEqual(response.status_code, 400, limit)
+            self.assertEqual(response.json(), {"detail": "limit must be 1-25."})
+        mock_request.assert_not_called()
+
+
+class TrainerDashboardViewTests(TestCase):
+    def setUp(self):
+        self.trainer = User.objects.create_user(username="coach", password="pw", role=User.IS_TRAINER)
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.trainer).key}"}
+
+    def seed_athletes(self, count, offset=0):
+        now = timezone.now()
+        users = User.objects.bulk_create(
+            User(username=f"athlete{offset + i}") for i in range(count))
+        profiles = AthleteProfile.objects.bulk_create(AthleteProfile(user=user) for user in users)
+        AthleteProfile.trainers.through.objects.bulk_create(
+            AthleteProfile.trainers.through(athleteprofile=profile, user=self.trainer)
+            for profile in profiles)
+        Recovery.objects.bulk_create(
+            Recovery(athlete=profile, cycle_id=profile.pk * 10 + day, score_state="SCORED",
+                     recovery_score=40 + day, hrv_rmssd_milli=50.0, resting_heart_rate=50,
+                     created_at=now - timedelta(days=3 - day), updated_at=now)
+            for profile in profiles for day in range(3))
+        Workout.objects.bulk_create(
+            Workout(athlete=profile, whoop_id=f"{profile.pk}-{day}", strain=5.0,
+                    start=now - timedelta(days=day * 5), end=now)
+            for profile in profiles for day in range(3))
+
+    def dashboard_queries(self):
+        # Count the token lookup every time, not only on the first request
+        local_tokens.clear()
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('trainer-dashboard'), **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx.captured_queries)
+
+    def test_returns_latest_recovery_and_week_of_workouts(self):
+        self.seed_athletes(1)
+
+        data, _ = self.dashboard_queries()
+
+        self.assertEqual(data[0]["latest_recovery"]["recovery_score"], 42)
+        self.assertEqual(len(data[0]["recent_workouts"]), 2)
+        self.assertEqual(data[0]["strain_7d"], 10.0)
+
+    def test_query_count_is_flat_from_10_to_1000_athletes(self):
+        self.seed_athletes(10)
+        _, small = self.dashboard_queries()
+
+        self.seed_athletes(990, offset=10)
+        data, large = self.dashboard_queries()
+
+        self.assertEqual(len(data), 1000)
+        self.assertEqual(small, large)
+
+    def test_unchanged_dashboard_is_not_modified(self):
+        self.seed_athletes(3)
+        first = self.client.get(reverse('trainer-dashboard'), **self.auth)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('trainer-dashboard'), HTTP_IF_NONE_MATCH=first['ETag'], **self.auth)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('users_user' in q['sql'] and 'recovery' in q['sql'] and 'LIMIT 1' in q['sql']
+                             for q in ctx.captured_queries))
+
+        Recovery.objects.filter(recovery_score=42).update(recovery_score=99, updated_at=timezone.now() + timedelta(seconds=1))
+        response = self.client.get(reverse('trainer-dashboard'), HTTP_IF_NONE_MATCH=first['ETag'], **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+
+@override_settings(WHOOP_CLIENT_SECRET="webhook-secret")
+class WhoopWebhookTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="athlete", password="pw")
+        self.profile = AthleteProfile.objects.create(
+            user=user,
+            whoop_user_id="10129",
+            whoop_access_token="token",
+            whoop_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+    def deliver(self, payload, secret="webhook-secret"):
+        body = json.dumps(payload).encode()
+        timestamp = str(int(time.time() * 1000))
+        return self.client.post(
+            reverse('whoop-webhook'), body, content_type="application/json",
+            HTTP_X_WHOOP_SIGNATURE=whoop_webhook.sign(body, timestamp, secret),
+            HTTP_X_WHOOP_SIGNATURE_TIMESTAMP=timestamp,
+        )
+
+    def event(self, event_type, object_id, trace_id="trace-1"):
+        return {"user_id": 10129, "id": object_id, "type": event_type, "trace_id": trace_id}
+
+    @patch('utils.whoop_webhook.process_event_async')
+    def test_bad_signature_is_rejected(self, mock_process):
+        response = self.deliver(self.event("workout.updated", "w1"), secret="wrong")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(WhoopWebhookEvent.objects.exists())
+        mock_process.assert_not_called()
+
+    @patch('utils.whoop_webhook.process_event_async')
+    def test_redelivery_is_processed_once(self, mock_process):
+        first = self.deliver(self.event("workout.updated", "w1"))
+        second = self.deliver(self.event("workout.updated", "w1"))
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(WhoopWebhookEvent.objects.count(), 1)
+        mock_process.assert_called_once()
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_updated_event_fetches_only_that_record(self, mock_request):
+        mock_request.return_value.json.return_value = {
+            "id": "w1", "start": "2025-12-01T08:00:00.000Z", "end": "2025-12-01T09:00:00.000Z",
+            "score_state": "SCORED", "score": {"strain": 11.0},
+        }
+        event, _ = whoop_webhook.record_event(self.event("workout.updated", "w1"))
+
+        whoop_webhook.process_event(event)
+
+        self.assertEqual(event.status, WhoopWebhookEvent.PROCESSED)
+        self.assertEqual(Workout.objects.get(whoop_id="w1").strain, 11.0)
+        mock_request.assert_called_once()
+        self.assertTrue(mock_request.call_args.args[1].endswith("/developer/v2/activity/workout/w1"))
+
+    def test_deleted_event_removes_local_record(self):
+        now = timezone.now()
+        Recovery.objects.create(
+            athlete=self.profile, cycle_id=1, sleep_id="s1", score_state="SCORED",
+            created_at=now, updated_at=now,
+        )
+        event, _ = whoop_webhook.record_event(self.event("recovery.deleted", "s1"))
+
+        whoop_webhook.process_event(event)
+
+        self.assertEqual(event.status, WhoopWebhookEvent.PROCESSED)
+        self.assertFalse(Recovery.objects.exists())
+
+    def test_event_for_unknown_user_is_ignored(self):
+        event, _ = whoop_webhook.record_event({**self.event("sleep.updated", "s1"), "user_id": 1})
+
+        whoop_webhook.process_event(event)
+
+        self.assertEqual(event.status, WhoopWebhookEvent.IGNORED)
+        self.assertIsNone(event.athlete)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        local_tokens.clear()
+        cache.clear()
+        self.user = User.objects.create_user(username="cached", password="pw", role=User.IS_TRAINER)
+        self.token = Token.objects.create(user=self.user)
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {self.token.key}"}
+        self.url = reverse('trainer-athletes')
+
+    def queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, **self.auth)
+        return response.status_code, len(ctx.captured_queries)
+
+    def test_token_is_looked_up_once(self):
+        status_code, first = self.queries()
+        self.assertEqual(status_code, 200)
+
+        # Another process: the shared cache answers without the database
+        local_tokens.clear()
+        self.assertEqual(self.queries(), (200, first - 1))
+        self.assertEqual(self.queries(), (200, first - 1))
+
+    def test_cached_entry_holds_no_credentials(self):
+        self.queries()
+
+        entry = cache.get(token_cache_key(self.token.key))
+        self.assertEqual(set(entry['fields']), {'id', 'username', 'role', 'is_active', 'is_staff', 'is_superuser'})
+        self.assertIsNone(entry['trainer_profile_id'])
+
+    def test_athlete_profile_comes_from_the_cache(self):
+        athlete = User.objects.create_user(username="cached-athlete", password="pw")
+        profile = AthleteProfile.objects.create(user=athlete)
+        auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=athlete).key}"}
+        self.client.get(reverse('cycle-list'), **auth)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('cycle-list'), **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in ctx.captured_queries if 'users_athleteprofile' in query['sql']])
+
+        cached = CachedTokenAuthentication().authenticate_credentials(Token.objects.get(user=athlete).key)[0]
+        with self.assertNumQueries(0):
+            self.assertEqual(cached.athlete_profile.pk, profile.pk)
+            self.assertFalse(hasattr(cached, 'trainer_profile'))
+
+    def test_deactivated_user_is_rejected(self):
+        self.queries()
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.queries()[0], 401)
+
+    def test_logout_revokes_the_token(self):
+        self.queries()
+        response = self.client.post(reverse('logout'), **self.auth)
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(self.queries()[0], 401)
+
+    def test_role_change_is_seen(self):
+        self.queries()
+        self.user.role = User.IS_ATHLETE
+        self.user.save()
+
+        self.assertEqual(self.queries()[0], 403)
+
+    def test_local_cache_is_bounded(self):
+        lru = LRUCache(maxsize=2, ttl=60)
+        for key in "abc":
+            lru.set(key, key)
+        self.assertIsNone(lru.get("a"))
+        self.assertEqual((lru.get("b"), lru.get("c"), len(lru)), ("b", "c", 2))
+
+
+class MyAthletesViewTests(TestCase):
+    def setUp(self):
+        self.trainer = User.objects.create_user(username="roster-coach", password="pw", role=User.IS_TRAINER)
+        self.other = User.objects.create_user(username="other-coach", password="pw", role=User.IS_TRAINER)
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.trainer).key}"}
+        self.url = reverse('trainer-athletes')
+
+    def seed_athletes(self, count, offset=0):
+        users = User.objects.bulk_create(
+            User(username=f"roster{offset + i}", date_joined=timezone.now() - timedelta(minutes=offset + i))
+            for i in range(count))
+        profiles = AthleteProfile.objects.bulk_create(AthleteProfile(user=user) for user in users)
+        AthleteProfile.trainers.through.objects.bulk_create(
+            AthleteProfile.trainers.through(athleteprofile=profile, user=trainer)
+            for profile in profiles for trainer in (self.trainer, self.other))
+
+    def roster_queries(self, params=None):
+        local_tokens.clear()
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_is_flat(self):
+        self.seed_athletes(5)
+        response, small = self.roster_queries()
+        self.assertEqual(response.json()[0]["athlete_profile"]["trainers"], [self.trainer.pk, self.other.pk])
+
+        self.seed_athletes(95, offset=5)
+        response, large = self.roster_queries()
+
+        self.assertEqual(len(response.json()), 100)
+        self.assertEqual(small, large)
+
+    def test_pages_cover_the_roster_once(self):
+        self.seed_athletes(7)
+
+        seen, params = [], {"limit": 3}
+        while True:
+            response, _ = self.roster_queries(params)
+            seen += [row["username"] for row in response.json()]
+            if "X-Next-Cursor" not in response:
+                break
+            params = {"limit": 3, "cursor": response["X-Next-Cursor"]}
+
+        self.assertEqual(seen, [f"roster{i}" for i in range(7)])
+
+    def test_sparse_fieldsets(self):
+        self.seed_athletes(2)
+
+        response, queries = self.roster_queries({"fields": "id,username"})
+        self.assertEqual(set(response.json()[0]), {"id", "username"})
+        self.assertEqual(queries, 2)  # token, athletes: nothing prefetched
+
+        response = self.client.get(self.url, {"fields": "id,password"}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+        for fields in ("", ",", " , ,"):
+            response = self.client.get(self.url, {"fields": fields}, **self.auth)
+            self.assertEqual(response.status_code, 400, fields)
+            self.assertEqual(response.json(), {"detail": "fields must name at least one field."})
@@ -1,12 +1,18 @@
 from django.urls import path
-from .views import RegisterView, LoginView, MyAthletesView, PrivacyPolicyView, WhoopCallbackView
+from .views import RegisterView, LoginView, LogoutView, MyAthletesView, TrainerDashboardView, PrivacyPolicyView, WhoopCallbackView, WhoopSnapshotView, WhoopWebhookView, WhoopBudgetView, ResponseCacheStatsView
 
 urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/login/', LoginView.as_view(), name='login'),
+    path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('trainer/athletes/', MyAthletesView.as_view(), name='trainer-athletes'),
+    path('trainer/dashboard/', TrainerDashboardView.as_view(), name='trainer-dashboard'),
+    path('cache/stats/', ResponseCacheStatsView.as_view(), name='cache-stats'),
     
     # WHOOP Integration
     path('privacy-policy/', PrivacyPolicyView.as_view(), name='privacy-policy'),
     path('whoop/callback/', WhoopCallbackView.as_view(), name='whoop-callback'),
+    path('whoop/snapshot/', WhoopSnapshotView.as_view(), name='whoop-snapshot'),
+    path('whoop/webhook/', WhoopWebhookView.as_view(), name='whoop-webhook'),
+    path('whoop/budget/', WhoopBudgetView.as_view(), name='whoop-budget'),
 ]
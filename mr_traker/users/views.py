@@ -2,11 +2,27 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.utils import timezone
+from datetime import timedelta
+import json
+import logging
 
-from .serializers import RegisterSerializer, UserSerializer
-from .models import User
+from recovery.models import Recovery
+from workouts.models import Workout
+from utils import response_cache, whoop_webhook
+from utils.conditional import aggregate_validator, conditional_response, make_etag
+from utils.pagination import MAX_PAGE_SIZE, keyset_page, page_headers, page_size
+from .serializers import RegisterSerializer, UserSerializer, TrainerDashboardSerializer, RosterAthleteSerializer
+from .models import User, AthleteProfile
+
+logger = logging.getLogger(__name__)
 
 
 class RegisterView(APIView):
@@ -80,10 +96,26 @@ class LoginView(APIView):
         )
 
 
+class LogoutView(APIView):
+    """
+    POST /api/users/auth/logout/
+    Deletes the caller's token; the next login issues a new one.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        Token.objects.filter(user=request.user).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class MyAthletesView(APIView):
     """
     GET /api/trainer/athletes/
     Returns all athlete users that are linked to the CURRENT logged-in trainer.
+    Query Params: ?limit=100&cursor=...&fields=id,username,athlete_profile
+    Newest athletes first, keyset-paginated: the next page's cursor is in
+    the Link and X-Next-Cursor headers. `fields` limits each row to those
+    fields. A page takes the same few queries however big the roster is.
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -97,15 +129,126 @@ class MyAthletesView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        fields = request.query_params.get("fields")
+        if fields is not None:
+            fields = [name.strip() for name in fields.split(",") if name.strip()]
+            if not fields:
+                return Response(
+                    {"detail": "fields must name at least one field."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            unknown = set(fields) - set(RosterAthleteSerializer.Meta.fields)
+            if unknown:
+                return Response(
+                    {"detail": f"Unknown fields: {', '.join(sorted(unknown))}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        try:
+            limit = page_size(request.query_params, default=MAX_PAGE_SIZE)
+        except ValueError:
+            return Response({"detail": f"limit must be 1-{MAX_PAGE_SIZE}."}, status=status.HTTP_400_BAD_REQUEST)
+
         # Get all Users that have an AthleteProfile and are linked to this trainer
-        athletes_qs = User.objects.filter(
-            athlete_profile__trainers=trainer
-        ).select_related("athlete_profile")
+        athletes_qs = User.objects.filter(athlete_profile__trainers=trainer).only(
+            "id", "username", "email", "role", "date_joined")
+        if fields is None or "athlete_profile" in fields:
+            athletes_qs = athletes_qs.select_related("athlete_profile").only(
+                "id", "username", "email", "role", "date_joined",
+                "athlete_profile__id", "athlete_profile__whoop_user_id", "athlete_profile__whoop_token_expires_at",
+            ).prefetch_related(
+                Prefetch("athlete_profile__trainers", queryset=User.objects.only("id")))
 
-        serializer = UserSerializer(athletes_qs, many=True)
+        try:
+            page, next_cursor = keyset_page(athletes_qs, "date_joined", request.query_params.get("cursor"), limit)
+        except ValueError:
+            return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = RosterAthleteSerializer(page, many=True, fields=fields)
+        return Response(serializer.data, status=status.HTTP_200_OK, headers=page_headers(request, next_cursor))
+
+
+class TrainerDashboardView(APIView):
+    """
+    GET /api/users/trainer/dashboard/
+    For each athlete linked to the logged-in trainer: the latest recovery
+    (score, HRV, RHR) and the last 7 days of workouts with total strain.
+    Runs a fixed number of queries however many athletes there are.
+    Carries an ETag; a matching If-None-Match gets a 304 after three
+    aggregate queries. No Last-Modified, since workouts leaving the 7-day
+    window change the response without any row changing.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    window = timedelta(days=7)
+
+    def get(self, request):
+        trainer = request.user
+
+        if trainer.role != User.IS_TRAINER:
+            return Response(
+                {"detail": "Only trainers can view their athletes."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        since = timezone.now() - self.window
+        roster = list(AthleteProfile.objects.filter(trainers=trainer).values_list("pk", "user__username"))
+        etag = make_etag(
+            "trainer-dashboard",
+            roster,
+            aggregate_validator(Recovery.objects.filter(athlete__trainers=trainer)),
+            aggregate_validator(Workout.objects.filter(athlete__trainers=trainer, start__gte=since)),
+        )
+        return conditional_response(request, etag, None, lambda: self.build(trainer, since))
+
+    def build(self, trainer, since):
+        latest = Recovery.objects.filter(athlete=OuterRef("pk")).order_by("-created_at")
+        recent_workouts = Workout.objects.filter(start__gte=since).order_by("-start")
+
+        athletes = (
+            AthleteProfile.objects
+            .filter(trainers=trainer)
+            .select_related("user")
+            .annotate(
+                latest_recovery_at=Subquery(latest.values("created_at")[:1]),
+                latest_recovery_score=Subquery(latest.values("recovery_score")[:1]),
+                latest_hrv_rmssd_milli=Subquery(latest.values("hrv_rmssd_milli")[:1]),
+                latest_resting_heart_rate=Subquery(latest.values("resting_heart_rate")[:1]),
+            )
+            .prefetch_related(Prefetch("workouts", queryset=recent_workouts, to_attr="recent_workouts"))
+            .order_by("user__username")
+        )
+
+        serializer = TrainerDashboardSerializer(athletes, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class ResponseCacheStatsView(APIView):
+    """
+    GET /api/users/cache/stats/
+    Hit/miss counts and hit ratio of the per-athlete response cache, per
+    view, for this process. Staff only.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache.stats.snapshot(), status=status.HTTP_200_OK)
+
+
+class WhoopBudgetView(APIView):
+    """
+    GET /api/users/whoop/budget/
+    Current use of the shared WHOOP rate-limit budget, per window, as
+    tracked by the scheduler and last reported by WHOOP. Staff only.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        from utils.whoop_client import get_client
+        from utils.whoop_rate_limit import RateLimiter
+
+        limiter = get_client().limiter or RateLimiter()
+        return Response(limiter.usage(), status=status.HTTP_200_OK)
+
+
 class PrivacyPolicyView(APIView):
     """
     GET /api/users/privacy-policy/
@@ -126,7 +269,6 @@ class WhoopCallbackView(APIView):
     permission_classes = [permissions.AllowAny]  # Or IsAuthenticated if you want to link to logged-in user
 
     def get(self, request):
-        print(request)
         code = request.query_params.get("code")
         error = request.query_params.get("error")
 
@@ -139,8 +281,6 @@ class WhoopCallbackView(APIView):
         # Exchange code for token
         from utils import whoop_service
         token_data = whoop_service.exchange_oauth_code(code)
-        print("LOOK HERE IDO:")
-        print(token_data)
 
         if not token_data:
             return Response({"error": "Failed to exchange code for token"}, status=status.HTTP_400_BAD_REQUEST)
@@ -148,9 +288,7 @@ class WhoopCallbackView(APIView):
         # ------------------------------------------------------------------
         # PROVISIONAL LOGIC: HARDCODED LINKING
         # ------------------------------------------------------------------
-        from django.utils import timezone
-        from datetime import timedelta
-        from .models import User, AthleteProfile, TrainerProfile
+        from .models import TrainerProfile
 
         # 1. Get or Create the specific user
         try:
@@ -168,7 +306,8 @@ class WhoopCallbackView(APIView):
         athlete_profile, _ = AthleteProfile.objects.get_or_create(user=user)
 
         # 3. Store Tokens
-        athlete_profile.whoop_user_id = token_data.get('user_id')
+        # Webhook events name the WHOOP user, so we need their id
+        athlete_profile.whoop_user_id = token_data.get('user_id') or whoop_service.fetch_whoop_user_id(token_data['access_token'])
         athlete_profile.whoop_access_token = token_data['access_token']
         athlete_profile.whoop_refresh_token = token_data['refresh_token']
         
@@ -183,7 +322,7 @@ class WhoopCallbackView(APIView):
             athlete_profile.trainers.add(trainer_profile.user)
             trainer_linked = True
         except TrainerProfile.DoesNotExist:
-            print("Trainer with passkey 12345 not found.")
+            logger.warning("whoop_callback_unlinked athlete=%s reason=trainer_not_found", athlete_profile.pk)
 
         return Response({
             "message": "WHOOP connected and linked successfully!",
@@ -191,3 +330,94 @@ class WhoopCallbackView(APIView):
             "trainer_linked": trainer_linked,
             "token_data": token_data 
         }, status=status.HTTP_200_OK)
+
+
+class WhoopWebhookView(APIView):
+    """
+    POST /api/users/whoop/webhook/
+    Receives WHOOP webhook events (recovery/workout/sleep updated or deleted).
+    Verifies the X-WHOOP-Signature header, stores the event once per
+    trace_id and fetches just the referenced record in the background.
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        # 1. Verify the signature over the raw body
+        body = request.body
+        if not whoop_webhook.verify_signature(
+            body,
+            request.META.get(whoop_webhook.TIMESTAMP_HEADER),
+            request.META.get(whoop_webhook.SIGNATURE_HEADER),
+        ):
+            return Response({"detail": "Invalid signature."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            payload = json.loads(body)
+            event, created = whoop_webhook.record_event(payload)
+        except (ValueError, TypeError, KeyError):
+            return Response({"detail": "Malformed event."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 2. Redeliveries are acknowledged but not processed again
+        if not created:
+            return Response({"detail": "Duplicate event."}, status=status.HTTP_200_OK)
+
+        # 3. Fetch the record without keeping WHOOP waiting
+        whoop_webhook.process_event_async(event)
+        return Response({"detail": "Accepted."}, status=status.HTTP_202_ACCEPTED)
+
+
+def authenticate_api_request(request):
+    """
+    Runs the configured DRF authentication classes against a plain Django
+    request, for views that can't be APIViews. Returns the user or None.
+    """
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+SNAPSHOT_MAX_LIMIT = 25
+
+
+class WhoopSnapshotView(View):
+    """
+    GET /api/users/whoop/snapshot/
+    Fetches the athlete's latest recovery, workouts, sleep and cycles from
+    WHOOP concurrently and returns them in one response.
+    Query Params: ?limit=10 (records per section, 1-25)
+    """
+
+    async def get(self, request):
+        from utils.whoop_service import get_valid_access_token
+        from utils.whoop_snapshot import fetch_snapshot
+
+        user = await sync_to_async(authenticate_api_request)(request)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # All of it: the cached request.user.athlete_profile has only the id
+        profile = await AthleteProfile.objects.filter(user=user).afirst()
+        if profile is None:
+            return JsonResponse({"detail": "User is not an athlete."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = page_size(request.GET, default=10, maximum=SNAPSHOT_MAX_LIMIT)
+        except ValueError:
+            return JsonResponse(
+                {"detail": f"limit must be 1-{SNAPSHOT_MAX_LIMIT}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        access_token = await sync_to_async(get_valid_access_token)(profile)
+        if not access_token:
+            return JsonResponse({"detail": "WHOOP not connected or token expired."}, status=status.HTTP_401_UNAUTHORIZED)
+
+        snapshot = await fetch_snapshot(access_token, limit)
+
+        if all("error" in section for section in snapshot.values()):
+            return JsonResponse(snapshot, status=status.HTTP_502_BAD_GATEWAY)
+        return JsonResponse(snapshot, status=status.HTTP_200_OK)
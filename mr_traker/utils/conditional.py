@@ -0,0 +1,49 @@
+"""
+Conditional GET (ETag / Last-Modified) for list endpoints.
+
+The validator is the newest `updated_at` plus the row count of the rows a
+response is built from, read in one aggregate over an (athlete, updated_at)
+index. When the client already has that version we answer 304 without
+touching the rows or the serializers.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def aggregate_validator(queryset, field='updated_at'):
+    """
+    (newest `field`, row count) for a queryset, in one query.
+    """
+    result = queryset.aggregate(last_modified=Max(field), count=Count('pk'))
+    return result['last_modified'], result['count']
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def query_shape(params, ignore=('refresh',)):
+    return sorted((name, value) for name, value in params.lists() if name not in ignore)
+
+
+def conditional_response(request, etag, last_modified, build):
+    """
+    Returns 304 if the request's If-None-Match / If-Modified-Since match,
+    otherwise `build()` with the validators set on it.
+    `last_modified` may be None for responses that also change with time.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = build()
+
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    # Let clients keep a copy but always revalidate it
+    response['Cache-Control'] = 'private, no-cache'
+    return response
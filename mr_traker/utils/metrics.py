@@ -0,0 +1,232 @@
+"""
+In-process metrics, exposed at /metrics in the Prometheus text format.
+
+Counters, gauges and histograms live in one registry per process and are
+updated where the work happens: RequestMetricsMiddleware (per-view latency,
+DB queries and DB time), the WHOOP client (upstream latency and status per
+endpoint) and token refreshes. Figures that already live elsewhere (sync
+lag in WhoopSyncState, response-cache hits) are read by collectors when
+/metrics is scraped, so they cost nothing in between.
+"""
+import math
+import threading
+
+# Seconds; roughly Prometheus' defaults, stretched for slow WHOOP calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        lines = self.header()
+        for key, value in series:
+            lines.append(f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._series.get(self.key(labels), 0)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self._lock:
+            self._series[key] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][index] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def count(self, **labels):
+        with self._lock:
+            series = self._series.get(self.key(labels))
+            return series['count'] if series else 0
+
+    def render(self):
+        with self._lock:
+            series = sorted((key, {**value, 'buckets': list(value['buckets'])}) for key, value in self._series.items())
+        lines = self.header()
+        for key, value in series:
+            cumulative = 0
+            for bound, hits in zip(self.buckets, value['buckets']):
+                cumulative += hits
+                labels = format_labels(self.label_names, key, [('le', format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(value['sum'])}")
+            lines.append(f"{self.name}_count{labels} {value['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = []
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, function):
+        """
+        Registers `function()`, called on every scrape; it returns metrics
+        built for that scrape. Usable as a decorator.
+        """
+        with self._lock:
+            self._collectors.append(function)
+        return function
+
+    def reset(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            metrics.extend(collector())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+request_latency = registry.histogram(
+    'http_request_duration_seconds', "Time spent serving a request, by view.",
+    labels=('view', 'method', 'status'))
+request_queries = registry.histogram(
+    'http_request_db_queries', "SQL queries run while serving a request, by view.",
+    labels=('view',), buckets=QUERY_BUCKETS)
+request_db_time = registry.histogram(
+    'http_request_db_duration_seconds', "Time spent in SQL while serving a request, by view.",
+    labels=('view',))
+whoop_latency = registry.histogram(
+    'whoop_request_duration_seconds', "Latency of WHOOP API calls, by endpoint and status.",
+    labels=('endpoint', 'status'))
+whoop_token_refreshes = registry.counter(
+    'whoop_token_refreshes_total', "WHOOP access-token refreshes, by result.",
+    labels=('result',))
+
+
+@registry.collector
+def sync_lag():
+    """
+    Per athlete and resource: seconds since the last sync, and how far
+    behind now the newest stored record (the watermark) is.
+    """
+    from django.utils import timezone
+    from users.models import WhoopSyncState
+
+    since_sync = Gauge('whoop_sync_age_seconds', "Seconds since the last successful sync.",
+                       labels=('athlete', 'resource'))
+    behind = Gauge('whoop_sync_lag_seconds', "Seconds between now and the newest synced record.",
+                   labels=('athlete', 'resource'))
+    now = timezone.now()
+    states = WhoopSyncState.objects.values_list('athlete_id', 'resource', 'last_synced_at', 'watermark')
+    for athlete, resource, last_synced_at, watermark in states.iterator():
+        if last_synced_at:
+            since_sync.set(round((now - last_synced_at).total_seconds(), 3), athlete=athlete, resource=resource)
+        if watermark:
+            behind.set(round((now - watermark).total_seconds(), 3), athlete=athlete, resource=resource)
+    return [since_sync, behind]
+
+
+@registry.collector
+def response_cache_stats():
+    from .response_cache import stats
+
+    hits = Counter('response_cache_hits_total', "Response cache hits, by view.", labels=('view',))
+    misses = Counter('response_cache_misses_total', "Response cache misses, by view.", labels=('view',))
+    for view, counts in stats.snapshot().items():
+        hits.inc(counts['hits'], view=view)
+        misses.inc(counts['misses'], view=view)
+    return [hits, misses]
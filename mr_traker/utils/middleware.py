@@ -0,0 +1,63 @@
+"""
+Request timing.
+
+RequestMetricsMiddleware times every request, counts the SQL it runs and
+the time spent in it, and records both in utils.metrics under the view's
+URL name. Each request also gets one structured log line on the
+"mr_traker.requests" logger.
+"""
+import logging
+import time
+
+from django.db import connection
+
+from . import metrics
+
+logger = logging.getLogger('mr_traker.requests')
+
+
+def view_label(request):
+    """
+    The URL name of the view that served `request` (stable and low
+    cardinality, unlike the path), or "unmatched" for 404s.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match._func_path
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db = {'queries': 0, 'seconds': 0.0}
+
+        def time_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db['queries'] += 1
+                db['seconds'] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(time_query):
+            response = self.get_response(request)
+        seconds = time.perf_counter() - started
+
+        view = view_label(request)
+        metrics.request_latency.observe(seconds, view=view, method=request.method, status=response.status_code)
+        metrics.request_queries.observe(db['queries'], view=view)
+        metrics.request_db_time.observe(db['seconds'], view=view)
+        logger.info(
+            "request method=%s path=%s view=%s status=%s duration_ms=%.1f db_queries=%d db_ms=%.1f",
+            request.method, request.path, view, response.status_code,
+            seconds * 1000, db['queries'], db['seconds'] * 1000,
+            extra={
+                'view': view, 'status': response.status_code, 'duration': seconds,
+                'db_queries': db['queries'], 'db_duration': db['seconds'],
+            },
+        )
+        return response
@@ -0,0 +1,109 @@
+"""
+Keyset (cursor) pagination and date-range filters for the list endpoints.
+
+Lists are newest first on (timestamp, id). A page ends with a cursor that
+encodes its last row; the next page asks for rows strictly before it, so
+every page is an index range scan on (athlete, timestamp) however deep
+into the history it is, unlike OFFSET.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(value, pk):
+    raw = json.dumps([value.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    (timestamp, id) from a cursor; ValueError if it isn't one of ours.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, pk = json.loads(raw)
+        value = parse_datetime(value)
+    except (binascii.Error, TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+    if value is None or not isinstance(pk, int):
+        raise ValueError("Invalid cursor.")
+    return value, pk
+
+
+def keyset_page(queryset, field, cursor=None, limit=25):
+    """
+    One page of `queryset`, newest first on (`field`, pk).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        # The plain upper bound keeps this a range scan on the index
+        queryset = queryset.filter(**{f'{field}__lte': value}).filter(
+            Q(**{f'{field}__lt': value}) | Q(pk__lt=pk))
+
+    rows = list(queryset.order_by(f'-{field}', '-pk')[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(getattr(last, field), last.pk)
+
+
+def page_headers(request, next_cursor):
+    """
+    Link / X-Next-Cursor headers pointing at the next page. Lists stay
+    plain JSON arrays, so existing clients are unaffected.
+    """
+    if not next_cursor:
+        return {}
+    params = request.query_params.copy()
+    params['cursor'] = next_cursor
+    params.pop('refresh', None)
+    url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return {'Link': f'<{url}>; rel="next"', 'X-Next-Cursor': next_cursor}
+
+
+def parse_bound(value, end=False):
+    """
+    A ?start= / ?end= value as an aware datetime. A bare date means the
+    start of that day, or for `end` the start of the next one (inclusive).
+    """
+    day = parse_date(value)
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        moment = datetime.combine(day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def date_range(queryset, field, params):
+    """
+    Applies ?start= (inclusive) and ?end= to `field`.
+    """
+    if params.get('start'):
+        queryset = queryset.filter(**{f'{field}__gte': parse_bound(params['start'])})
+    if params.get('end'):
+        end = params['end']
+        lookup = 'lt' if parse_date(end) is not None else 'lte'
+        queryset = queryset.filter(**{f'{field}__{lookup}': parse_bound(end, end=True)})
+    return queryset
+
+
+def page_size(params, default=25, maximum=MAX_PAGE_SIZE):
+    size = int(params.get('limit', default))
+    if not 1 <= size <= maximum:
+        raise ValueError('limit')
+    return size
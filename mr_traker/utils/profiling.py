@@ -0,0 +1,149 @@
+"""
+On-demand profiling of a single request.
+
+A staff user who sends `X-Profile: 1` gets that request run under cProfile,
+with every SQL query recorded along with its time and the line of our code
+that issued it. The result is stored as a ProfileCapture (listed in the
+admin, where the .prof and the JSON report can be downloaded) and its id
+is returned in the X-Profile-Capture response header. Everyone else, and
+staff without the header, pays nothing but the header check.
+"""
+import cProfile
+import logging
+import marshal
+import pstats
+import time
+import traceback
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .middleware import view_label
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+# The query wrappers themselves are on every query's stack
+WRAPPER_FILES = {str(Path(__file__).resolve()), str(Path(__file__).with_name('middleware.py').resolve())}
+SQL_LIMIT = 2000  # characters of each statement kept in the report
+TOP_FUNCTIONS = 40
+
+
+def staff_user(request):
+    """
+    The staff user making `request`, or None. API clients authenticate in
+    the view (token auth), so the configured DRF authenticators are tried
+    here too.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return user
+    drf_request = Request(request)
+    for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication().authenticate(drf_request)
+        except exceptions.APIException:
+            return None
+        if result:
+            return result[0] if result[0].is_staff else None
+    return None
+
+
+def query_origin():
+    """
+    "file:line in function" of the innermost project frame outside the
+    query wrappers (the code that ran the query), or None.
+    """
+    for frame in reversed(traceback.extract_stack()):
+        filename = str(Path(frame.filename).resolve())
+        if filename.startswith(PROJECT_DIR) and filename not in WRAPPER_FILES:
+            return f"{Path(filename).relative_to(PROJECT_DIR)}:{frame.lineno} in {frame.name}"
+    return None
+
+
+def hottest_functions(profiler, limit=TOP_FUNCTIONS):
+    stats = pstats.Stats(profiler).stats
+    rows = [
+        {
+            'function': f"{filename}:{line}({name})",
+            'calls': calls,
+            'primitive_calls': primitive,
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        }
+        for (filename, line, name), (primitive, calls, own, cumulative, _) in stats.items()
+    ]
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:limit]
+
+
+class ProfilerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.headers.get('X-Profile') != '1':
+            return self.get_response(request)
+        user = staff_user(request)
+        if user is None:
+            return self.get_response(request)
+        return self.profile(request, user)
+
+    def profile(self, request, user):
+        queries = []
+
+        def record_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({
+                    'sql': sql[:SQL_LIMIT],
+                    'ms': round((time.perf_counter() - started) * 1000, 3),
+                    'many': many,
+                    'origin': query_origin(),
+                })
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with connection.execute_wrapper(record_query):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - started
+
+        capture = self.store(request, user, response, profiler, queries, duration)
+        response['X-Profile-Capture'] = str(capture.pk)
+        return response
+
+    def store(self, request, user, response, profiler, queries, duration):
+        from users.models import ProfileCapture
+
+        profiler.create_stats()
+        query_ms = sum(query['ms'] for query in queries)
+        capture = ProfileCapture.objects.create(
+            user=user,
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view=view_label(request),
+            status_code=response.status_code,
+            duration_ms=round(duration * 1000, 3),
+            query_count=len(queries),
+            query_ms=round(query_ms, 3),
+            # The same format as Profile.dump_stats(), so pstats can load it
+            profile=marshal.dumps(profiler.stats),
+            report={'functions': hottest_functions(profiler), 'queries': queries},
+        )
+        stale = ProfileCapture.objects.values_list('pk', flat=True)[settings.PROFILER_KEEP_CAPTURES:]
+        ProfileCapture.objects.filter(pk__in=list(stale)).delete()
+        logger.info(
+            "profile_capture id=%s user=%s view=%s duration_ms=%.1f db_queries=%d db_ms=%.1f",
+            capture.pk, user.pk, capture.view, capture.duration_ms, capture.query_count, capture.query_ms,
+        )
+        return capture
@@ -0,0 +1,112 @@
+"""
+Per-athlete cache of rendered list responses.
+
+Entries are keyed by view, athlete, the athlete's data version and the
+query string, so they never need to be deleted: when a sync writes new
+rows for an athlete the version is bumped and every old entry for that
+athlete simply stops being read (and ages out of the cache).
+
+The backend is whatever CACHES['default'] is (local memory by default,
+a shared file cache when DJANGO_CACHE_BACKEND=file).
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+
+class CacheStats:
+    """
+    Thread-safe per-view hit/miss counters.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, hit):
+        with self._lock:
+            stats = self._views.setdefault(view, {'hits': 0, 'misses': 0})
+            stats['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: {**stats, 'hit_ratio': stats['hits'] / (stats['hits'] + stats['misses'])}
+                for view, stats in self._views.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+stats = CacheStats()
+
+
+def version_key(athlete_id):
+    return f"athlete:{athlete_id}:version"
+
+
+def athlete_version(athlete_id):
+    """
+    The athlete's current data version. A missing (or evicted) version is
+    re-seeded from the clock, so it can never fall back to an old value.
+    """
+    key = version_key(athlete_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_athlete_version(athlete_id):
+    try:
+        cache.incr(version_key(athlete_id))
+    except ValueError:
+        athlete_version(athlete_id)
+
+
+def invalidate_athlete(athlete_id):
+    """
+    Bumps the version once the current transaction commits, so a request
+    running meanwhile can't cache the old rows under the new version.
+    """
+    transaction.on_commit(lambda: bump_athlete_version(athlete_id))
+
+
+def response_key(view, athlete_id, params, ignore=('refresh',)):
+    query = sorted((name, value) for name, value in params.lists() if name not in ignore)
+    digest = hashlib.md5(repr(query).encode()).hexdigest()
+    return f"response:{view}:{athlete_id}:{athlete_version(athlete_id)}:{digest}"
+
+
+def cached_list_response(view, athlete_id, params, build):
+    """
+    Returns the rendered JSON for `build()`, from the cache when this
+    athlete's data hasn't changed since it was stored. `build` returns
+    (serializer data, extra response headers). Sets X-Cache: HIT / MISS.
+    """
+    key = response_key(view, athlete_id, params)
+    entry = cache.get(key)
+    hit = entry is not None
+    stats.record(view, hit)
+
+    if hit:
+        content, headers = entry
+    else:
+        data, headers = build()
+        content = JSONRenderer().render(data)
+        cache.set(key, (content, headers), timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+    response = HttpResponse(content, content_type='application/json')
+    for name, value in headers.items():
+        response[name] = value
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
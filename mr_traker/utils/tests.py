@@ -0,0 +1,276 @@
+import pstats
+import tempfile
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+import requests
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from django.utils import timezone
+
+from users.models import User, AthleteProfile, WhoopRateLimitBucket, WhoopSyncState
+from workouts.models import Workout
+from . import metrics
+from .whoop_backfill import BackfillProgress, backfill_resource, pending_athletes, run_backfill
+from .whoop_client import WhoopClient
+from .whoop_rate_limit import BACKGROUND, INTERACTIVE, RateLimiter, WhoopRateLimited, whoop_priority
+from .whoop_sync import RESOURCES, WhoopSyncError
+
+
+def http_response(status_code, headers=None, json=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response._content = b"{}" if json is None else json
+    return response
+
+
+class WhoopClientTests(SimpleTestCase):
+    def setUp(self):
+        self.client = WhoopClient(base_url="https://whoop.test", max_retries=3, backoff_base=1, backoff_max=8)
+        self.client.sleep = Mock()
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_retries_429_honoring_retry_after(self, mock_request):
+        mock_request.side_effect = [
+            http_response(429, {"Retry-After": "12"}),
+            http_response(200, json=b'{"records": []}'),
+        ]
+
+        data = self.client.get("/developer/v2/recovery", "token", endpoint="recovery")
+
+        self.assertEqual(data, {"records": []})
+        self.assertGreaterEqual(self.client.sleep.call_args.args[0], 12)
+        self.assertEqual(self.client.stats.snapshot()["recovery"]["statuses"], {429: 1, 200: 1})
+
+    @patch('utils.whoop_client.random.uniform', side_effect=lambda low, high: high)
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_backs_off_exponentially_then_gives_up(self, mock_request, _uniform):
+        mock_request.return_value = http_response(503)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.client.get("/developer/v2/recovery", "token")
+
+        self.assertEqual(mock_request.call_count, 4)
+        self.assertEqual([c.args[0] for c in self.client.sleep.call_args_list], [1, 2, 4])
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_token_grant_is_not_retried_on_server_error(self, mock_request):
+        mock_request.return_value = http_response(502)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.client.post_token({"grant_type": "refresh_token"})
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(mock_request.call_args.kwargs["timeout"], self.client.timeout)
+
+
+class RateLimiterTests(TestCase):
+    def setUp(self):
+        self.limiter = RateLimiter(limits={'minute': (10, 60), 'day': (1000, 86400)}, reserve=0.2, max_wait=5)
+        self.limiter.sleep = Mock()
+
+    def test_background_calls_leave_a_reserve_for_interactive_ones(self):
+        for _ in range(8):
+            self.assertEqual(self.limiter.try_acquire(BACKGROUND), 0)
+        self.assertGreater(self.limiter.try_acquire(BACKGROUND), 0)
+
+        self.assertEqual(self.limiter.try_acquire(INTERACTIVE), 0)
+        self.assertEqual(self.limiter.try_acquire(INTERACTIVE), 0)
+        self.assertGreater(self.limiter.try_acquire(INTERACTIVE), 0)
+        self.assertAlmostEqual(self.limiter.usage()['day']['used'], 10, places=0)
+
+    def test_interactive_call_gives_up_instead_of_waiting_long(self):
+        self.limiter.try_acquire(INTERACTIVE, tokens=10)
+
+        with self.assertRaises(WhoopRateLimited):
+            self.limiter.acquire(tokens=10)
+
+        # Background work just waits its turn
+        self.limiter.try_acquire = Mock(side_effect=[30.0, 0])
+        with whoop_priority(BACKGROUND):
+            self.assertEqual(self.limiter.acquire(), 30.0)
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_rate_limit_headers_are_honored(self, mock_request):
+        client = WhoopClient(base_url="https://whoop.test", max_retries=0, limiter=self.limiter)
+        mock_request.return_value = http_response(200, {
+            "X-RateLimit-Limit": "10, 10;window=60, 1000;window=86400",
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": "30",
+        })
+
+        client.get("/developer/v2/recovery", "token")
+
+        bucket = WhoopRateLimitBucket.objects.get(name='minute')
+        self.assertEqual(bucket.reported_remaining, 0)
+        self.assertEqual(bucket.tokens, 0)
+        self.assertAlmostEqual(self.limiter.try_acquire(INTERACTIVE), 30, delta=1)
+
+
+class BackfillTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="athlete", password="pw")
+        self.profile = AthleteProfile.objects.create(
+            user=user,
+            whoop_access_token="token",
+            whoop_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+
+    def workouts(self, first, count):
+        return [{
+            "id": f"w{n}",
+            "start": f"2024-01-{n:02d}T08:00:00.000Z",
+            "end": f"2024-01-{n:02d}T09:00:00.000Z",
+            "score": {"strain": 10.0},
+        } for n in range(first, first + count)]
+
+    @patch('utils.whoop_backfill.backfill_athlete')
+    def test_unexpected_error_fails_only_that_athlete(self, mock_backfill):
+        def backfill(athlete_id, resources, progress):
+            if athlete_id == 2:
+                raise KeyError('start')  # a malformed WHOOP record
+            return {'workout': 3}
+
+        mock_backfill.side_effect = backfill
+        reports = []
+
+        with self.assertLogs('utils.whoop_backfill', 'ERROR') as logs:
+            snapshot = run_backfill([1, 2, 3], ['workout'], workers=2,
+                                    report=lambda progress, finished: reports.extend(finished))
+
+        self.assertEqual((snapshot['done'], snapshot['failed']), (3, 1))
+        results = dict(reports)
+        self.assertEqual(results[1], {'workout': 3})
+        self.assertEqual(results[3], {'workout': 3})
+        self.assertIsInstance(results[2], KeyError)
+        self.assertIn("athlete 2", logs.output[0])
+
+    @patch('utils.whoop_backfill.fetch_page')
+    def test_resumes_from_checkpoint_after_a_crash(self, mock_fetch):
+        mock_fetch.side_effect = [
+            (self.workouts(20, 5), "page-2"),
+            WhoopSyncError("connection reset"),
+        ]
+        with self.assertRaises(WhoopSyncError):
+            backfill_resource(self.profile, RESOURCES['workout'])
+
+        state = WhoopSyncState.objects.get(athlete=self.profile, resource='workout')
+        self.assertEqual(state.backfill_cursor, "page-2")
+        self.assertEqual(state.backfill_records, 5)
+        self.assertEqual(pending_athletes(['workout']), [self.profile.pk])
+
+        mock_fetch.side_effect = [(self.workouts(15, 5), "page-3"), (self.workouts(10, 5), None)]
+        progress = BackfillProgress(1)
+        self.assertEqual(backfill_resource(self.profile, RESOURCES['workout'], progress), 10)
+
+        # Picked up at page 2, with the same fixed end as the first run
+        resumed_params = mock_fetch.call_args_list[2].args[2]
+        self.assertEqual(resumed_params['nextToken'], "page-2")
+        self.assertEqual(resumed_params['end'], mock_fetch.call_args_list[0].args[2]['end'])
+
+        state.refresh_from_db()
+        self.assertIsNotNone(state.backfill_completed_at)
+        self.assertEqual(state.backfill_records, 15)
+        self.assertEqual(state.watermark.isoformat(), "2024-01-24T08:00:00+00:00")
+        self.assertEqual(Workout.objects.count(), 15)
+        self.assertEqual(progress.snapshot()['records'], 10)
+        self.assertEqual(pending_athletes(['workout']), [])
+
+        # A finished backfill doesn't call WHOOP again
+        self.assertEqual(backfill_resource(self.profile, RESOURCES['workout']), 0)
+        self.assertEqual(mock_fetch.call_count, 4)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.athlete = User.objects.create_user(username="metrics-athlete", password="password")
+        self.profile = AthleteProfile.objects.create(user=self.athlete)
+
+    def test_histogram_renders_cumulative_buckets(self):
+        histogram = metrics.Histogram('test_seconds', "Test.", labels=('view',), buckets=(0.1, 1))
+        histogram.observe(0.05, view='a"b')
+        histogram.observe(0.5, view='a"b')
+        histogram.observe(5, view='a"b')
+
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{view="a\\"b",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{view="a\\"b",le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{view="a\\"b",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count{view="a\\"b"} 3', lines)
+        with self.assertRaises(ValueError):
+            histogram.observe(1, path="/")
+
+    def test_requests_are_timed_per_view_and_exposed(self):
+        WhoopSyncState.objects.create(
+            athlete=self.profile, resource='recovery',
+            watermark=timezone.now() - timedelta(hours=2), last_synced_at=timezone.now())
+        token = Token.objects.create(user=self.athlete)
+        self.client.get(reverse('recovery-list'), HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        self.assertEqual(metrics.request_latency.count(view='recovery-list', method='GET', status=200), 1)
+        self.assertGreater(metrics.request_queries.count(view='recovery-list'), 0)
+
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_request_duration_seconds_count{view="recovery-list",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_db_queries_count{view="recovery-list"} 1', body)
+        self.assertRegex(body, r'whoop_sync_lag_seconds\{athlete="%d",resource="recovery"\} 72\d\d' % self.profile.pk)
+
+    def test_metrics_are_not_public(self):
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.9')
+        self.assertEqual(response.status_code, 403)
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_whoop_calls_and_token_refreshes_are_counted(self, mock_request):
+        from .whoop_service import refresh_whoop_token
+
+        mock_request.return_value = http_response(
+            200, json=b'{"access_token": "new", "refresh_token": "next", "expires_in": 3600}')
+        self.profile.whoop_refresh_token = "old"
+        self.profile.save()
+
+        self.assertEqual(refresh_whoop_token(self.profile), "new")
+        self.assertEqual(metrics.whoop_token_refreshes.value(result='refreshed'), 1)
+        self.assertEqual(metrics.whoop_latency.count(endpoint='token', status=200), 1)
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", password="password", is_staff=True, is_superuser=True)
+        self.athlete = User.objects.create_user(username="profiled-athlete", password="password")
+        AthleteProfile.objects.create(user=self.athlete)
+
+    def get(self, user, **headers):
+        token, _ = Token.objects.get_or_create(user=user)
+        return self.client.get(reverse('recovery-list'), HTTP_AUTHORIZATION=f"Token {token.key}", **headers)
+
+    def test_staff_request_with_header_is_captured(self):
+        from users.models import ProfileCapture
+
+        AthleteProfile.objects.create(user=self.staff)
+        response = self.get(self.staff, HTTP_X_PROFILE="1")
+
+        capture = ProfileCapture.objects.get(pk=response['X-Profile-Capture'])
+        self.assertEqual((capture.user, capture.view, capture.status_code), (self.staff, 'recovery-list', 200))
+        self.assertEqual(capture.query_count, len(capture.report['queries']))
+        self.assertTrue(any(
+            (query['origin'] or '').startswith('utils/pagination.py') for query in capture.report['queries']))
+        self.assertTrue(capture.report['functions'])
+
+        self.client.force_login(self.staff)
+        download = self.client.get(reverse('admin:users_profilecapture_download', args=[capture.pk, 'prof']))
+        self.assertEqual(download.status_code, 200)
+        with tempfile.NamedTemporaryFile(suffix='.prof') as dump:
+            dump.write(b''.join(download))
+            dump.flush()
+            self.assertTrue(pstats.Stats(dump.name).total_calls)
+
+    def test_other_requests_are_not_profiled(self):
+        from users.models import ProfileCapture
+
+        self.assertNotIn('X-Profile-Capture', self.get(self.athlete, HTTP_X_PROFILE="1"))
+        self.assertNotIn('X-Profile-Capture', self.get(self.staff))
+        self.assertFalse(ProfileCapture.objects.exists())
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from .metrics import registry
+
+
+class MetricsView(View):
+    """
+    GET /metrics
+    This process's metrics in the Prometheus text format. Open to the
+    addresses in METRICS_ALLOWED_IPS (the scraper) and to staff.
+    """
+
+    def get(self, request):
+        allowed = request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+        if not (allowed or request.user.is_staff):
+            return HttpResponseForbidden()
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
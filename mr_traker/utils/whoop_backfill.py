@@ -0,0 +1,201 @@
+"""
+One-off walk through an athlete's full WHOOP history.
+
+The incremental sync only reads forward from the watermark, so records
+from before an athlete connected are never fetched. The backfill pages
+backwards through each resource up to a fixed `end` (so pages stay stable
+while new data arrives) and checkpoints WHOOP's next_token in
+WhoopSyncState after every page: a crashed or stopped run picks up at the
+page it was on. Athletes run concurrently in a bounded thread pool, at
+background priority so the app's own WHOOP calls go first.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from users.models import AthleteProfile, WhoopSyncState
+from .whoop_rate_limit import BACKGROUND, whoop_priority
+from .whoop_service import get_valid_access_token
+from .whoop_sync import PAGE_LIMIT, RESOURCES, WhoopSyncError, connected_athletes, fetch_page, whoop_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillProgress:
+    """
+    Thread-safe counters shared by the workers of one run.
+    """
+
+    def __init__(self, total_tasks):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.total_tasks = total_tasks
+        self.done_tasks = 0
+        self.failed_tasks = 0
+        self.pages = 0
+        self.records = 0
+
+    def page(self, records):
+        with self._lock:
+            self.pages += 1
+            self.records += records
+
+    def task_done(self, failed=False):
+        with self._lock:
+            self.done_tasks += 1
+            if failed:
+                self.failed_tasks += 1
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            remaining = self.total_tasks - self.done_tasks
+            per_task = elapsed / self.done_tasks if self.done_tasks else None
+            return {
+                'elapsed': elapsed,
+                'records': self.records,
+                'pages': self.pages,
+                'records_per_second': self.records / elapsed if elapsed else 0.0,
+                'done': self.done_tasks,
+                'failed': self.failed_tasks,
+                'remaining': remaining,
+                'eta_seconds': per_task * remaining if per_task is not None else None,
+            }
+
+
+def backfill_resource(profile, resource, progress=None):
+    """
+    Walks `resource` for one athlete from the checkpoint (or the newest
+    page) to the oldest record. Returns the records written by this call.
+    """
+    state, _ = WhoopSyncState.objects.get_or_create(athlete=profile, resource=resource.name)
+    if state.backfill_completed_at:
+        return 0
+    if not state.backfill_started_at:
+        state.backfill_started_at = timezone.now()
+        state.backfill_until = state.backfill_started_at
+        state.save(update_fields=['backfill_started_at', 'backfill_until'])
+
+    params = {'limit': PAGE_LIMIT, 'end': whoop_datetime(state.backfill_until)}
+    written = 0
+    while True:
+        # Long walks outlive an access token; this refreshes when needed
+        access_token = get_valid_access_token(profile)
+        if not access_token:
+            raise WhoopSyncError("WHOOP not connected or token expired.")
+
+        page_params = {**params, 'nextToken': state.backfill_cursor} if state.backfill_cursor else params
+        try:
+            records, next_token = fetch_page(access_token, resource.path, page_params)
+        except requests.exceptions.RequestException as e:
+            raise WhoopSyncError(f"Failed to fetch {resource.name} from WHOOP: {e}") from e
+
+        count = resource.ingester.ingest(profile, records) if records else 0
+        written += count
+        if progress:
+            progress.page(count)
+
+        # Records before the incremental sync's first run would otherwise
+        # make it re-read everything; start it from the newest one we saw.
+        if state.watermark is None and records:
+            state.watermark = max(parse_datetime(item[resource.watermark_field]) for item in records)
+
+        state.backfill_cursor = next_token
+        state.backfill_records += count
+        if not next_token:
+            state.backfill_completed_at = timezone.now()
+        state.save(update_fields=[
+            'watermark', 'backfill_cursor', 'backfill_records', 'backfill_completed_at'])
+        if not next_token:
+            return written
+
+
+def backfill_athlete(profile_id, resources, progress=None):
+    """
+    Backfills the given resources for one athlete; runs on a pool thread.
+    Returns {resource name: records written}.
+    """
+    results = {}
+    try:
+        with whoop_priority(BACKGROUND):
+            profile = AthleteProfile.objects.select_related('user').get(pk=profile_id)
+            for name in resources:
+                results[name] = backfill_resource(profile, RESOURCES[name], progress)
+    finally:
+        # Pool threads get their own DB connection; don't leak it.
+        connection.close()
+    return results
+
+
+def pending_athletes(resources, athlete_ids=None):
+    """
+    Ids of connected athletes with at least one resource still to backfill.
+    """
+    athletes = connected_athletes()
+    if athlete_ids:
+        athletes = athletes.filter(pk__in=athlete_ids)
+    complete = (
+        WhoopSyncState.objects
+        .filter(resource__in=resources, backfill_completed_at__isnull=False)
+        .values('athlete')
+        .annotate(done=Count('pk'))
+        .filter(done=len(resources))
+        .values('athlete')
+    )
+    return list(athletes.exclude(pk__in=complete).order_by('pk').values_list('pk', flat=True))
+
+
+def reset_backfill(athlete_ids, resources):
+    """
+    Forgets checkpoints so the next run walks the history again.
+    """
+    states = WhoopSyncState.objects.filter(resource__in=resources)
+    if athlete_ids:
+        states = states.filter(athlete_id__in=athlete_ids)
+    return states.update(
+        backfill_cursor=None, backfill_until=None, backfill_records=0,
+        backfill_started_at=None, backfill_completed_at=None,
+    )
+
+
+def run_backfill(athlete_ids, resources, workers=4, report=None, report_every=10):
+    """
+    Backfills athletes concurrently, at most `workers` at a time.
+    `report(progress_snapshot, finished)` is called every `report_every`
+    seconds and as each athlete finishes; `finished` is a list of
+    (athlete id, results or the error). Returns the final snapshot.
+    """
+    progress = BackfillProgress(len(athlete_ids))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='whoop-backfill') as pool:
+        pending = {
+            pool.submit(backfill_athlete, athlete_id, resources, progress): athlete_id
+            for athlete_id in athlete_ids
+        }
+        while pending:
+            done, _ = wait(pending, timeout=report_every, return_when=FIRST_COMPLETED)
+            finished = []
+            for future in done:
+                athlete_id = pending.pop(future)
+                try:
+                    finished.append((athlete_id, future.result()))
+                    progress.task_done()
+                except (AthleteProfile.DoesNotExist, WhoopSyncError) as e:
+                    logger.warning("WHOOP backfill failed for athlete %s: %s", athlete_id, e)
+                    finished.append((athlete_id, e))
+                    progress.task_done(failed=True)
+                except Exception as e:
+                    # One athlete's bad record must not stop everyone else;
+                    # their checkpoint lets the next run retry from that page.
+                    logger.exception("WHOOP backfill crashed for athlete %s", athlete_id)
+                    finished.append((athlete_id, e))
+                    progress.task_done(failed=True)
+            if report:
+                report(progress.snapshot(), finished)
+    return progress.snapshot()
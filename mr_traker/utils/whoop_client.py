@@ -0,0 +1,194 @@
+"""
+The one HTTP client for every call we make to WHOOP.
+
+Keeps a pooled keep-alive session, applies timeouts, retries 429/5xx with
+exponential backoff and jitter (honoring Retry-After), and records
+per-endpoint latency so we can see what WHOOP is costing us. API calls
+wait for the shared rate limiter (utils/whoop_rate_limit.py) first.
+"""
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .whoop_rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class CallStats:
+    """
+    Thread-safe per-endpoint counters: calls, statuses and latency.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, status, seconds):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                'calls': 0,
+                'total_seconds': 0.0,
+                'max_seconds': 0.0,
+                'statuses': {},
+            })
+            stats['calls'] += 1
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    **stats,
+                    'statuses': dict(stats['statuses']),
+                    'avg_seconds': stats['total_seconds'] / stats['calls'],
+                }
+                for endpoint, stats in self._endpoints.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+class WhoopClient:
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    TOKEN_PATH = "/oauth/oauth2/token"
+
+    def __init__(self, base_url=None, timeout=None, max_retries=None,
+                 backoff_base=None, backoff_max=None, pool_size=None, limiter=None):
+        self.base_url = (base_url or settings.WHOOP_API_BASE_URL).rstrip('/')
+        self.timeout = timeout or settings.WHOOP_HTTP_TIMEOUT
+        self.max_retries = settings.WHOOP_HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or settings.WHOOP_HTTP_BACKOFF_BASE
+        self.backoff_max = backoff_max or settings.WHOOP_HTTP_BACKOFF_MAX
+        self.stats = CallStats()
+        self.sleep = time.sleep
+        self.limiter = limiter
+
+        pool_size = pool_size or settings.WHOOP_HTTP_POOL_SIZE
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def backoff(self, attempt, response=None):
+        """
+        Seconds to wait before retry number `attempt` (0-based): full-jitter
+        exponential backoff, but never less than WHOOP's Retry-After.
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def record(self, endpoint, status, seconds):
+        self.stats.record(endpoint, status, seconds)
+        metrics.whoop_latency.observe(seconds, endpoint=endpoint, status=status)
+        if status in self.RETRY_STATUSES or isinstance(status, str):
+            logger.warning("whoop_call endpoint=%s status=%s duration_ms=%.1f", endpoint, status, seconds * 1000)
+
+    def request(self, method, path, endpoint=None, idempotent=True, rate_limited=True, **kwargs):
+        """
+        Sends a request and returns the response, raising
+        `requests.exceptions.RequestException` once retries are exhausted.
+
+        Non-idempotent calls (token grants rotate the refresh token) are only
+        retried when WHOOP can't have acted on them: 429s and connect timeouts.
+        """
+        url = path if path.startswith('http') else f"{self.base_url}{path}"
+        endpoint = endpoint or path
+        kwargs.setdefault('timeout', self.timeout)
+
+        attempt = 0
+        while True:
+            if self.limiter and rate_limited:
+                self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self.record(endpoint, type(e).__name__, time.perf_counter() - started)
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                self.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+
+            self.record(endpoint, response.status_code, time.perf_counter() - started)
+            if self.limiter and rate_limited:
+                self.limiter.observe(response, parse_retry_after(response.headers.get('Retry-After')))
+            retryable = idempotent or response.status_code == 429
+            if (response.status_code in self.RETRY_STATUSES and retryable
+                    and attempt < self.max_retries):
+                self.sleep(self.backoff(attempt, response))
+                attempt += 1
+                continue
+
+            response.raise_for_status()
+            return response
+
+    def get(self, path, access_token, params=None, endpoint=None, rate_limited=True):
+        """
+        GETs a WHOOP API resource and returns the decoded JSON.
+        `rate_limited=False` is for callers that already took their tokens.
+        """
+        headers = {"Authorization": f"Bearer {access_token}"}
+        response = self.request(
+            'GET', path, endpoint=endpoint, rate_limited=rate_limited, headers=headers, params=params)
+        return response.json()
+
+    def post_token(self, payload):
+        """
+        POSTs an OAuth grant to the token endpoint and returns the decoded JSON.
+        Token grants don't count against the API quota, so they skip the
+        rate limiter (they also run inside the refresh transaction).
+        """
+        response = self.request(
+            'POST', self.TOKEN_PATH, endpoint='token', idempotent=False, rate_limited=False, data=payload)
+        return response.json()
+
+
+def parse_retry_after(value):
+    """
+    Retry-After is either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - timezone.now()).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    The process-wide client, so every caller shares one connection pool.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                limiter = RateLimiter() if settings.WHOOP_RATE_LIMIT_ENABLED else None
+                _client = WhoopClient(limiter=limiter)
+    return _client
@@ -0,0 +1,209 @@
+"""
+Maps pages of WHOOP records to model instances and writes them in bulk.
+
+Each page is written with a single INSERT ... ON CONFLICT DO UPDATE inside
+one transaction, instead of a SELECT + INSERT/UPDATE per record.
+
+After each page, `records_ingested` is sent inside the same transaction so
+derived data (rollups, baselines, ...) is updated together with the rows.
+"""
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils.dateparse import parse_datetime
+
+from cycles.models import Cycle
+from recovery.models import Recovery
+from sleep.models import Sleep
+from workouts.models import Workout
+
+
+def recovery_from_record(profile, item):
+    score = item.get('score') or {}
+    return Recovery(
+        athlete=profile,
+        # WHOOP V2 Recovery uses cycle_id as unique identifier
+        cycle_id=item['cycle_id'],
+        sleep_id=item.get('sleep_id'),
+        score_state=item.get('score_state'),
+        # Score fields
+        user_calibrating=score.get('user_calibrating', False),
+        recovery_score=score.get('recovery_score'),
+        resting_heart_rate=score.get('resting_heart_rate'),
+        hrv_rmssd_milli=score.get('hrv_rmssd_milli'),
+        spo2_percentage=score.get('spo2_percentage'),
+        skin_temp_celsius=score.get('skin_temp_celsius'),
+        created_at=parse_datetime(item['created_at']),
+        updated_at=parse_datetime(item['updated_at']),
+    )
+
+
+def workout_from_record(profile, item):
+    score = item.get('score') or {}
+    return Workout(
+        athlete=profile,
+        whoop_id=item['id'],
+        start=parse_datetime(item['start']),
+        end=parse_datetime(item['end']),
+        timezone_offset=item.get('timezone_offset'),
+        sport_id=item.get('sport_id'),
+        score_state=item.get('score_state'),
+        # Score fields
+        strain=score.get('strain'),
+        average_heart_rate=score.get('average_heart_rate'),
+        max_heart_rate=score.get('max_heart_rate'),
+        kilojoule=score.get('kilojoule'),
+        percent_recorded=score.get('percent_recorded'),
+        distance_meter=score.get('distance_meter'),
+        altitude_gain_meter=score.get('altitude_gain_meter'),
+        altitude_change_meter=score.get('altitude_change_meter'),
+    )
+
+
+def cycle_from_record(profile, item):
+    score = item.get('score') or {}
+    end = item.get('end')
+    return Cycle(
+        athlete=profile,
+        whoop_id=item['id'],
+        start=parse_datetime(item['start']),
+        end=parse_datetime(end) if end else None,
+        timezone_offset=item.get('timezone_offset'),
+        score_state=item.get('score_state'),
+        # Score fields
+        strain=score.get('strain'),
+        kilojoule=score.get('kilojoule'),
+        average_heart_rate=score.get('average_heart_rate'),
+        max_heart_rate=score.get('max_heart_rate'),
+        created_at=parse_datetime(item['created_at']),
+        updated_at=parse_datetime(item['updated_at']),
+    )
+
+
+def sleep_from_record(profile, item):
+    score = item.get('score') or {}
+    stages = score.get('stage_summary') or {}
+    return Sleep(
+        athlete=profile,
+        whoop_id=item['id'],
+        cycle_id=item.get('cycle_id'),
+        start=parse_datetime(item['start']),
+        end=parse_datetime(item['end']),
+        timezone_offset=item.get('timezone_offset'),
+        nap=item.get('nap', False),
+        score_state=item.get('score_state'),
+        # Stage summary
+        total_in_bed_time_milli=stages.get('total_in_bed_time_milli'),
+        total_awake_time_milli=stages.get('total_awake_time_milli'),
+        total_light_sleep_time_milli=stages.get('total_light_sleep_time_milli'),
+        total_slow_wave_sleep_time_milli=stages.get('total_slow_wave_sleep_time_milli'),
+        total_rem_sleep_time_milli=stages.get('total_rem_sleep_time_milli'),
+        sleep_cycle_count=stages.get('sleep_cycle_count'),
+        disturbance_count=stages.get('disturbance_count'),
+        # Score fields
+        respiratory_rate=score.get('respiratory_rate'),
+        sleep_performance_percentage=score.get('sleep_performance_percentage'),
+        sleep_consistency_percentage=score.get('sleep_consistency_percentage'),
+        sleep_efficiency_percentage=score.get('sleep_efficiency_percentage'),
+        created_at=parse_datetime(item['created_at']),
+        updated_at=parse_datetime(item['updated_at']),
+    )
+
+
+# Sent after a page is upserted.
+# Arguments: sender (the model), athlete, instances (the upserted rows),
+# previous (the rows they replaced, with only the ingester's
+# `track_fields` loaded; empty if it tracks none).
+records_ingested = Signal()
+
+# Sent after rows are deleted because WHOOP deleted the records.
+# Arguments: sender (the model), athlete, instances (the deleted rows).
+records_deleted = Signal()
+
+
+class Ingester:
+    """
+    Bulk upsert of one WHOOP resource into its model.
+
+    `unique_field` is the WHOOP identifier the conflict is resolved on.
+    Every other concrete field is overwritten on conflict, except those
+    listed in `preserve_fields`. The old values of `track_fields` are
+    read before the upsert and sent along, for receivers that need to know
+    what a record was (e.g. the day it used to fall on).
+    """
+
+    def __init__(self, model, unique_field, from_record, preserve_fields=(), track_fields=()):
+        self.model = model
+        self.unique_field = unique_field
+        self.from_record = from_record
+        self.track_fields = track_fields
+        self.update_fields = [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key
+            and field.name != unique_field
+            and field.name not in preserve_fields
+        ]
+
+    def build(self, profile, records):
+        # A page may repeat a record; ON CONFLICT can't touch a row twice.
+        instances = {}
+        for item in records:
+            instance = self.from_record(profile, item)
+            instances[getattr(instance, self.unique_field)] = instance
+        return list(instances.values())
+
+    def ingest(self, profile, records):
+        """
+        Upserts a page of raw WHOOP records. Returns the number written.
+        """
+        instances = self.build(profile, records)
+        if not instances:
+            return 0
+
+        with transaction.atomic():
+            previous = self.previous(instances)
+            self.model.objects.bulk_create(
+                instances,
+                update_conflicts=True,
+                unique_fields=[self.unique_field],
+                update_fields=self.update_fields,
+            )
+            records_ingested.send(sender=self.model, athlete=profile, instances=instances, previous=previous)
+        return len(instances)
+
+    def previous(self, instances):
+        """
+        The stored rows `instances` are about to overwrite, `track_fields` only.
+        """
+        if not self.track_fields:
+            return []
+        keys = [getattr(instance, self.unique_field) for instance in instances]
+        return list(
+            self.model.objects
+            .filter(**{f'{self.unique_field}__in': keys})
+            .only(self.unique_field, *self.track_fields)
+        )
+
+
+# The rollups bucket recoveries by created_at and workouts by start.
+recovery_ingester = Ingester(Recovery, 'cycle_id', recovery_from_record, track_fields=('created_at',))
+# Workout.created_at is our own insert time, keep it on updates.
+workout_ingester = Ingester(
+    Workout, 'whoop_id', workout_from_record, preserve_fields=('created_at',), track_fields=('start',))
+cycle_ingester = Ingester(Cycle, 'whoop_id', cycle_from_record)
+sleep_ingester = Ingester(Sleep, 'whoop_id', sleep_from_record)
+
+
+def ingest_recoveries(profile, records):
+    return recovery_ingester.ingest(profile, records)
+
+
+def ingest_workouts(profile, records):
+    return workout_ingester.ingest(profile, records)
+
+
+def ingest_cycles(profile, records):
+    return cycle_ingester.ingest(profile, records)
+
+
+def ingest_sleeps(profile, records):
+    return sleep_ingester.ingest(profile, records)
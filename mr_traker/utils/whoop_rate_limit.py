@@ -0,0 +1,204 @@
+"""
+Rate-limit-aware scheduling of WHOOP API calls.
+
+All athletes share one client id and so one WHOOP quota. Every call the
+WhoopClient makes first takes a token from each bucket in
+WhoopRateLimitBucket (one per WHOOP window, refilled continuously); the
+rows are shared by every process and locked while tokens are taken.
+
+Calls are either INTERACTIVE (someone is waiting on them: API requests,
+?refresh=1, webhooks) or BACKGROUND (scheduled sync, backfill). Background
+calls leave a reserve of each bucket untouched, so a backfill can never
+starve the app. Background is set with `whoop_priority(BACKGROUND)`.
+
+WHOOP's X-RateLimit-* headers and 429s are folded back into the buckets,
+so we also back off when our picture of the quota is out of date.
+"""
+import contextlib
+import contextvars
+import re
+import time
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import WhoopRateLimitBucket
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+_priority = contextvars.ContextVar('whoop_priority', default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def whoop_priority(priority):
+    """
+    Runs the block's WHOOP calls with the given priority.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+class WhoopRateLimited(requests.exceptions.RequestException):
+    """Raised when a call would have to wait longer than it is allowed to."""
+
+    def __init__(self, wait):
+        super().__init__(f"WHOOP rate limit reached; next slot in {wait:.1f}s.")
+        self.wait = wait
+
+
+def refill(bucket, now):
+    elapsed = max(0.0, (now - bucket.refilled_at).total_seconds())
+    bucket.tokens = min(bucket.capacity, bucket.tokens + elapsed * bucket.refill_per_second)
+    bucket.refilled_at = now
+
+
+def parse_windows(limit_header):
+    """
+    Window lengths (seconds) from "100, 100;window=60, 10000;window=86400".
+    """
+    return [int(window) for window in re.findall(r'window=(\d+)', limit_header or '')]
+
+
+class RateLimiter:
+    def __init__(self, limits=None, reserve=None, max_wait=None):
+        self.limits = limits or settings.WHOOP_RATE_LIMITS
+        self.reserve = settings.WHOOP_RATE_LIMIT_RESERVE if reserve is None else reserve
+        self.max_wait = settings.WHOOP_RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+        self.sleep = time.sleep
+
+    def buckets(self, lock=False):
+        """
+        The bucket rows, created at full capacity the first time.
+        """
+        queryset = WhoopRateLimitBucket.objects.filter(name__in=self.limits)
+        if lock:
+            queryset = queryset.select_for_update()
+        buckets = list(queryset)
+        if len(buckets) < len(self.limits):
+            now = timezone.now()
+            WhoopRateLimitBucket.objects.bulk_create([
+                WhoopRateLimitBucket(
+                    name=name, capacity=capacity, refill_per_second=capacity / window,
+                    tokens=capacity, refilled_at=now,
+                )
+                for name, (capacity, window) in self.limits.items()
+            ], ignore_conflicts=True)
+            buckets = list(queryset.all())
+        return buckets
+
+    def try_acquire(self, priority, tokens=1):
+        """
+        Takes `tokens` from every bucket if all have them to spare for this
+        priority. Returns 0, or the seconds to wait before trying again.
+        """
+        with transaction.atomic():
+            now = timezone.now()
+            buckets = self.buckets(lock=True)
+            waits = []
+            for bucket in buckets:
+                refill(bucket, now)
+                if bucket.blocked_until and bucket.blocked_until > now:
+                    waits.append((bucket.blocked_until - now).total_seconds())
+                    continue
+                reserve = 0 if priority == INTERACTIVE else bucket.capacity * self.reserve
+                if bucket.tokens - tokens < reserve:
+                    waits.append((reserve + tokens - bucket.tokens) / bucket.refill_per_second)
+
+            if not waits:
+                for bucket in buckets:
+                    bucket.tokens -= tokens
+            for bucket in buckets:
+                bucket.save(update_fields=['tokens', 'refilled_at'])
+        return max(waits, default=0)
+
+    def acquire(self, priority=None, tokens=1):
+        """
+        Blocks until `tokens` calls may be made. Interactive calls give up
+        with WhoopRateLimited after `max_wait` seconds; background calls wait.
+        Returns the seconds waited.
+        """
+        priority = priority or current_priority()
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(priority, tokens)
+            if not wait:
+                return waited
+            if priority == INTERACTIVE and waited + wait > self.max_wait:
+                raise WhoopRateLimited(wait)
+            self.sleep(wait)
+            waited += wait
+
+    def observe(self, response, retry_after=None):
+        """
+        Folds WHOOP's view of the quota into the buckets: X-RateLimit-Remaining
+        caps the matching bucket, and a spent window (Remaining: 0 or a 429)
+        blocks it until X-RateLimit-Reset / Retry-After.
+        """
+        headers = response.headers
+        try:
+            remaining = int(headers.get('X-RateLimit-Remaining'))
+        except (TypeError, ValueError):
+            remaining = None
+        try:
+            reset = float(headers.get('X-RateLimit-Reset'))
+        except (TypeError, ValueError):
+            reset = retry_after
+        limit_header = headers.get('X-RateLimit-Limit')
+        if remaining is None and response.status_code != 429:
+            return
+
+        # Remaining/Reset describe the first (tightest) window WHOOP lists
+        windows = parse_windows(limit_header if isinstance(limit_header, str) else None)
+        name = self.bucket_for_window(windows[0]) if windows else None
+        name = name or min(self.limits, key=lambda key: self.limits[key][1])
+
+        now = timezone.now()
+        updates = {}
+        if remaining is not None:
+            updates['reported_remaining'] = remaining
+        if reset is not None:
+            updates['reported_reset_at'] = now + timedelta(seconds=reset)
+        if (remaining == 0 or response.status_code == 429) and reset is not None:
+            updates['blocked_until'] = now + timedelta(seconds=reset)
+
+        self.buckets()
+        if updates:
+            WhoopRateLimitBucket.objects.filter(name=name).update(**updates)
+        if remaining is not None:
+            WhoopRateLimitBucket.objects.filter(name=name, tokens__gt=remaining).update(tokens=remaining, refilled_at=now)
+
+    def bucket_for_window(self, window):
+        for name, (_, seconds) in self.limits.items():
+            if seconds == window:
+                return name
+        return None
+
+    def usage(self):
+        """
+        Current budget per bucket, refilled to now (nothing is written).
+        """
+        now = timezone.now()
+        usage = {}
+        for bucket in self.buckets():
+            refill(bucket, now)
+            usage[bucket.name] = {
+                'capacity': bucket.capacity,
+                'available': round(bucket.tokens, 2),
+                'used': round(bucket.capacity - bucket.tokens, 2),
+                'background_reserve': bucket.capacity * self.reserve,
+                'blocked_until': bucket.blocked_until if bucket.blocked_until and bucket.blocked_until > now else None,
+                'reported_remaining': bucket.reported_remaining,
+                'reported_reset_at': bucket.reported_reset_at,
+            }
+        return usage
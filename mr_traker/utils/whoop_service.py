@@ -1,16 +1,44 @@
+import logging
+import threading
+
 import requests
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings  # Assuming you store client ID/Secret here
 
+from users.models import AthleteProfile
+from . import metrics
+from .whoop_client import get_client
+
+logger = logging.getLogger(__name__)
+
 # Configuration (Add these to your settings.py)
 WHOOP_CLIENT_ID = getattr(settings, 'WHOOP_CLIENT_ID', 'your_client_id')
 WHOOP_CLIENT_SECRET = getattr(
     settings, 'WHOOP_CLIENT_SECRET', 'your_client_secret')
-WHOOP_TOKEN_URL = "https://api.prod.whoop.com/oauth/oauth2/token"
 WHOOP_REDIRECT_URI = getattr(settings, 'WHOOP_REDIRECT_URI', 'http://127.0.0.1:8000/api/users/whoop/callback/')
 
 
+# Refresh a little before WHOOP says the token expires.
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# One lock per athlete so concurrent requests in this process wait for a
+# single refresh instead of each spending (and rotating) the refresh token.
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
+
+def _refresh_lock(athlete_id):
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(athlete_id, threading.Lock())
+
+
+def token_needs_refresh(athlete_profile, margin=TOKEN_REFRESH_MARGIN):
+    expires_at = athlete_profile.whoop_token_expires_at
+    return bool(expires_at) and timezone.now() >= expires_at - margin
+
+
 def get_valid_access_token(athlete_profile):
     """
     Returns a valid access token. 
@@ -22,20 +50,38 @@ def get_valid_access_token(athlete_profile):
         return None  # User hasn't connected WHOOP yet
 
     # 2. Check if expired (we add a 5-minute buffer to be safe)
-    now = timezone.now()
-    if athlete_profile.whoop_token_expires_at and now >= (athlete_profile.whoop_token_expires_at - timedelta(minutes=5)):
-        print(f"Token expired for {athlete_profile.user.username}. Refreshing...")
+    if token_needs_refresh(athlete_profile):
+        logger.info("whoop_token_refresh athlete=%s reason=expired", athlete_profile.pk)
         return refresh_whoop_token(athlete_profile)
 
     # 3. Token is still good
     return athlete_profile.whoop_access_token
 
 
-def refresh_whoop_token(athlete_profile):
+def refresh_whoop_token(athlete_profile, margin=TOKEN_REFRESH_MARGIN):
     """
     Hits the WHOOP API with the Refresh Token to get a fresh Access Token.
     Updates the database automatically.
+
+    WHOOP rotates the refresh token on every use, so only one caller may
+    refresh at a time: an in-process lock plus a row lock on the profile.
+    Whoever gets the lock second sees the new token and skips the call.
     """
+    with _refresh_lock(athlete_profile.pk):
+        with transaction.atomic():
+            locked = AthleteProfile.objects.select_for_update().get(pk=athlete_profile.pk)
+            if locked.whoop_access_token and not token_needs_refresh(locked, margin):
+                access_token = locked.whoop_access_token
+            else:
+                access_token = _request_token_refresh(locked)
+
+    # Hand the fresh tokens back to the caller's instance.
+    for field in ('whoop_user_id', 'whoop_access_token', 'whoop_refresh_token', 'whoop_token_expires_at'):
+        setattr(athlete_profile, field, getattr(locked, field))
+    return access_token
+
+
+def _request_token_refresh(athlete_profile):
     payload = {
         'grant_type': 'refresh_token',
         'refresh_token': athlete_profile.whoop_refresh_token,
@@ -45,10 +91,7 @@ def refresh_whoop_token(athlete_profile):
     }
 
     try:
-        response = requests.post(WHOOP_TOKEN_URL, data=payload)
-        response.raise_for_status()  # Raise error if request fails
-
-        data = response.json()
+        data = get_client().post_token(payload)
 
         # UPDATE THE DB
         athlete_profile.whoop_access_token = data['access_token']
@@ -66,16 +109,43 @@ def refresh_whoop_token(athlete_profile):
 
         athlete_profile.save()
 
+        metrics.whoop_token_refreshes.inc(result='refreshed')
         return athlete_profile.whoop_access_token
 
     except requests.exceptions.RequestException as e:
-        print(f"DEBUG: Failed to refresh token: {e}")
-        if 'response' in locals():
-             print(f"DEBUG: Refresh Error Content: {response.content}")
+        metrics.whoop_token_refreshes.inc(result='failed')
+        logger.warning(
+            "whoop_token_refresh_failed athlete=%s status=%s error=%r body=%r",
+            athlete_profile.pk, getattr(e.response, 'status_code', None), str(e),
+            e.response.content[:500] if e.response is not None else None,
+        )
         # Logic to handle disconnection (maybe send email to user to re-login)
         return None
 
 
+def refresh_expiring_tokens(within):
+    """
+    Refreshes every token that expires within `within` (a timedelta), so
+    request paths find a valid token instead of paying for the refresh.
+    Meant to run on a schedule shorter than `within`.
+    """
+    cutoff = timezone.now() + within
+    expiring = (
+        AthleteProfile.objects
+        .filter(whoop_token_expires_at__lte=cutoff)
+        .exclude(whoop_refresh_token__isnull=True)
+        .exclude(whoop_refresh_token='')
+    )
+
+    summary = {'refreshed': 0, 'failed': 0}
+    for athlete_profile in expiring.iterator():
+        if refresh_whoop_token(athlete_profile, margin=within):
+            summary['refreshed'] += 1
+        else:
+            summary['failed'] += 1
+    return summary
+
+
 def exchange_oauth_code(code):
     """
     Exchanges the temporary authorization code for an access token and refresh token.
@@ -90,11 +160,26 @@ def exchange_oauth_code(code):
     }
 
     try:
-        response = requests.post(WHOOP_TOKEN_URL, data=payload)
-        response.raise_for_status()
-        return response.json()
+        return get_client().post_token(payload)
     except requests.exceptions.RequestException as e:
-        print(f"Failed to exchange code: {e}")
-        if response is not None:
-             print(f"Response content: {response.content}")
+        logger.warning(
+            "whoop_code_exchange_failed status=%s error=%r body=%r",
+            getattr(e.response, 'status_code', None), str(e),
+            e.response.content[:500] if e.response is not None else None,
+        )
+        return None
+
+
+PROFILE_PATH = "/developer/v2/user/profile/basic"
+
+
+def fetch_whoop_user_id(access_token):
+    """
+    The WHOOP user id behind an access token (the token response doesn't
+    carry it). Returns None if it can't be fetched.
+    """
+    try:
+        user_id = get_client().get(PROFILE_PATH, access_token, endpoint='profile').get('user_id')
+    except (requests.exceptions.RequestException, ValueError, AttributeError):
         return None
+    return str(user_id) if user_id is not None else None
@@ -0,0 +1,50 @@
+"""
+Live snapshot of an athlete's WHOOP data, fetched concurrently.
+
+Each collection is fetched on its own worker thread through the shared
+pooled client, so the snapshot costs about as much as the slowest call.
+The rate-limit tokens for all sections are taken up front, in one go.
+"""
+import asyncio
+
+import requests
+from asgiref.sync import sync_to_async
+
+from .whoop_client import get_client
+from .whoop_rate_limit import WhoopRateLimited
+from .whoop_sync import CYCLE_PATH, RECOVERY_PATH, SLEEP_PATH, WORKOUT_PATH, fetch_page
+
+SNAPSHOT_PATHS = {
+    'recovery': RECOVERY_PATH,
+    'workouts': WORKOUT_PATH,
+    'sleep': SLEEP_PATH,
+    'cycles': CYCLE_PATH,
+}
+
+
+async def fetch_section(access_token, name, path, limit):
+    try:
+        records, _ = await asyncio.to_thread(fetch_page, access_token, path, {'limit': limit}, rate_limited=False)
+    # ValueError: a body that isn't JSON (truncated, an HTML error page, ...)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return name, {'error': f"Failed to fetch {name} from WHOOP: {e}"}
+    return name, {'records': records}
+
+
+async def fetch_snapshot(access_token, limit):
+    """
+    Returns {section: {'records': [...]}} for every collection in
+    SNAPSHOT_PATHS; a section that failed has {'error': ...} instead.
+    """
+    limiter = get_client().limiter
+    if limiter:
+        try:
+            await sync_to_async(limiter.acquire)(tokens=len(SNAPSHOT_PATHS))
+        except WhoopRateLimited as e:
+            return {name: {'error': str(e)} for name in SNAPSHOT_PATHS}
+
+    sections = await asyncio.gather(*(
+        fetch_section(access_token, name, path, limit)
+        for name, path in SNAPSHOT_PATHS.items()
+    ))
+    return dict(sections)
@@ -0,0 +1,212 @@
+"""
+Background sync of WHOOP data into the local database.
+
+The list endpoints only ever read from the local tables; this
+module is the one place that pulls WHOOP collections and stores them.
+It is driven by the `whoop_sync` management command and by `?refresh=1`
+on the list endpoints (which runs it in a background thread).
+"""
+import logging
+import threading
+from datetime import timedelta, timezone as dt_timezone
+
+import requests
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from users.models import AthleteProfile, WhoopSyncState
+from .whoop_client import get_client
+from .whoop_ingest import cycle_ingester, recovery_ingester, sleep_ingester, workout_ingester
+from .whoop_service import get_valid_access_token
+
+logger = logging.getLogger(__name__)
+
+RECOVERY_PATH = "/developer/v2/recovery"
+WORKOUT_PATH = "/developer/v2/activity/workout"
+SLEEP_PATH = "/developer/v2/activity/sleep"
+CYCLE_PATH = "/developer/v2/cycle"
+PAGE_LIMIT = 25  # WHOOP's maximum page size
+
+# Records can be re-scored after we first see them, so each incremental
+# sync re-reads a little before the watermark. Upserts make this harmless.
+WATERMARK_OVERLAP = timedelta(days=1)
+
+
+class WhoopSyncError(Exception):
+    """Raised when WHOOP data could not be synced for an athlete."""
+
+
+class Resource:
+    """
+    A WHOOP collection we mirror locally.
+    `watermark_field` is the record timestamp tracked in WhoopSyncState.
+    """
+
+    def __init__(self, name, path, ingester, watermark_field):
+        self.name = name
+        self.path = path
+        self.ingester = ingester
+        self.watermark_field = watermark_field
+
+
+RESOURCES = {
+    resource.name: resource for resource in (
+        Resource('recovery', RECOVERY_PATH, recovery_ingester, 'updated_at'),
+        Resource('workout', WORKOUT_PATH, workout_ingester, 'start'),
+        # The ongoing cycle keeps changing until it ends; the watermark
+        # overlap re-reads it on every sync.
+        Resource('cycle', CYCLE_PATH, cycle_ingester, 'start'),
+        Resource('sleep', SLEEP_PATH, sleep_ingester, 'start'),
+    )
+}
+
+
+def whoop_datetime(value):
+    """
+    Formats a datetime the way WHOOP's `start`/`end` params expect it.
+    """
+    return value.astimezone(dt_timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+def fetch_page(access_token, path, params, rate_limited=True):
+    """
+    Fetches one page of a WHOOP collection.
+    Returns (records, next_token); next_token is None on the last page.
+    """
+    # V2 returns a paginated response wrapper { "records": [...], "next_token": ... }
+    data = get_client().get(path, access_token, params=params, rate_limited=rate_limited)
+    return data.get('records', []), data.get('next_token')
+
+
+def iter_pages(access_token, path, start=None, end=None):
+    """
+    Yields every page of records between `start` and `end`, following
+    `next_token` until WHOOP says there are no more.
+    """
+    params = {'limit': PAGE_LIMIT}
+    if start:
+        params['start'] = whoop_datetime(start)
+    if end:
+        params['end'] = whoop_datetime(end)
+
+    while True:
+        records, next_token = fetch_page(access_token, path, params)
+        if records:
+            yield records
+        if not next_token:
+            return
+        params = {**params, 'nextToken': next_token}
+
+
+def sync_resource(profile, access_token, resource):
+    """
+    Stores every record newer than the athlete's watermark for `resource`
+    and moves the watermark forward. Returns the number of records written.
+    """
+    state, _ = WhoopSyncState.objects.get_or_create(athlete=profile, resource=resource.name)
+    start = state.watermark - WATERMARK_OVERLAP if state.watermark else None
+
+    written = 0
+    newest = state.watermark
+    for records in iter_pages(access_token, resource.path, start=start):
+        written += resource.ingester.ingest(profile, records)
+        for item in records:
+            seen = parse_datetime(item[resource.watermark_field])
+            if newest is None or seen > newest:
+                newest = seen
+
+    # Pages come newest-first, so only move the watermark once the whole
+    # range is stored; a failure halfway re-fetches it next time.
+    state.watermark = newest
+    state.last_synced_at = timezone.now()
+    state.save(update_fields=['watermark', 'last_synced_at'])
+    return written
+
+
+def sync_athlete(profile, resources=None):
+    """
+    Syncs the given resources (default: all) for one athlete.
+    Returns a dict of resource name -> number of records stored.
+    """
+    access_token = get_valid_access_token(profile)
+    if not access_token:
+        raise WhoopSyncError("WHOOP not connected or token expired.")
+
+    results = {}
+    for name in resources or RESOURCES:
+        try:
+            results[name] = sync_resource(profile, access_token, RESOURCES[name])
+        except requests.exceptions.RequestException as e:
+            raise WhoopSyncError(f"Failed to fetch {name} from WHOOP: {e}") from e
+    return results
+
+
+def connected_athletes():
+    """
+    Athletes that have gone through the WHOOP OAuth flow.
+    """
+    return (
+        AthleteProfile.objects
+        .exclude(whoop_access_token__isnull=True)
+        .exclude(whoop_access_token='')
+        .select_related('user')
+    )
+
+
+def sync_all_athletes(resources=None):
+    """
+    Syncs every connected athlete, one at a time.
+    Failures are logged and counted, they never stop the run.
+    """
+    summary = {'synced': 0, 'failed': 0, 'records': 0}
+    for profile in connected_athletes().iterator():
+        try:
+            results = sync_athlete(profile, resources)
+        except WhoopSyncError as e:
+            logger.warning("WHOOP sync failed for athlete %s: %s", profile.pk, e)
+            summary['failed'] += 1
+            continue
+        summary['synced'] += 1
+        summary['records'] += sum(results.values())
+    return summary
+
+
+# Athlete ids with a background sync currently running in this process.
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def sync_athlete_async(profile, resources=None):
+    """
+    Runs `sync_athlete` in a background thread so the request does not wait
+    on WHOOP. Returns False if a sync for this athlete is already running.
+    """
+    with _in_flight_lock:
+        if profile.pk in _in_flight:
+            return False
+        _in_flight.add(profile.pk)
+
+    thread = threading.Thread(
+        target=_run_background_sync,
+        args=(profile.pk, resources),
+        name=f"whoop-sync-{profile.pk}",
+        daemon=True,
+    )
+    thread.start()
+    return True
+
+
+def _run_background_sync(profile_id, resources):
+    try:
+        profile = AthleteProfile.objects.select_related('user').get(pk=profile_id)
+        sync_athlete(profile, resources)
+    except (AthleteProfile.DoesNotExist, WhoopSyncError) as e:
+        logger.warning("Background WHOOP sync failed for athlete %s: %s", profile_id, e)
+    except Exception:
+        logger.exception("Background WHOOP sync crashed for athlete %s", profile_id)
+    finally:
+        # Threads get their own DB connection; don't leak it.
+        connection.close()
+        with _in_flight_lock:
+            _in_flight.discard(profile_id)
@@ -0,0 +1,211 @@
+"""
+WHOOP webhooks: instead of polling every athlete for every resource, WHOOP
+tells us which record changed and we fetch just that one.
+
+The receiver (users.views.WhoopWebhookView) verifies the signature, stores
+the event (deduped on trace_id) and hands it to `process_event_async`;
+`process_event` fetches and upserts the referenced record, or deletes our
+copy for `*.deleted` events.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from recovery.models import Recovery
+from sleep.models import Sleep
+from users.models import AthleteProfile, WhoopWebhookEvent
+from workouts.models import Workout
+from .whoop_client import get_client
+from .whoop_ingest import recovery_ingester, records_deleted, sleep_ingester, workout_ingester
+from .whoop_service import get_valid_access_token
+from .whoop_sync import CYCLE_PATH, SLEEP_PATH, WORKOUT_PATH
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'HTTP_X_WHOOP_SIGNATURE'
+TIMESTAMP_HEADER = 'HTTP_X_WHOOP_SIGNATURE_TIMESTAMP'
+
+# Events whose timestamp is further than this from our clock are rejected,
+# so a captured delivery can't be replayed later.
+SIGNATURE_TOLERANCE = 5 * 60  # seconds
+
+RESOURCES = ('recovery', 'workout', 'sleep')
+
+
+def sign(body, timestamp, secret):
+    """
+    base64(HMAC-SHA256(timestamp + body)) keyed with the app's client secret.
+    """
+    digest = hmac.new(secret.encode(), timestamp.encode() + body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+def verify_signature(body, timestamp, signature, secret=None, now=None):
+    """
+    True if `signature` is WHOOP's signature of `body` and `timestamp`
+    (milliseconds since the epoch) is recent.
+    """
+    secret = secret or settings.WHOOP_CLIENT_SECRET
+    if not (secret and timestamp and signature):
+        return False
+    try:
+        sent_at = int(timestamp) / 1000
+    except ValueError:
+        return False
+    if abs((now or time.time()) - sent_at) > SIGNATURE_TOLERANCE:
+        return False
+    return hmac.compare_digest(sign(body, timestamp, secret), signature)
+
+
+def parse_event_type(event_type):
+    """
+    "workout.updated" -> ("workout", "updated"); None for types we don't handle.
+    """
+    resource, _, action = event_type.partition('.')
+    if resource not in RESOURCES or action not in ('updated', 'deleted'):
+        return None
+    return resource, action
+
+
+def fetch_recovery(access_token, sleep_id):
+    # Recovery events carry the sleep id; recovery is looked up by cycle.
+    sleep = get_client().get(f"{SLEEP_PATH}/{sleep_id}", access_token, endpoint='sleep-by-id')
+    return get_client().get(
+        f"{CYCLE_PATH}/{sleep['cycle_id']}/recovery", access_token, endpoint='recovery-by-cycle')
+
+
+def fetch_workout(access_token, workout_id):
+    return get_client().get(f"{WORKOUT_PATH}/{workout_id}", access_token, endpoint='workout-by-id')
+
+
+def fetch_sleep(access_token, sleep_id):
+    return get_client().get(f"{SLEEP_PATH}/{sleep_id}", access_token, endpoint='sleep-by-id')
+
+
+FETCHERS = {
+    'recovery': (fetch_recovery, recovery_ingester),
+    'workout': (fetch_workout, workout_ingester),
+    'sleep': (fetch_sleep, sleep_ingester),
+}
+
+
+def local_rows(athlete, resource, object_id):
+    if resource == 'recovery':
+        return Recovery.objects.filter(athlete=athlete, sleep_id=object_id)
+    model = Workout if resource == 'workout' else Sleep
+    return model.objects.filter(athlete=athlete, whoop_id=object_id)
+
+
+def delete_record(athlete, resource, object_id):
+    with transaction.atomic():
+        rows = list(local_rows(athlete, resource, object_id))
+        if rows:
+            type(rows[0]).objects.filter(pk__in=[row.pk for row in rows]).delete()
+            records_deleted.send(sender=type(rows[0]), athlete=athlete, instances=rows)
+    return len(rows)
+
+
+def _finish(event, status, error=''):
+    event.status = status
+    event.error = error
+    event.processed_at = timezone.now()
+    event.save(update_fields=['status', 'error', 'processed_at', 'athlete'])
+    return event
+
+
+def process_event(event):
+    """
+    Applies one stored webhook event: re-fetches and upserts the record it
+    names, or deletes our copy. Returns the event with its final status.
+    """
+    parsed = parse_event_type(event.event_type)
+    if parsed is None:
+        return _finish(event, WhoopWebhookEvent.IGNORED, f"Unhandled event type {event.event_type}.")
+    resource, action = parsed
+
+    event.athlete = AthleteProfile.objects.filter(whoop_user_id=event.whoop_user_id).first()
+    if event.athlete is None:
+        return _finish(event, WhoopWebhookEvent.IGNORED, f"No athlete for WHOOP user {event.whoop_user_id}.")
+
+    if action == 'deleted':
+        delete_record(event.athlete, resource, event.object_id)
+        return _finish(event, WhoopWebhookEvent.PROCESSED)
+
+    access_token = get_valid_access_token(event.athlete)
+    if not access_token:
+        return _finish(event, WhoopWebhookEvent.FAILED, "WHOOP not connected or token expired.")
+
+    fetch, ingester = FETCHERS[resource]
+    try:
+        record = fetch(access_token, event.object_id)
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            # Deleted again before we got to it; the deleted event follows.
+            return _finish(event, WhoopWebhookEvent.IGNORED, "Record no longer exists.")
+        return _finish(event, WhoopWebhookEvent.FAILED, str(e))
+    except requests.exceptions.RequestException as e:
+        return _finish(event, WhoopWebhookEvent.FAILED, str(e))
+
+    ingester.ingest(event.athlete, [record])
+    return _finish(event, WhoopWebhookEvent.PROCESSED)
+
+
+def record_event(payload):
+    """
+    Stores a webhook payload. Returns (event, created); `created` is False
+    for a redelivery of an event we already have.
+    """
+    return WhoopWebhookEvent.objects.get_or_create(
+        trace_id=str(payload['trace_id']),
+        defaults={
+            'event_type': payload['type'],
+            'whoop_user_id': str(payload['user_id']),
+            'object_id': str(payload['id']),
+        },
+    )
+
+
+def process_event_async(event):
+    """
+    Processes the event in a background thread so WHOOP gets its 2xx
+    right away.
+    """
+    thread = threading.Thread(
+        target=_run_background_event,
+        args=(event.pk,),
+        name=f"whoop-webhook-{event.pk}",
+        daemon=True,
+    )
+    thread.start()
+
+
+def _run_background_event(event_id):
+    try:
+        process_event(WhoopWebhookEvent.objects.get(pk=event_id))
+    except Exception:
+        logger.exception("WHOOP webhook event %s crashed", event_id)
+    finally:
+        # Threads get their own DB connection; don't leak it.
+        connection.close()
+
+
+def process_pending_events():
+    """
+    Re-runs events that never finished or failed (e.g. the process died or
+    WHOOP was down). Returns a dict of final status -> count.
+    """
+    summary = {}
+    pending = WhoopWebhookEvent.objects.filter(
+        status__in=[WhoopWebhookEvent.RECEIVED, WhoopWebhookEvent.FAILED]).order_by('received_at')
+    for event in pending.iterator():
+        status = process_event(event).status
+        summary[status] = summary.get(status, 0) + 1
+    return summary
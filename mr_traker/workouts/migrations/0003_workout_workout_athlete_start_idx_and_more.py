@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_whoopratelimitbucket'),
+        ('workouts', '0002_workout_workout_athlete_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['athlete', 'start'], name='workout_athlete_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['athlete', 'sport_id', 'start'], name='workout_athlete_sport_idx'),
+        ),
+    ]
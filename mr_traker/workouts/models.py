@@ -23,5 +23,14 @@ class Workout(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Conditional GET validator: Max(updated_at) per athlete
+            models.Index(fields=['athlete', 'updated_at'], name='workout_athlete_updated_idx'),
+            # Newest-first lists and date ranges, optionally per sport
+            models.Index(fields=['athlete', 'start'], name='workout_athlete_start_idx'),
+            models.Index(fields=['athlete', 'sport_id', 'start'], name='workout_athlete_sport_idx'),
+        ]
+
     def __str__(self):
         return f"Workout {self.whoop_id} - {self.start}"
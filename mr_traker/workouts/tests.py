@@ -1,3 +1,123 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from users.models import User, AthleteProfile, WhoopSyncState
+from utils.whoop_ingest import ingest_workouts
+from utils.whoop_sync import sync_athlete
+from .models import Workout
+from .views import workout_queryset
+
+
+def whoop_workout(whoop_id, strain=10.0):
+    return {
+        "id": whoop_id,
+        "start": "2025-12-01T08:00:00.000Z",
+        "end": "2025-12-01T09:00:00.000Z",
+        "timezone_offset": "+02:00",
+        "sport_id": 1,
+        "score_state": "SCORED",
+        "score": {"strain": strain, "average_heart_rate": 140, "max_heart_rate": 180},
+    }
+
+
+class WorkoutSyncTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="athlete", password="pw")
+        self.profile = AthleteProfile.objects.create(
+            user=self.user,
+            whoop_access_token="token",
+            whoop_token_expires_at=timezone.now() + timedelta(hours=1),
+        )
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_sync_athlete_stores_workouts(self, mock_request):
+        mock_request.return_value.json.return_value = {
+            "records": [whoop_workout("a"), whoop_workout("b", strain=12.5)],
+            "next_token": None,
+        }
+
+        results = sync_athlete(self.profile, resources=['workout'])
+
+        self.assertEqual(results, {'workout': 2})
+        self.assertEqual(Workout.objects.get(whoop_id="b").strain, 12.5)
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_sync_follows_next_token_and_resumes_from_watermark(self, mock_request):
+        first, second = whoop_workout("a"), whoop_workout("b")
+        second["start"] = "2025-12-03T08:00:00.000Z"
+        mock_request.return_value.json.side_effect = [
+            {"records": [second], "next_token": "page-2"},
+            {"records": [first], "next_token": None},
+            {"records": [], "next_token": None},
+        ]
+
+        sync_athlete(self.profile, resources=['workout'])
+        self.assertEqual(Workout.objects.count(), 2)
+        self.assertEqual(mock_request.call_args_list[1].kwargs['params']['nextToken'], "page-2")
+        self.assertNotIn('start', mock_request.call_args_list[0].kwargs['params'])
+
+        state = WhoopSyncState.objects.get(athlete=self.profile, resource='workout')
+        self.assertEqual(state.watermark.isoformat(), "2025-12-03T08:00:00+00:00")
+
+        # Next run only asks for records from the watermark (minus the overlap) on.
+        sync_athlete(self.profile, resources=['workout'])
+        self.assertEqual(mock_request.call_args.kwargs['params']['start'], "2025-12-02T08:00:00.000Z")
+
+    @patch('utils.whoop_client.requests.Session.request')
+    def test_list_is_served_from_database(self, mock_request):
+        now = timezone.now()
+        Workout.objects.create(athlete=self.profile, whoop_id="old", start=now - timedelta(days=1), end=now)
+        Workout.objects.create(athlete=self.profile, whoop_id="new", start=now, end=now)
+
+        response = self.client.get(reverse('workout-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([w['whoop_id'] for w in response.json()], ["new", "old"])
+        mock_request.assert_not_called()
+
+    def test_conditional_get_returns_304_until_workouts_change(self):
+        now = timezone.now()
+        Workout.objects.create(athlete=self.profile, whoop_id="a", start=now, end=now)
+        first = self.client.get(reverse('workout-list'))
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+
+        response = self.client.get(reverse('workout-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+        response = self.client.get(reverse('workout-list'), HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_workouts(self.profile, [whoop_workout("b")])
+        response = self.client.get(reverse('workout-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_sport_filter_and_query_plans(self):
+        now = timezone.now()
+        Workout.objects.create(athlete=self.profile, whoop_id="run", sport_id=0, start=now, end=now)
+        Workout.objects.create(athlete=self.profile, whoop_id="bike", sport_id=1, start=now, end=now)
+
+        response = self.client.get(reverse('workout-list'), {'sport': 1})
+        self.assertEqual([w['whoop_id'] for w in response.json()], ["bike"])
+        self.assertEqual(self.client.get(reverse('workout-list'), {'sport': 'x'}).status_code, 400)
+
+        page = workout_queryset(self.profile, {'start': '2025-01-01'}).order_by('-start', '-pk')[:25]
+        self.assertIn('workout_athlete_start_idx', page.explain())
+        page = workout_queryset(self.profile, {'sport': '1'}).order_by('-start', '-pk')[:25]
+        self.assertIn('workout_athlete_sport_idx', page.explain())
+
+    @patch('workouts.views.sync_athlete_async')
+    def test_refresh_triggers_background_sync(self, mock_sync):
+        response = self.client.get(reverse('workout-list'), {'refresh': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        mock_sync.assert_called_once_with(self.profile, resources=['workout'])
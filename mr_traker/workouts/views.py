@@ -1,85 +1,73 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from django.utils.dateparse import parse_datetime
-import requests
 
 from .models import Workout
 from .serializers import WorkoutSerializer
-from users.models import User
-from utils.whoop_service import get_valid_access_token
+from utils.conditional import aggregate_validator, conditional_response, make_etag, query_shape
+from utils.pagination import date_range, keyset_page, page_headers, page_size
+from utils.response_cache import cached_list_response
+from utils.whoop_sync import sync_athlete_async
+
+
+def workout_queryset(profile, params):
+    """
+    The athlete's workouts, filtered by ?start=/?end= on start and ?sport=.
+    Served by the (athlete, start) / (athlete, sport_id, start) indexes.
+    """
+    workouts = date_range(Workout.objects.filter(athlete=profile), 'start', params)
+    if params.get('sport'):
+        workouts = workouts.filter(sport_id=int(params['sport']))
+    return workouts
+
 
 class WorkoutListView(APIView):
     """
     GET /api/workouts/
-    Fetches latest workouts from WHOOP and returns them.
+    Returns the athlete's workouts stored by the WHOOP sync, newest first.
+    Query Params: ?limit=25&start=2025-12-01&end=2025-12-31&sport=1&cursor=...&refresh=1
+    Pages are keyset-paginated: the next page's cursor is in the Link and
+    X-Next-Cursor headers.
+    `refresh=1` starts a background WHOOP sync; the response does not wait for it.
+    Responses are cached per athlete until a sync writes new data (X-Cache header),
+    and carry ETag / Last-Modified; a matching conditional GET gets a 304.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         # 1. Get the Athlete Profile
         user = request.user
-        
+
         # Helper: if trainer, allow specifying athlete_id? (SKIP FOR NOW, assume user is athlete)
         if not hasattr(user, 'athlete_profile'):
              return Response({"detail": "User is not an athlete."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        profile = user.athlete_profile
 
-        # 2. Get Valid Token (Refresh if needed)
-        access_token = get_valid_access_token(profile)
-        if not access_token:
-            return Response({"detail": "WHOOP not connected or token expired."}, status=status.HTTP_401_UNAUTHORIZED)
+        profile = user.athlete_profile
 
-        # 3. Fetch from WHOOP API
-        # We are getting 'default backend - 404' which means the Host/Path combination is wrong.
-        # We will try a list of candidates to confirm the correct one.
-        
-        # 3. Fetch from WHOOP API
-        # Verified URL: https://api.prod.whoop.com/developer/v2/activity/workout
-        url = "https://api.prod.whoop.com/developer/v2/activity/workout?limit=25"
-        headers = {"Authorization": f"Bearer {access_token}"}
-        
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            
-            workouts_data = response.json()
-             
-            # V2 returns a paginated response wrapper { "records": [...], "next_token": ... }
-            if isinstance(workouts_data, dict) and 'records' in workouts_data:
-                 workouts_data = workouts_data['records']
+            limit = page_size(request.query_params)
+            workouts = workout_queryset(profile, request.query_params)
+        except ValueError:
+            return Response({"detail": "limit must be 1-100, start/end ISO dates and sport an integer."}, status=status.HTTP_400_BAD_REQUEST)
 
-        except requests.exceptions.RequestException as e:
-            return Response({"detail": f"Failed to fetch workouts from WHOOP: {e}"}, status=status.HTTP_502_BAD_GATEWAY)
+        # 2. Kick off a sync if asked to (never blocks on WHOOP)
+        if request.query_params.get('refresh') in ('1', 'true'):
+            if not profile.whoop_access_token:
+                return Response({"detail": "WHOOP not connected or token expired."}, status=status.HTTP_401_UNAUTHORIZED)
+            sync_athlete_async(profile, resources=['workout'])
 
-        # 4. Sync to DB
-        synced_workouts = []
-        for item in workouts_data:
-            score = item.get('score', {})
-            
-            workout, created = Workout.objects.update_or_create(
-                whoop_id=item['id'],
-                defaults={
-                    'athlete': profile,
-                    'start': parse_datetime(item['start']),
-                    'end': parse_datetime(item['end']),
-                    'timezone_offset': item.get('timezone_offset'),
-                    'sport_id': item.get('sport_id'),
-                    'score_state': item.get('score_state'),
-                    # Score fields
-                    'strain': score.get('strain'),
-                    'average_heart_rate': score.get('average_heart_rate'),
-                    'max_heart_rate': score.get('max_heart_rate'),
-                    'kilojoule': score.get('kilojoule'),
-                    'percent_recorded': score.get('percent_recorded'),
-                    'distance_meter': score.get('distance_meter'),
-                    'altitude_gain_meter': score.get('altitude_gain_meter'),
-                    'altitude_change_meter': score.get('altitude_change_meter'),
-                }
-            )
-            synced_workouts.append(workout)
+        # 3. Build one page from cache or DB (ordered by start desc)
+        def build():
+            page, next_cursor = keyset_page(workouts, 'start', request.query_params.get('cursor'), limit)
+            return WorkoutSerializer(page, many=True).data, page_headers(request, next_cursor)
 
-        # 5. Return from DB (ordered by start desc)
-        serializer = WorkoutSerializer(synced_workouts, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # 4. Answer conditional GETs before building anything
+        last_modified, count = aggregate_validator(Workout.objects.filter(athlete=profile))
+        etag = make_etag('workout-list', profile.pk, query_shape(request.query_params), last_modified, count)
+        try:
+            return conditional_response(
+                request, etag, last_modified,
+                lambda: cached_list_response('workout-list', profile.pk, request.query_params, build),
+            )
+        except ValueError:
+            return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)